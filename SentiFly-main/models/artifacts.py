@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.directories import atomic_directory
+
+# Bump when the on-disk layout itself changes
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class Artifact:
+    """
+    A loaded model artifact: its manifest plus its named arrays.
+
+    Arrays are memory-mapped read-only by default, so processes loading the
+    same artifact share the underlying pages instead of holding copies.
+    """
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+
+    @property
+    def kind(self):
+        return self.manifest["kind"]
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    @property
+    def schema_hash(self):
+        return self.manifest["schema_hash"]
+
+    @property
+    def trained_at(self):
+        return self.manifest["trained_at"]
+
+    @property
+    def params(self):
+        return self.manifest["params"]
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+
+def compute_schema_hash(kind, params, array_specs):
+    """
+    Hash what loading code depends on: the model kind, its parameter names
+    and the name, dtype and rank of every array.
+
+    Parameters:
+    kind (str): Model kind, e.g. "learned_sentiment"
+    params (dict): Model parameters
+    array_specs (dict): Array name -> {"dtype": str, "shape": list}
+
+    Returns:
+    str: Hex digest of the schema
+    """
+    schema = {
+        "kind": kind,
+        "params": sorted(params),
+        "arrays": {name: [spec["dtype"], len(spec["shape"])] for name, spec in sorted(array_specs.items())}
+    }
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def save_artifact(path, kind, arrays, params=None, version=1, write_files=None):
+    """
+    Write a model artifact directory: one .npy file per array plus a
+    manifest.json recording version, schema hash and training timestamp.
+
+    The directory is written through atomic_directory(), so an artifact
+    being replaced stays readable until the new one is complete.
+
+    Parameters:
+    path (str): Artifact directory to create or replace
+    kind (str): Model kind
+    arrays (dict): Array name -> NumPy array
+    params (dict): JSON-serialisable model parameters
+    version (int): Model version
+    write_files (callable): Called with the directory being assembled to add
+        files that are not arrays, e.g. a transformers checkpoint
+
+    Returns:
+    dict: The written manifest
+    """
+    params = params or {}
+    with atomic_directory(path) as tmp_dir:
+        array_specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            file_name = f"{name}.npy"
+            np.save(os.path.join(tmp_dir, file_name), array, allow_pickle=False)
+            array_specs[name] = {"file": file_name, "dtype": array.dtype.str, "shape": list(array.shape)}
+        if write_files is not None:
+            write_files(tmp_dir)
+
+        manifest = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "kind": kind,
+            "version": version,
+            "schema_hash": compute_schema_hash(kind, params, array_specs),
+            "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "params": params,
+            "arrays": array_specs
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+
+    return manifest
+
+
+def read_manifest(path):
+    """
+    Read and validate an artifact manifest without touching its arrays.
+
+    Parameters:
+    path (str): Artifact directory
+
+    Returns:
+    dict: Manifest
+    """
+    with open(os.path.join(path, MANIFEST_NAME), "r", encoding="utf-8") as file:
+        manifest = json.load(file)
+
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+
+    expected = compute_schema_hash(manifest["kind"], manifest["params"], manifest["arrays"])
+    if manifest["schema_hash"] != expected:
+        raise ValueError("Artifact manifest does not match its schema hash")
+
+    return manifest
+
+
+def load_artifact(path, kind=None, schema_hash=None, mmap=True):
+    """
+    Load a model artifact.
+
+    Parameters:
+    path (str): Artifact directory
+    kind (str): Expected model kind, checked if given
+    schema_hash (str): Expected schema hash, checked if given
+    mmap (bool): Memory-map arrays read-only instead of reading them into memory
+
+    Returns:
+    Artifact: Manifest and arrays
+    """
+    manifest = read_manifest(path)
+    if kind is not None and manifest["kind"] != kind:
+        raise ValueError(f"Expected a {kind} artifact, found {manifest['kind']}")
+    if schema_hash is not None and manifest["schema_hash"] != schema_hash:
+        raise ValueError("Artifact schema does not match what this code expects")
+
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        array = np.load(os.path.join(path, spec["file"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+        if list(array.shape) != spec["shape"] or array.dtype.str != spec["dtype"]:
+            raise ValueError(f"Array {name} does not match the manifest")
+        arrays[name] = array
+
+    return Artifact(path, manifest, arrays)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a model artifact")
+    parser.add_argument("path", help="Artifact directory")
+    args = parser.parse_args()
+
+    manifest = read_manifest(args.path)
+    print(f"kind:        {manifest['kind']}")
+    print(f"version:     {manifest['version']}")
+    print(f"trained at:  {manifest['trained_at']}")
+    print(f"schema hash: {manifest['schema_hash']}")
+    for name, spec in manifest["arrays"].items():
+        print(f"  {name:<12} {spec['dtype']:<6} {tuple(spec['shape'])}")
+
+
+if __name__ == "__main__":
+    main()
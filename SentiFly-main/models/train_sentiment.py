@@ -0,0 +1,28 @@
+import argparse
+import time
+
+import pandas as pd
+
+from pages.models import DEFAULT_LEARNED_MODEL_PATH, LearnedSentimentAnalyzer
+from utils.utils import REVIEWS_CSV_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram sentiment model and save it as an artifact")
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Labelled review CSV")
+    parser.add_argument("--out", default=DEFAULT_LEARNED_MODEL_PATH, help="Artifact directory to write")
+    parser.add_argument("--version", type=int, default=1, help="Model version recorded in the artifact")
+    args = parser.parse_args()
+
+    reviews = pd.read_csv(args.csv, usecols=["Review Text", "Sentiment"])
+
+    start = time.perf_counter()
+    model = LearnedSentimentAnalyzer().fit(reviews["Review Text"], reviews["Sentiment"])
+    print(f"Trained on {len(reviews)} reviews in {time.perf_counter() - start:.2f} s")
+
+    manifest = model.save(args.out, version=args.version)
+    print(f"Saved {manifest['kind']} v{manifest['version']} to {args.out} (schema {manifest['schema_hash'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
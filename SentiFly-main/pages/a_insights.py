@@ -3,7 +3,17 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 import base64
+import datetime
 import os
+from utils.complaint_terms import complaint_buckets, top_complaint_terms
+from utils.ingest import ensure_csv_reviews
+from utils.reputation import airline_reputations
+from utils.review_repository import get_repository
+from utils.review_rollups import CSV_SOURCE, load_rollups, mean_ratings, rollup_dimensions
+from utils.review_search import search_reviews
+from utils.review_snapshot import ensure_snapshot, load_reviews
+from utils.review_embeddings import ReviewEmbeddingIndex
+from utils.utils import REVIEW_EMBEDDINGS_PATH
 st.set_page_config(page_title="Airline Insights Dashboard", layout="wide")
 #  Set page title and layout
 def show():
@@ -31,11 +41,9 @@ def set_background(image_path):
 #  Set background
 set_background(r"SentiFly-main/Images/bg8.jpeg")  # Adjust path if needed
 
-#  Load dataset
-df = pd.read_csv("airline_reviews_with_fake.csv")
-df["Date of Travel"] = pd.to_datetime(df["Date of Travel"])
-df["Month"] = df["Date of Travel"].dt.strftime("%B")  # Month names with year
-df["Year"] = df["Date of Travel"].dt.year  # Extract year column
+#  Review rows come from the Parquet snapshot kept by utils.review_snapshot,
+#  rebuilt only when the CSV changes; each filter reads just its partitions
+snapshot_columns = ensure_snapshot()["columns"]
 
 # 🎨 **Graph Styling - Light Theme Adjustments**
 graph_layout = dict(
@@ -72,25 +80,32 @@ st.markdown(custom_css, unsafe_allow_html=True)
 st.markdown("# Airline Insights Dashboard")
 st.markdown("i")
 
+# ✅ Filter choices and charts come from the rollups kept by utils.review_rollups:
+# a few hundred pre-aggregated rows per airline instead of every review. A
+# fresh database gets the review CSV loaded into it first.
+ensure_csv_reviews()
+with get_repository().connection() as conn:
+    rollup_airlines, rollup_years, rollup_months = rollup_dimensions(conn)
+if not rollup_airlines:
+    st.info("No reviews yet.")
+    st.stop()
+
 # ✅ Filters in one row
 col_filter1, col_filter2, col_filter3 = st.columns([1, 1, 1])
 
 # 📌 Airline Selection Dropdown
 with col_filter1:
     selected_airline = st.selectbox(
-        "Choose an airline", df["Airline Name"].unique(), key="airline_select"
+        "Choose an airline", rollup_airlines, key="airline_select"
     )
 
 # 📌 Month Filter
-# 📌 Extract Month Names in Correct Order
-df["Month Name"] = df["Date of Travel"].dt.month_name()  # Extract only the month name
-
 # ✅ Ensure Months are Ordered (January → December)
 month_order = [
     "January", "February", "March", "April", "May", "June", 
     "July", "August", "September", "October", "November", "December"
 ]
-month_list = sorted(df["Month Name"].unique(), key=lambda x: month_order.index(x))  # Sort in correct order
+month_list = [month_order[month - 1] for month in rollup_months]  # Rollup months are 1-12
 
 # 📌 Month Filter (Ordered List)
 with col_filter2:
@@ -98,25 +113,48 @@ with col_filter2:
 
 # 📌 Year Filter
 with col_filter3:
-    year_list = df["Year"].unique()
+    year_list = rollup_years
     selected_year = st.selectbox("Select Year", ["All"] + list(map(str, year_list)), key="year_filter")
 
 # ✅ Filter Data
-airline_df = df[df["Airline Name"] == selected_airline]
+review_columns = ["Review Text", "Sentiment", "Date of Travel"] + [
+    column for column in snapshot_columns if column.startswith("Aspect ")
+]
+airline_df = load_reviews(
+    review_columns, selected_airline, year=None if selected_year == "All" else int(selected_year)
+)
 if selected_month != "All":
-    airline_df = airline_df[airline_df["Month"] == selected_month]
-if selected_year != "All":
-    airline_df = airline_df[airline_df["Year"] == int(selected_year)]
+    airline_df = airline_df[airline_df["Date of Travel"].dt.month == month_order.index(selected_month) + 1]
+with get_repository().connection() as conn:
+    airline_rollups = load_rollups(
+        conn, selected_airline,
+        year=None if selected_year == "All" else int(selected_year),
+        month=None if selected_month == "All" else month_order.index(selected_month) + 1
+    )
+# Categories and star ratings only exist for CSV reviews, not form reviews
+airline_csv_rollups = airline_rollups[airline_rollups["source"] == CSV_SOURCE]
 
 # ✅ Detailed Airline Insights
 st.markdown(f"###  Insights for {selected_airline}")
+
+# ⭐ Live reputation from the decayed sentiment table kept by utils.reputation
+with get_repository().connection() as conn:
+    reputation = next(iter(airline_reputations(conn, selected_airline)), None)
+if reputation is not None:
+    col_rep1, col_rep2, col_rep3, col_rep4 = st.columns(4)
+    col_rep1.metric("Reputation Score", f"{reputation.score:.0f}/100")
+    col_rep2.metric("Positive Rate", f"{reputation.positive_rate:.0%}")
+    col_rep3.metric("Negative Rate", f"{reputation.negative_rate:.0%}")
+    col_rep4.metric("Emergency Rate", f"{reputation.emergency_rate:.0%}")
 col1, col2 = st.columns(2)
 col3, col4 = st.columns(2)
 
 # 📊 Sentiment Breakdown
 with col1:
     st.subheader(" Sentiment Breakdown")
-    airline_sentiment = airline_df["Sentiment"].value_counts()
+    airline_sentiment = (
+        airline_rollups.groupby("sentiment")["reviews"].sum().rename_axis("Sentiment").sort_values(ascending=False)
+    )
     fig_airline_sentiment = px.bar(
         airline_sentiment, x=airline_sentiment.index, y=airline_sentiment.values,
         title="Sentiment Distribution", color=airline_sentiment.index,
@@ -128,8 +166,10 @@ with col1:
 # 🛑 Fake Review Analysis
 with col2:
     st.subheader(" Fake Reviews Analysis")
-    fake_review_counts = airline_df["Fake Review"].value_counts().reset_index()
-    fake_review_counts.columns = ["Fake Review", "count"]
+    fake_total = int(airline_rollups["fake_reviews"].sum())
+    fake_review_counts = pd.DataFrame(
+        {"Fake Review": [0, 1], "count": [int(airline_rollups["reviews"].sum()) - fake_total, fake_total]}
+    )
     fig_fake_reviews = px.pie(
         fake_review_counts, names="Fake Review", values="count", hole=0.5,
         title="Proportion of Fake Reviews", color_discrete_sequence=px.colors.sequential.Sunsetdark_r
@@ -140,7 +180,7 @@ with col2:
 # ⭐ Service Ratings Breakdown
 with col3:
     st.subheader(" Service Ratings Breakdown")
-    service_ratings = airline_df.pivot_table(index="Review Category", values="Rating", aggfunc="mean").reset_index()
+    service_ratings = mean_ratings(airline_csv_rollups, "category").rename(columns={"category": "Review Category"})
     fig_service_ratings = px.bar(
         service_ratings, x="Review Category", y="Rating", title="Service Ratings Overview",
         color="Rating", color_continuous_scale="Sunset"
@@ -151,7 +191,8 @@ with col3:
 # 📈 Review Trends Over Time
 with col4:
     st.subheader(" Review Trends Over Time")
-    review_trends = airline_df.groupby("Month")["Rating"].mean().reset_index()
+    review_trends = mean_ratings(airline_csv_rollups[airline_csv_rollups["month"] > 0], "month")
+    review_trends["Month"] = [month_order[month - 1] for month in review_trends["month"]]
     fig_trends = px.line(
         review_trends, x="Month", y="Rating", title="Review Trends Over Time (Monthly)",
         markers=True, color_discrete_sequence=["#FF6A88"]
@@ -159,6 +200,41 @@ with col4:
     fig_trends.update_layout(**graph_layout)
     st.plotly_chart(fig_trends, use_container_width=True)
 
+# 🧭 Aspect Sentiment, from the per-aspect columns written by utils.rescore
+aspect_columns = [column for column in airline_df.columns if column.startswith("Aspect ")]
+if aspect_columns:
+    st.subheader(" Aspect Sentiment")
+    aspect_sentiment = airline_df[aspect_columns].mean().rename(lambda column: column[len("Aspect "):])
+    fig_aspects = px.bar(
+        x=aspect_sentiment.index, y=aspect_sentiment.values,
+        labels={"x": "Aspect", "y": "Average Sentiment"}, title="Sentiment per Aspect",
+        color=aspect_sentiment.values, color_continuous_scale="RdYlGn"
+    )
+    fig_aspects.update_layout(**graph_layout)
+    st.plotly_chart(fig_aspects, use_container_width=True)
+
+# 🗣️ Top complaint terms per week, read from the sketches kept by utils.complaint_terms
+st.subheader(" What Travellers Are Complaining About")
+with get_repository().connection() as conn:
+    weeks = complaint_buckets(conn, selected_airline)
+    if not weeks:
+        st.info("No complaints counted yet. Run `python -m utils.complaint_terms rebuild` to count past reviews.")
+    else:
+        week_counts = dict(weeks)
+        selected_week = st.selectbox(
+            "Select Week", list(week_counts),
+            format_func=lambda week: f"{week} ({week_counts[week]} complaints)", key="complaint_week"
+        )
+        complaint_terms_df = pd.DataFrame(
+            top_complaint_terms(conn, selected_airline, selected_week, k=10), columns=["Term", "Mentions", "Error"]
+        )
+        fig_complaints = px.bar(
+            complaint_terms_df, x="Mentions", y="Term", orientation="h", title=f"Top Complaint Terms, {selected_week}",
+            color="Mentions", color_continuous_scale="Reds"
+        )
+        fig_complaints.update_layout(yaxis={"categoryorder": "total ascending"}, **graph_layout)
+        st.plotly_chart(fig_complaints, use_container_width=True)
+
 # 📝 Dropdown for Top Reviews per Sentiment
 st.markdown("## Recent Reviews per Sentiment")
 col5, col6 = st.columns([1, 3])
@@ -174,3 +250,63 @@ with col6:
         top_reviews.style.set_properties(**{"text-align": "left"}),
         width=800
     )
+
+# 🔎 Similar reviews from the embedding index (ids are CSV row numbers)
+@st.cache_resource
+def load_embedding_index():
+    if not os.path.exists(REVIEW_EMBEDDINGS_PATH):
+        return None
+    return ReviewEmbeddingIndex(REVIEW_EMBEDDINGS_PATH)
+
+embedding_index = load_embedding_index()
+if embedding_index is None:
+    st.info("Build the review embedding index with `python -m utils.review_embeddings build` to find similar reviews.")
+elif not top_reviews.empty:
+    st.markdown("### Reviews Like This One")
+    review_id = st.selectbox(
+        "Select a review", top_reviews.index,
+        format_func=lambda idx: top_reviews.at[idx, "Review Text"][:120],
+        key="similar_review_select"
+    )
+    query = embedding_index.vector(review_id)
+    if query is None:
+        st.warning("This review is not in the embedding index yet, rebuild it to include new reviews.")
+    else:
+        # Reposted copies of the selected text are not "similar" reviews
+        copies = load_reviews([], filters=[("Review Text", "=", top_reviews.at[review_id, "Review Text"])]).index
+        matches = embedding_index.search(query, k=5, exclude=copies, distinct=True)
+        match_reviews = load_reviews(
+            ["Airline Name", "Review Text", "Sentiment"],
+            filters=[("Review Id", "in", [match_id for match_id, _ in matches])]
+        )
+        matches = [(match_id, score) for match_id, score in matches if match_id in match_reviews.index]
+        similar = match_reviews.loc[[match_id for match_id, _ in matches]]
+        similar["Similarity"] = [score for _, score in matches]
+        if similar.empty:
+            st.write("No similar reviews found.")
+        else:
+            st.dataframe(similar.style.format({"Similarity": "{:.2f}"}), width=800)
+
+# 🔍 Full-text search, ranked by SQLite FTS5 (utils.review_search)
+st.markdown("## Search Reviews")
+col_search, col_page = st.columns([4, 1])
+with col_search:
+    search_text = st.text_input("Search review text", placeholder="e.g. lost baggage", key="review_search_text")
+with col_page:
+    search_page = st.number_input("Page", min_value=1, value=1, step=1, key="review_search_page")
+if search_text:
+    # The year filter becomes a travel date range evaluated in SQL
+    search_start = search_end = None
+    if selected_year != "All":
+        search_start = datetime.date(int(selected_year), 1, 1)
+        search_end = datetime.date(int(selected_year), 12, 31)
+    with get_repository().connection() as conn:
+        search_results, more_results = search_reviews(
+            conn, search_text, selected_airline, search_start, search_end, page=int(search_page), page_size=10
+        )
+    if not search_results:
+        st.write("No matching reviews.")
+    for result in search_results:
+        st.markdown(f"**{result.airline}** · {result.travel_date} · {result.snippet}")
+    if more_results:
+        st.caption("More results on the next page.")
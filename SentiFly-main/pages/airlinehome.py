@@ -5,6 +5,11 @@ import base64
 import os
 import random
 from datetime import datetime, timedelta
+from pages.models import get_analyzer
+from utils.emergency_alerts import latest_alerts, read_alerts
+from utils.reputation import REPUTATION_HALF_LIFE_DAYS, airline_reputations
+from utils.review_repository import get_repository
+from utils.upload_scoring import score_upload
 st.set_page_config(page_title="Airline Insights Dashboard", layout="wide")
 # Function to set background image
 def set_background(image_path):
@@ -41,38 +46,103 @@ def set_css():
 st.markdown("<h2 style='text-align: center;'>Upload Airline Reviews File</h2>", unsafe_allow_html=True)
 set_css()
 
+# Live emergency alerts: each poll reads only the alerts queued after the
+# last one this session has seen
+@st.fragment(run_every="5s")
+def show_emergency_alerts(max_shown=5):
+    with get_repository().connection() as alerts_conn:
+        if "alert_cursor" not in st.session_state:
+            recent = latest_alerts(alerts_conn, limit=max_shown)
+            new_alerts = []
+        else:
+            recent = st.session_state["recent_alerts"]
+            new_alerts = read_alerts(alerts_conn, st.session_state["alert_cursor"])
+
+    recent = (recent + new_alerts)[-max_shown:]
+    if recent:
+        st.session_state["alert_cursor"] = max(st.session_state.get("alert_cursor", 0), recent[-1].alert_id)
+    else:
+        st.session_state.setdefault("alert_cursor", 0)
+    st.session_state["recent_alerts"] = recent
+
+    for alert in new_alerts:
+        st.toast(f"🚨 New emergency review for {alert.airline}", icon="🚨")
+
+    st.markdown('<p style="font-size: 20px; font-weight: bold;">🚨 Emergency Alerts</p>', unsafe_allow_html=True)
+    if not recent:
+        st.info("No emergency reviews so far.")
+    for alert in reversed(recent):
+        st.error(f"**{alert.airline}** · {alert.created_at} UTC · review #{alert.review_id}\n\n{alert.review_comment}")
+
+show_emergency_alerts()
+
+# Live reputation: one small row per airline, kept up to date as reviews come in
+@st.fragment(run_every="30s")
+def show_reputation():
+    with get_repository().connection() as reputation_conn:
+        reputations = airline_reputations(reputation_conn)
+
+    st.markdown('<p style="font-size: 20px; font-weight: bold;">⭐ Airline Reputation</p>', unsafe_allow_html=True)
+    if not reputations:
+        st.info("No reviews counted yet. Run `python -m utils.reputation rebuild` to count past reviews.")
+        return
+    st.caption(f"Recent reviews weigh more: a review counts half as much after {REPUTATION_HALF_LIFE_DAYS:g} days.")
+    for column, reputation in zip(st.columns(len(reputations)), reputations):
+        column.metric(
+            reputation.airline, f"{reputation.score:.0f}/100",
+            help=f"Positive {reputation.positive_rate:.0%} · Negative {reputation.negative_rate:.0%} · "
+                 f"Neutral {reputation.neutral_rate:.0%} · Emergency {reputation.emergency_rate:.0%}"
+        )
+
+show_reputation()
+
 # File Upload
 st.markdown('<p style="font-size: 20px; font-weight: bold;">📂 Upload a CSV file</p>', unsafe_allow_html=True)
 uploaded_file = st.file_uploader("", type="csv")
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
-    
-    # Rename 'Review Text' to 'Review' if it exists
-    if "Review Text" in df.columns:
-        df.rename(columns={"Review Text": "Review"}, inplace=True)
-    
-    # Check required columns
-    required_columns = {"Sentiment", "Is Fake", "Review"}
-    missing_cols = required_columns - set(df.columns)
-    if missing_cols:
-        st.error(f"CSV must contain {required_columns} columns. Missing: {missing_cols}")
+    # Score the upload once per file: missing Sentiment / Is Fake columns are
+    # filled in chunk by chunk, the full result goes to a temporary CSV and
+    # only the columns the dashboard needs stay in memory. The temporary CSV
+    # is removed when the next file replaces it or the session ends
+    upload_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None))
+    scored = st.session_state.get("scored_upload")
+    upload_error = None
+    if scored is None or scored.key != upload_key:
+        if scored is not None:
+            scored.close()
+        st.session_state.pop("scored_upload", None)
+
+        progress_bar = st.progress(0.0, text="Scoring reviews...")
+        try:
+            scored = score_upload(
+                uploaded_file, get_analyzer(), key=upload_key,
+                progress=lambda fraction: progress_bar.progress(fraction, text="Scoring reviews...")
+            )
+            st.session_state["scored_upload"] = scored
+        except ValueError as e:
+            upload_error = str(e)
+        progress_bar.empty()
+
+    if upload_error:
+        st.error(upload_error)
     else:
+        df = scored.summary.copy()
+
         # Summary
         total_reviews = len(df)
-        fake_review_count = len(df[df["Is Fake"].str.lower() == "yes"])
-        sentiment_counts = df["Sentiment"].value_counts().to_dict()
+        fake_review_count = int((df["Is Fake"].astype(str).str.lower() == "yes").sum())
+        sentiment_counts = df["Sentiment"].value_counts().loc[lambda counts: counts > 0].to_dict()
         
         col1, col2, col3 = st.columns(3)
         col1.metric("Total Reviews", total_reviews)
         col2.metric("Fake Reviews", fake_review_count)
         col3.metric("Authentic Reviews", total_reviews - fake_review_count)
         
-        # Option to download specific sentiment data
+        # Option to download specific sentiment data; the file is built when
+        # the button is clicked and kept for later clicks
         selected_sentiment = st.selectbox("Select Sentiment to Download", list(sentiment_counts.keys()))
-        filtered_df = df[df["Sentiment"] == selected_sentiment]
-        sentiment_csv = filtered_df.to_csv(index=False).encode('utf-8')
-        st.download_button(label=f"📥 Download {selected_sentiment} Reviews", data=sentiment_csv, file_name=f"{selected_sentiment}_reviews.csv", mime="text/csv")
+        st.download_button(label=f"📥 Download {selected_sentiment} Reviews", data=lambda: scored.sentiment_csv(selected_sentiment), file_name=f"{selected_sentiment}_reviews.csv", mime="text/csv")
         
         # Visualizations
         st.markdown("<h2 style='text-align: center;'>Visual Insights</h2>", unsafe_allow_html=True)
@@ -106,7 +176,6 @@ if uploaded_file is not None:
         
         with col4:
             st.subheader("Review Length Distribution")
-            df["Review Length"] = df["Review"].astype(str).apply(len)
             length_fig = px.histogram(df, x="Review Length", nbins=30, title="Review Length Distribution", color_discrete_sequence=["#FF8C00"])
             st.plotly_chart(length_fig, use_container_width=True)
         
@@ -117,5 +186,4 @@ if uploaded_file is not None:
         
         # Report Download Option
         st.subheader("Download Full Report")
-        csv_data = df.to_csv(index=False).encode('utf-8')
-        st.download_button(label="📥 Download CSV Report", data=csv_data, file_name="airline_reviews_report.csv", mime="text/csv")
+        st.download_button(label="📥 Download CSV Report", data=scored.report_csv, file_name="airline_reviews_report.csv", mime="text/csv")
@@ -1,39 +1,114 @@
+import os
 import re
-from collections import Counter
+import threading
+from collections import Counter, OrderedDict, namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from models.artifacts import load_artifact, save_artifact
+from utils.hashing import ngram_hashes
+from utils.keyword_matcher import KeywordMatcher, strip_clause_breaks, tokenize
+from utils.lexicons import LexiconReloader, load_lexicons
+from utils.micro_batching import MicroBatcher
+from utils.utils import LEXICONS_PATH, extract_text_features, review_text_hash
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Everything an analyzer takes from one version of the lexicon file, swapped
+# as a whole. Lists are stored as tuples and mappings as read-only proxies
+LexiconState = namedtuple("LexiconState", [
+    "version", "positive_keywords", "negative_keywords", "neutral_keywords", "emergency_keywords",
+    "negators", "intensifiers", "negation_flip", "fake_indicators", "aspect_lexicons", "matcher"
+])
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with hit/miss counters.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+class ReviewAnalysis:
+    """
+    Result of SentimentAnalyzer.analyze_review.
+    """
+    __slots__ = ("sentiment", "scores", "is_fake", "aspects", "_text", "_features")
+
+    def __init__(self, sentiment, scores, is_fake, text, aspects=None):
+        self.sentiment = sentiment
+        self.scores = scores
+        self.is_fake = is_fake
+        # Aspect name -> signed sentiment score, None when not mentioned
+        self.aspects = aspects or {}
+        self._text = text
+        self._features = None
+
+    @property
+    def features(self):
+        """Text features for fake review models, computed on first access."""
+        if self._features is None:
+            self._features = extract_text_features(self._text)
+        return self._features
+
+    @property
+    def fake_review(self):
+        """Fake verdict in the "Fake" / "Genuine" form stored with reviews."""
+        return "Fake" if self.is_fake else "Genuine"
+
+    def __repr__(self):
+        return f"ReviewAnalysis(sentiment={self.sentiment!r}, fake_review={self.fake_review!r})"
+
+def _as_list(values):
+    """Return a Series, array or other iterable as a list; lists and tuples are returned as they are."""
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    if isinstance(values, (list, tuple)):
+        return values
+    return list(values)
 
 class SentimentAnalyzer:
     """
     Advanced rule-based sentiment analyzer for airline reviews.
     """
-    def __init__(self):
-        self.positive_keywords = [
-            "good", "great", "excellent", "amazing", "wonderful", "best", "love",
-            "enjoy", "comfortable", "clean", "friendly", "helpful", "professional",
-            "recommend", "awesome", "delicious", "pleasant", "smooth", "impressed",
-            "fantastic", "perfect", "satisfied", "happy", "efficient", "courteous"
-        ]
-        
-        self.negative_keywords = [
-            "bad", "worst", "terrible", "awful", "horrible", "poor", "hate",
-            "disappointing", "uncomfortable", "dirty", "rude", "unhelpful", "unprofessional",
-            "avoid", "disgusting", "unpleasant", "rough", "unimpressed",
-            "lousy", "imperfect", "unsatisfied", "unhappy", "inefficient", "discourteous"
-        ]
-        
-        self.neutral_keywords = [
-            "okay", "average", "moderate", "fair", "decent", "standard", "usual",
-            "normal", "typical", "common", "regular", "ordinary", "tolerable", "acceptable",
-            "satisfactory", "mediocre", "middle", "intermediate", "adequate", "sufficient"
-        ]
-        
-        self.emergency_keywords = [
-            "emergency", "danger", "unsafe", "alarming", "crash", "accident", "medical",
-            "sick", "ill", "injury", "injured", "turbulence", "cancelled", "stranded",
-            "urgent", "emergency landing", "oxygen masks", "panic", "critical", "disaster",
-            "fire", "loss of control", "engine failure", "mayday", "severe turbulence",
-            "medical assistance", "breathing issue", "unconscious", "technical failure"
-        ]
-        
+    artifact_kind = "keyword_sentiment"
+
+    def __init__(self, cache_size=0, contextual=True, lexicon_path=LEXICONS_PATH):
         self.labels = ["Negative", "Neutral", "Positive", "Emergency"]
         self.colors = {
             "Negative": "danger",
@@ -42,6 +117,106 @@ class SentimentAnalyzer:
             "Emergency": "warning"
         }
 
+        # Negation and intensity modifiers are applied in the same scan when contextual
+        self.contextual = contextual
+
+        # Sign each label contributes to an aspect score, in label order
+        self.aspect_polarity = (-1, 0, 1, 0)
+
+        # Score weights in label order; emergency terms weigh the most
+        self.weights = (1.0, 0.8, 1.2, 2.0)
+
+        # Optional LRU cache of scoring results keyed by normalized text hash
+        self.cache = ResultCache(cache_size) if cache_size else None
+
+        # Keyword lists, modifiers, fake indicators and aspect terms come
+        # from the versioned lexicon file
+        self.lexicons = None
+        self.apply_lexicons(load_lexicons(lexicon_path))
+
+        # Model artifact this analyzer was loaded from, if any
+        self.artifact = None
+
+    def apply_lexicons(self, data):
+        """
+        Compile lexicon data (as returned by load_lexicons) and swap it in.
+
+        The keyword lists, modifiers and matcher are built into a new
+        LexiconState and assigned in one step, so scoring calls already
+        running keep the state they started with and never see a mix of
+        two lexicon versions.
+        """
+        lexicons = data["lexicons"]
+        self.lexicons = LexiconState(
+            version=data.get("version"),
+            positive_keywords=tuple(lexicons["positive"]),
+            negative_keywords=tuple(lexicons["negative"]),
+            neutral_keywords=tuple(lexicons["neutral"]),
+            emergency_keywords=tuple(lexicons["emergency"]),
+            negators=tuple(data["negators"]),
+            intensifiers=MappingProxyType(dict(data["intensifiers"])),
+            # Label a negated keyword counts towards, e.g. "not good" is Negative
+            negation_flip=tuple(data["negation_flip"].get(label, label) for label in self.labels),
+            fake_indicators=tuple(data["fake_indicators"]),
+            aspect_lexicons=MappingProxyType({name: tuple(terms) for name, terms in data["aspects"].items()}),
+            matcher=self._compile_matcher(data)
+        )
+        if self.cache is not None:
+            self.cache.clear()
+
+    @property
+    def matcher(self):
+        return self.lexicons.matcher
+
+    @property
+    def lexicon_version(self):
+        return self.lexicons.version
+
+    def lexicon_data(self):
+        """Return a copy of the current lexicons in the lexicon file layout."""
+        lexicons = self.lexicons
+        return {
+            "version": lexicons.version,
+            "lexicons": {
+                "positive": list(lexicons.positive_keywords),
+                "negative": list(lexicons.negative_keywords),
+                "neutral": list(lexicons.neutral_keywords),
+                "emergency": list(lexicons.emergency_keywords)
+            },
+            "negators": list(lexicons.negators),
+            "intensifiers": dict(lexicons.intensifiers),
+            "negation_flip": dict(zip(self.labels, lexicons.negation_flip)),
+            "fake_indicators": list(lexicons.fake_indicators),
+            "aspects": {name: list(terms) for name, terms in lexicons.aspect_lexicons.items()}
+        }
+
+    def _compile_matcher(self, data):
+        """Compile all four lexicons into one matcher, in label order."""
+        lexicons = [
+            data["lexicons"]["negative"],
+            data["lexicons"]["neutral"],
+            data["lexicons"]["positive"],
+            data["lexicons"]["emergency"]
+        ]
+        aspects = {
+            "aspects": data["aspects"],
+            "aspect_polarity": self.aspect_polarity
+        }
+        if not self.contextual:
+            return KeywordMatcher(lexicons, **aspects)
+        negation_flip = [data["negation_flip"].get(label, label) for label in self.labels]
+        return KeywordMatcher(
+            lexicons,
+            negators=data["negators"],
+            intensifiers=data["intensifiers"],
+            negation_flip=[self.labels.index(label) for label in negation_flip],
+            **aspects
+        )
+
+    @property
+    def aspect_names(self):
+        return list(self.matcher.aspect_names)
+
     def preprocess(self, text):
         """Preprocess text: remove special characters, convert to lowercase."""
         if not isinstance(text, str):
@@ -51,35 +226,13 @@ class SentimentAnalyzer:
         text = re.sub(r'[^\w\s]', '', text)  # Remove special characters
         return text
 
-    def count_keywords(self, text, keyword_list):
-        """Count occurrences of keywords and key phrases in text."""
-        text = self.preprocess(text)
-        words = text.split()
-
-        # Count single-word matches
-        single_word_count = sum(1 for word in words if word in keyword_list)
-
-        # Count phrase matches
-        phrase_count = sum(1 for phrase in keyword_list if len(phrase.split()) > 1 and phrase in text)
-
-        return single_word_count + phrase_count
-
     def analyze(self, text):
         """Analyze sentiment of the given text."""
-        pos_count = self.count_keywords(text, self.positive_keywords)
-        neg_count = self.count_keywords(text, self.negative_keywords)
-        neu_count = self.count_keywords(text, self.neutral_keywords)
-        emg_count = self.count_keywords(text, self.emergency_keywords)
-        
-        # Adjust weighting to better detect emergency situations
-        pos_score = pos_count * 1.2
-        neg_score = neg_count * 1.0
-        neu_score = neu_count * 0.8
-        emg_score = emg_count * 2.0  # Increased weight for emergency terms
-
-        scores = [neg_score, neu_score, pos_score, emg_score]
-        max_score_idx = scores.index(max(scores))
-        sentiment = self.labels[max_score_idx]
+        tokens = self.matcher.tokenize(text)
+        if self.cache is not None:
+            sentiment = self._score_words(tokens)[0]
+        else:
+            sentiment = self._score_tokens(tokens)[0]
 
         return {
             "sentiment": sentiment,
@@ -90,17 +243,549 @@ class SentimentAnalyzer:
         """
         Detects potential fake reviews based on repetitive patterns, excessive keywords, and generic language.
         """
-        text = self.preprocess(text)
-        words = text.split()
+        if self.cache is not None:
+            is_fake = self._score_words(self.matcher.tokenize(text))[2]
+        else:
+            words = tokenize(text)
+            is_fake = self._is_fake(" ".join(words), words)
+        return "Fake" if is_fake else "Genuine"
+
+    def analyze_review(self, text):
+        """
+        Run every detector on the text, tokenizing it once for the keyword scan.
+
+        Returns a ReviewAnalysis with the sentiment label, per-label scores,
+        the fake verdict and per-aspect scores. Its text features for fake
+        review models, equal to extract_text_features(text), are only
+        computed if they are read.
+        """
+        tokens = self.matcher.tokenize(text)
+        sentiment, scores, is_fake, aspects = self._score_words(tokens)
+        return ReviewAnalysis(sentiment, dict(zip(self.labels, scores)), is_fake, text, dict(aspects))
+
+    def _score_tokens(self, words):
+        """Return (sentiment label, per-label scores) for tokenized text."""
+        # Single scan of the text counts all four categories together
+        counts = self.matcher.count_tokens(words)
+        scores = tuple(count * weight for count, weight in zip(counts, self.weights))
+        return self.labels[scores.index(max(scores))], scores
+
+    def _score_tokens_with_aspects(self, words):
+        """Return (sentiment label, per-label scores, aspect name -> score) from one scan."""
+        matcher = self.matcher
+        counts, aspects = matcher.count_tokens_with_aspects(words)
+        scores = tuple(count * weight for count, weight in zip(counts, self.weights))
+        return self.labels[scores.index(max(scores))], scores, dict(zip(matcher.aspect_names, aspects))
+
+    def _score_tokens_with_keyword_aspects(self, tokens):
+        """For model-based subclasses: model sentiment, aspect scores from the keyword scan."""
+        matcher = self.matcher
+        sentiment, scores = self._score_tokens(tokens)
+        return sentiment, scores, dict(zip(matcher.aspect_names, matcher.count_tokens_with_aspects(tokens)[1]))
+
+    def _score_words(self, tokens):
+        """Return (sentiment, scores, is_fake, aspects), going through the result cache when enabled."""
+        words = strip_clause_breaks(tokens)
+        normalized = " ".join(words)
+        if self.cache is None:
+            sentiment, scores, aspects = self._score_tokens_with_aspects(tokens)
+            return sentiment, scores, self._is_fake(normalized, words), aspects
+
+        # Entries remember the lexicon state they were scored with, so
+        # results from lexicons that have since been reloaded are never
+        # returned. The key keeps the clause breaks, which end negation scopes
+        lexicons = self.lexicons
+        key = review_text_hash(" ".join(tokens), normalized=True)
+        entry = self.cache.get(key)
+        if entry is None or entry[0] is not lexicons:
+            sentiment, scores, aspects = self._score_tokens_with_aspects(tokens)
+            entry = (lexicons, (sentiment, scores, self._is_fake(normalized, words, lexicons.fake_indicators), aspects))
+            self.cache.put(key, entry)
+        return entry[1]
+
+    def cache_info(self):
+        """Return cache hit/miss counters, or None when caching is disabled."""
+        return self.cache.info() if self.cache is not None else None
+
+    def _is_fake(self, text, words, fake_indicators=None):
+        """Apply the fake review rules to preprocessed text and its words."""
         word_counts = Counter(words)
 
         # Simple rule: if too many repeated words, it might be fake
-        most_common = word_counts.most_common(3)
-        if most_common and most_common[0][1] > 5:
-            return "Fake"
+        if word_counts and max(word_counts.values()) > 5:
+            return True
+
+        if fake_indicators is None:
+            fake_indicators = self.lexicons.fake_indicators
+        return any(word in text for word in fake_indicators)
+
+    def analyze_many(self, texts, aspects=False):
+        """
+        Score a batch of texts (any iterable or a pandas Series).
+
+        Returns a dict of NumPy column arrays that can be passed straight to
+        pd.DataFrame: "label_code" indexes into self.labels, one score column
+        per label and a boolean "is_fake" column. With aspects=True there is
+        also one "aspect_<name>" column per aspect, NaN where the text does
+        not mention it.
+        """
+        texts = _as_list(texts)
+
+        n_labels = len(self.labels)
+        counts = np.zeros((len(texts), n_labels), dtype=np.float64)
+        is_fake = np.zeros(len(texts), dtype=bool)
+        # One lexicon state for the whole batch, even if the lexicons are reloaded meanwhile
+        lexicons = self.lexicons
+        matcher = lexicons.matcher
+        fake_indicators = lexicons.fake_indicators
+        tokenize_text = matcher.tokenize
+
+        if aspects:
+            aspect_scores = np.full((len(texts), len(matcher.aspect_names)), np.nan)
+            count_tokens = matcher.count_tokens_with_aspects
+            for row, text in enumerate(texts):
+                tokens = tokenize_text(text)
+                counts[row], row_aspects = count_tokens(tokens)
+                aspect_scores[row] = [np.nan if score is None else score for score in row_aspects]
+                words = strip_clause_breaks(tokens)
+                is_fake[row] = self._is_fake(" ".join(words), words, fake_indicators)
+        else:
+            count_tokens = matcher.count_tokens
+            for row, text in enumerate(texts):
+                tokens = tokenize_text(text)
+                counts[row] = count_tokens(tokens)
+                words = strip_clause_breaks(tokens)
+                is_fake[row] = self._is_fake(" ".join(words), words, fake_indicators)
+
+        scores = counts * np.asarray(self.weights)
+        # argmax keeps the first maximum, same tie-break as analyze()
+        columns = {"label_code": scores.argmax(axis=1).astype(np.int8)}
+        for idx, label in enumerate(self.labels):
+            columns[f"{label.lower()}_score"] = scores[:, idx]
+        columns["is_fake"] = is_fake
+        if aspects:
+            columns.update(self._aspect_columns(matcher.aspect_names, aspect_scores))
+        return columns
+
+    @staticmethod
+    def _aspect_columns(aspect_names, aspect_scores):
+        """Split an (n_texts, n_aspects) score array into named columns."""
+        return {f"aspect_{name}": aspect_scores[:, idx] for idx, name in enumerate(aspect_names)}
+
+    def _aspects_many(self, token_lists):
+        """Return aspect names and (n_texts, n_aspects) scores for tokenized texts, NaN where not mentioned."""
+        matcher = self.matcher
+        aspect_scores = np.full((len(token_lists), len(matcher.aspect_names)), np.nan)
+        for row, words in enumerate(token_lists):
+            row_aspects = matcher.count_tokens_with_aspects(words)[1]
+            aspect_scores[row] = [np.nan if score is None else score for score in row_aspects]
+        return matcher.aspect_names, aspect_scores
+
+    def _artifact_params(self):
+        """Parameters written to a model artifact."""
+        data = self.lexicon_data()
+        return {
+            "labels": self.labels,
+            "weights": list(self.weights),
+            "lexicons": data["lexicons"],
+            "fake_indicators": data["fake_indicators"],
+            "contextual": self.contextual,
+            "negators": data["negators"],
+            "intensifiers": data["intensifiers"],
+            "negation_flip": list(self.lexicons.negation_flip),
+            "aspect_lexicons": data["aspects"],
+            "aspect_polarity": list(self.aspect_polarity),
+            "lexicon_version": data["version"]
+        }
+
+    def _artifact_arrays(self):
+        """Arrays written to a model artifact."""
+        return {}
+
+    def _restore_artifact(self, artifact):
+        """Restore state from a loaded model artifact."""
+        params = artifact.params
+        if params["labels"] != self.labels:
+            raise ValueError(f"Artifact labels {params['labels']} do not match {self.labels}")
+        self.weights = tuple(params["weights"])
+        self.contextual = params.get("contextual", False)
+        self.aspect_polarity = tuple(params.get("aspect_polarity", self.aspect_polarity))
+
+        # The artifact's own lexicons, falling back to the current ones for
+        # fields older artifacts did not record
+        data = self.lexicon_data()
+        data.update(
+            version=params.get("lexicon_version"),
+            lexicons=params["lexicons"],
+            fake_indicators=params["fake_indicators"],
+            negators=params.get("negators", data["negators"]),
+            intensifiers=params.get("intensifiers", data["intensifiers"]),
+            aspects=params.get("aspect_lexicons", data["aspects"])
+        )
+        if "negation_flip" in params:
+            data["negation_flip"] = dict(zip(self.labels, params["negation_flip"]))
+        self.apply_lexicons(data)
+        self.artifact = artifact
+
+    def save(self, path, version=1):
+        """Save the model as a versioned artifact directory."""
+        return save_artifact(path, self.artifact_kind, self._artifact_arrays(), self._artifact_params(), version)
+
+    @classmethod
+    def load(cls, path, mmap=True, cache_size=0):
+        """Load a model saved with save(), memory-mapping its arrays by default."""
+        artifact = load_artifact(path, kind=cls.artifact_kind, mmap=mmap)
+        analyzer = cls(cache_size=cache_size)
+        analyzer._restore_artifact(artifact)
+        return analyzer
+
+class LearnedSentimentAnalyzer(SentimentAnalyzer):
+    """
+    Linear sentiment classifier over hashed word n-gram features.
+
+    Trained on labelled reviews (e.g. the CSV's Sentiment column) and used
+    through the same analyze / analyze_many interface as the keyword
+    analyzer. Fake review detection keeps the keyword rules. Until a model
+    is trained or loaded, scoring falls back to the keyword rules.
+    """
+    artifact_kind = "hashed_linear_sentiment"
+
+    def __init__(self, n_features=2 ** 18, ngram_order=2, cache_size=0):
+        super().__init__(cache_size=cache_size)
+        self.n_features = n_features
+        self.ngram_order = ngram_order
+        self.coef = None       # (n_labels, n_features) weights in label order
+        self.intercept = None  # (n_labels,) bias, -inf for labels never seen in training
+        self._token_hashes = {}
+
+    @property
+    def is_trained(self):
+        return self.coef is not None
+
+    def _features(self, token_lists):
+        """
+        Hash word n-grams of tokenized texts into sparse L2-normalized counts.
+
+        Returns (row, column, value) arrays with one entry per distinct
+        feature of each text.
+        """
+        rows, hashes = ngram_hashes(token_lists, self.ngram_order, self._token_hashes)
+        columns = (hashes % np.uint64(self.n_features)).astype(np.int64)
+        keys, counts = np.unique(rows * self.n_features + columns, return_counts=True)
+        rows, columns = keys // self.n_features, keys % self.n_features
+
+        norms = np.sqrt(np.bincount(rows, weights=counts.astype(np.float64) ** 2, minlength=len(token_lists)))
+        values = counts / norms[rows]
+        return rows, columns, values.astype(np.float32)
+
+    def vectorize(self, texts):
+        """Hash texts into a sparse (n_texts, n_features) CSR matrix."""
+        from scipy.sparse import csr_matrix
+
+        rows, columns, values = self._features([tokenize(text) for text in texts])
+        return csr_matrix((values, (rows, columns)), shape=(len(texts), self.n_features))
+
+    def fit(self, texts, labels, epochs=20, alpha=1e-5, seed=0):
+        """Train the linear model on texts and their sentiment labels."""
+        from sklearn.linear_model import SGDClassifier
+
+        texts = _as_list(texts)
+        labels = _as_list(labels)
+
+        classifier = SGDClassifier(
+            loss="log_loss", alpha=alpha, max_iter=epochs, tol=None,
+            class_weight="balanced", random_state=seed
+        )
+        classifier.fit(self.vectorize(texts), labels)
+
+        coef = np.zeros((len(self.labels), self.n_features), dtype=np.float32)
+        intercept = np.full(len(self.labels), -np.inf, dtype=np.float32)
+        classes = list(classifier.classes_)
+        if len(classes) == 2:
+            # Binary models keep one weight row for the second class
+            rows = {classes[0]: (np.zeros(self.n_features), 0.0),
+                    classes[1]: (classifier.coef_[0], classifier.intercept_[0])}
+        else:
+            rows = {label: (classifier.coef_[idx], classifier.intercept_[idx]) for idx, label in enumerate(classes)}
+        for label, (weights, bias) in rows.items():
+            coef[self.labels.index(label)] = weights
+            intercept[self.labels.index(label)] = bias
+
+        self.coef = coef
+        self.intercept = intercept
+        if self.cache is not None:
+            self.cache.clear()
+        return self
+
+    def _artifact_params(self):
+        params = super()._artifact_params()
+        params.update(n_features=self.n_features, ngram_order=self.ngram_order)
+        return params
+
+    def _artifact_arrays(self):
+        if not self.is_trained:
+            raise ValueError("Cannot save an untrained model")
+        return {"coef": self.coef, "intercept": self.intercept}
+
+    def _restore_artifact(self, artifact):
+        super()._restore_artifact(artifact)
+        self.n_features = artifact.params["n_features"]
+        self.ngram_order = artifact.params["ngram_order"]
+        self.coef = artifact["coef"]
+        self.intercept = artifact["intercept"]
+
+    def _predict_proba_tokens(self, token_lists):
+        """Return (n_texts, n_labels) label probabilities for tokenized texts."""
+        rows, columns, values = self._features(token_lists)
+        contributions = self.coef[:, columns] * values
+        decision = np.empty((len(token_lists), len(self.labels)), dtype=np.float64)
+        for idx in range(len(self.labels)):
+            decision[:, idx] = np.bincount(rows, weights=contributions[idx], minlength=len(token_lists))
+        decision += self.intercept
+
+        decision -= decision.max(axis=1, keepdims=True)
+        probabilities = np.exp(decision)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+
+    def predict_proba(self, texts):
+        """Return (n_texts, n_labels) label probabilities in label order."""
+        return self._predict_proba_tokens([tokenize(text) for text in texts])
+
+    def _score_tokens(self, tokens):
+        """Return (sentiment label, per-label probabilities) for tokenized text."""
+        words = strip_clause_breaks(tokens)
+        if not self.is_trained or not words:
+            return super()._score_tokens(tokens)
+        probabilities = self._predict_proba_tokens([words])[0]
+        return self.labels[int(probabilities.argmax())], tuple(probabilities.tolist())
+
+    def _score_tokens_with_aspects(self, tokens):
+        if not self.is_trained or not strip_clause_breaks(tokens):
+            return super()._score_tokens_with_aspects(tokens)
+        return self._score_tokens_with_keyword_aspects(tokens)
+
+    def analyze_many(self, texts, aspects=False):
+        """
+        Score a batch of texts with vectorized feature hashing and weight lookups.
+
+        Returns the same columns as SentimentAnalyzer.analyze_many, with the
+        score columns holding label probabilities.
+        """
+        if not self.is_trained:
+            return super().analyze_many(texts, aspects)
+
+        texts = _as_list(texts)
 
-        fake_indicators = ["scam", "fake", "fraud", "not real", "bot", "scripted", "paid review"]
-        if any(word in text for word in fake_indicators):
-            return "Fake"
+        token_lists = [tokenize(text) for text in texts]
+        probabilities = self._predict_proba_tokens(token_lists)
+        is_fake = np.fromiter(
+            (self._is_fake(" ".join(words), words) for words in token_lists),
+            dtype=bool, count=len(token_lists)
+        )
 
-        return "Genuine"
+        label_code = probabilities.argmax(axis=1).astype(np.int8)
+        # Texts without words get the keyword analyzer's default label
+        label_code[[not words for words in token_lists]] = self.labels.index(super()._score_tokens([])[0])
+
+        columns = {"label_code": label_code}
+        for idx, label in enumerate(self.labels):
+            columns[f"{label.lower()}_score"] = probabilities[:, idx]
+        columns["is_fake"] = is_fake
+        if aspects:
+            tokenize_text = self.matcher.tokenize
+            columns.update(self._aspect_columns(*self._aspects_many([tokenize_text(text) for text in texts])))
+        return columns
+
+
+DEFAULT_TRANSFORMER_MODEL = "distilbert/distilbert-base-uncased-finetuned-sst-2-english"
+# Subdirectory of a transformer artifact holding the save_pretrained() output
+TRANSFORMER_CHECKPOINT_DIR = "checkpoint"
+
+class TransformerSentimentAnalyzer(SentimentAnalyzer):
+    """
+    Sentiment from a small distilled transformer, int8 dynamically quantized
+    for CPU inference. Needs the optional torch and transformers packages.
+
+    Concurrent analyze calls are coalesced into micro-batches of at most
+    max_batch_size texts, waiting at most max_wait_ms for a batch to fill.
+    Model labels are matched to self.labels by name; when the keyword rules
+    flag an emergency, which SST-2 style models cannot express, the keyword
+    label wins. Fake review detection and aspects keep the keyword rules.
+    """
+
+    artifact_kind = "transformer_sentiment"
+
+    def __init__(self, model_name=DEFAULT_TRANSFORMER_MODEL, quantize=True, max_batch_size=16,
+                 max_wait_ms=5.0, max_length=128, cache_size=0):
+        super().__init__(cache_size=cache_size)
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self._torch = torch
+        self.model_name = model_name
+        self.quantize = quantize
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        if quantize:
+            # int8 weights for every Linear layer, activations quantized on the fly
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+        # Column of each model output in label order
+        id2label = model.config.id2label
+        self._label_index = [self._match_label(id2label[idx]) for idx in range(len(id2label))]
+
+        self.max_batch_size = max_batch_size
+        self.batcher = MicroBatcher(self._predict_batch, max_batch_size, max_wait_ms / 1000)
+
+    def _match_label(self, model_label):
+        """Map a model label such as "POSITIVE" to an index into self.labels."""
+        for idx, label in enumerate(self.labels):
+            if str(model_label).lower().startswith(label.lower()):
+                return idx
+        raise ValueError(f"Model label {model_label!r} does not match any of {self.labels}")
+
+    def _predict_batch(self, texts):
+        """Return (n_texts, n_labels) label probabilities for one model batch."""
+        torch = self._torch
+        encoded = self.tokenizer(
+            list(texts), padding=True, truncation=True, max_length=self.max_length, return_tensors="pt"
+        )
+        with torch.inference_mode():
+            probabilities = torch.softmax(self.model(**encoded).logits, dim=-1).numpy()
+
+        result = np.zeros((len(texts), len(self.labels)), dtype=np.float64)
+        result[:, self._label_index] = probabilities
+        return result
+
+    def _score_tokens(self, tokens):
+        """Return (sentiment label, per-label probabilities) for tokenized text."""
+        keyword_label, keyword_scores = super()._score_tokens(tokens)
+        words = strip_clause_breaks(tokens)
+        if not words or keyword_label == "Emergency":
+            return keyword_label, keyword_scores
+        probabilities = self.batcher(" ".join(words))
+        return self.labels[int(probabilities.argmax())], tuple(probabilities.tolist())
+
+    def _score_tokens_with_aspects(self, tokens):
+        return self._score_tokens_with_keyword_aspects(tokens)
+
+    def analyze_many(self, texts, aspects=False):
+        """
+        Score a batch of texts, calling the model directly in max_batch_size chunks.
+
+        Returns the same columns as SentimentAnalyzer.analyze_many, with the
+        score columns holding the model's label probabilities.
+        """
+        texts = _as_list(texts)
+
+        # Keyword pass for fake flags, aspects and the emergency override
+        columns = super().analyze_many(texts, aspects)
+        normalized = [" ".join(tokenize(text)) for text in texts]
+        rows = [row for row, text in enumerate(normalized) if text]
+
+        probabilities = np.zeros((len(texts), len(self.labels)), dtype=np.float64)
+        for start in range(0, len(rows), self.max_batch_size):
+            chunk = rows[start:start + self.max_batch_size]
+            probabilities[chunk] = self._predict_batch([normalized[row] for row in chunk])
+
+        emergency = self.labels.index("Emergency")
+        use_model = np.zeros(len(texts), dtype=bool)
+        use_model[rows] = True
+        use_model &= columns["label_code"] != emergency
+        columns["label_code"] = np.where(
+            use_model, probabilities.argmax(axis=1), columns["label_code"]
+        ).astype(np.int8)
+        for idx, label in enumerate(self.labels):
+            columns[f"{label.lower()}_score"] = probabilities[:, idx]
+        return columns
+
+    def _artifact_params(self):
+        params = super()._artifact_params()
+        params.update(
+            model_name=self.model_name, quantize=self.quantize, max_length=self.max_length,
+            max_batch_size=self.max_batch_size
+        )
+        return params
+
+    def _write_checkpoint(self, directory):
+        """Write the float model and its tokenizer with save_pretrained()."""
+        from transformers import AutoModelForSequenceClassification
+
+        # Dynamically quantized weights do not load back with from_pretrained();
+        # the float weights are reloaded from the source checkpoint instead, as
+        # this class never changes them
+        model = self.model
+        if self.quantize:
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        checkpoint = os.path.join(directory, TRANSFORMER_CHECKPOINT_DIR)
+        model.save_pretrained(checkpoint)
+        self.tokenizer.save_pretrained(checkpoint)
+
+    def save(self, path, version=1):
+        """Save the model as an artifact directory holding a transformers checkpoint."""
+        return save_artifact(
+            path, self.artifact_kind, self._artifact_arrays(), self._artifact_params(), version,
+            write_files=self._write_checkpoint
+        )
+
+    @classmethod
+    def load(cls, path, mmap=True, cache_size=0):
+        """Load a model saved with save(), quantizing it again if it was quantized."""
+        artifact = load_artifact(path, kind=cls.artifact_kind, mmap=mmap)
+        params = artifact.params
+        analyzer = cls(
+            os.path.join(path, TRANSFORMER_CHECKPOINT_DIR), quantize=params["quantize"],
+            max_batch_size=params["max_batch_size"], max_length=params["max_length"], cache_size=cache_size
+        )
+        analyzer._restore_artifact(artifact)
+        # Keep the name of the checkpoint it was first built from
+        analyzer.model_name = params["model_name"]
+        return analyzer
+
+    def close(self):
+        """Stop the micro-batching thread."""
+        self.batcher.close()
+
+
+# Artifact written by models/train_sentiment.py
+DEFAULT_LEARNED_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "sentiment_model"
+)
+
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+_lexicon_reloader = None
+
+def get_analyzer(cache_size=4096):
+    """
+    Return the process-wide SentimentAnalyzer, building it on first use.
+
+    Its lexicons are reloaded in the background whenever the lexicon file
+    gets a new version, so tuning them needs no restart. Setting
+    SENTIMENT_BACKEND=transformer switches to TransformerSentimentAnalyzer,
+    with the model taken from SENTIMENT_MODEL. SENTIMENT_BACKEND=learned
+    memory-maps the LearnedSentimentAnalyzer artifact at
+    SENTIMENT_MODEL_PATH (default: models/sentiment_model).
+    """
+    global _shared_analyzer, _lexicon_reloader
+    if _shared_analyzer is None:
+        with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                backend = os.getenv("SENTIMENT_BACKEND", "keyword")
+                if backend == "transformer":
+                    analyzer = TransformerSentimentAnalyzer(
+                        os.getenv("SENTIMENT_MODEL", DEFAULT_TRANSFORMER_MODEL), cache_size=cache_size
+                    )
+                elif backend == "learned":
+                    analyzer = LearnedSentimentAnalyzer.load(
+                        os.getenv("SENTIMENT_MODEL_PATH", DEFAULT_LEARNED_MODEL_PATH), mmap=True, cache_size=cache_size
+                    )
+                else:
+                    analyzer = SentimentAnalyzer(cache_size=cache_size)
+                _lexicon_reloader = LexiconReloader(analyzer)
+                _lexicon_reloader.start()
+                _shared_analyzer = analyzer
+    return _shared_analyzer
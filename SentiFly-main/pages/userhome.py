@@ -1,43 +1,19 @@
 import streamlit as st
 import datetime
-import sqlite3
 import base64
 import os
-from pages.models import SentimentAnalyzer  # Import the sentiment model
-
-# Database connection
-conn = sqlite3.connect("airline_reviews.db", check_same_thread=False)
-cursor = conn.cursor()
-
-# Create table if not exists (Removed 'ticket' column)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS reviews (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT,
-        airline TEXT,
-        flight_type TEXT,
-        seat_class TEXT,
-        date_of_travel TEXT,
-        purpose_of_travel TEXT,
-        source TEXT,
-        destination TEXT,
-        booking_method TEXT,
-        frequent_flyer TEXT,
-        check_in_rating TEXT,
-        seat_comfort TEXT,
-        crew_service TEXT,
-        food_quality TEXT,
-        punctuality TEXT,
-        review_comment TEXT,
-        improvement_needed TEXT,
-        recommend TEXT,
-        sentiment TEXT,
-        fake_review TEXT,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-''')
-conn.commit()
+import sqlite3
+from pages.models import get_analyzer  # Shared sentiment model
+from utils.complaint_terms import record_complaint
+from utils.emergency_alerts import publish_alert
+from utils.near_duplicates import get_duplicate_index
+from utils.reputation import record_sentiment
+from utils.review_repository import (
+    aspect_column, ensure_aspect_columns, find_duplicate_review, get_repository, review_content_hash
+)
+
+# Pooled connections shared by every session; the schema is created once per process
+repository = get_repository()
 
 # Set page title
 st.set_page_config(page_title="Airline Review Submission", layout="wide")
@@ -121,33 +97,76 @@ with st.form("review_form"):
     submitted = st.form_submit_button("Submit Review")
 
 if submitted:
-    analyzer = SentimentAnalyzer()
-    sentiment_result = analyzer.analyze(review_comment)
-    sentiment = sentiment_result["sentiment"]
-    fake_review = analyzer.detect_fake_review(review_comment)
-
-    # Insert data into database (Removed ticket_data)
-    cursor.execute('''
-        INSERT INTO reviews (
-            name, email, airline, flight_type, seat_class, date_of_travel, 
-            purpose_of_travel, source, destination, booking_method, frequent_flyer, 
-            check_in_rating, seat_comfort, crew_service, food_quality, punctuality, 
-            review_comment, improvement_needed, recommend, sentiment, fake_review
-        ) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        name, email, airline, flight_type, seat_class, str(date_of_travel), 
-        purpose_of_travel, source, destination, booking_method, frequent_flyer, 
-        check_in_rating, seat_comfort, crew_service, food_quality, punctuality, 
-        review_comment, improvement_needed, recommend, sentiment, fake_review
-    ))
-
-    conn.commit()
+    # Built once per process and shared across sessions, with a result cache
+    analyzer = get_analyzer()
+    # One tokenization feeds sentiment, fake verdict and aspect scores
+    analysis = analyzer.analyze_review(review_comment)
+    sentiment = analysis.sentiment
+    fake_review = analysis.fake_review
+
+    # Near-copies of reviews already in the corpus are treated as templated spam
+    duplicate_index = get_duplicate_index()
+    if fake_review == "Genuine" and duplicate_index.is_templated(review_comment):
+        fake_review = "Fake"
+
+    # Per-aspect sentiment from the same scan, NULL for aspects not mentioned
+    aspect_columns = "".join(f", {aspect_column(name)}" for name in analysis.aspects)
+    aspect_values = tuple(analysis.aspects.values())
+
+    # Exact duplicates are found with an indexed lookup on the content hash
+    content_hash = review_content_hash(review_comment)
+    review_id = None
+    with repository.connection() as conn:
+        # Reloaded lexicons may have added aspects since the schema was created
+        ensure_aspect_columns(conn, analysis.aspects)
+
+        # The duplicate check, the review and everything recorded with it
+        # share one transaction
+        try:
+            with conn:
+                if find_duplicate_review(conn, content_hash) is None:
+                    # Insert data into database (Removed ticket_data)
+                    cursor = conn.execute(f'''
+                        INSERT INTO reviews (
+                            name, email, airline, flight_type, seat_class, date_of_travel, 
+                            purpose_of_travel, source, destination, booking_method, frequent_flyer, 
+                            check_in_rating, seat_comfort, crew_service, food_quality, punctuality, 
+                            review_comment, improvement_needed, recommend, sentiment, fake_review,
+                            content_hash{aspect_columns}
+                        ) 
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?{", ?" * len(aspect_values)})
+                    ''', (
+                        name, email, airline, flight_type, seat_class, str(date_of_travel), 
+                        purpose_of_travel, source, destination, booking_method, frequent_flyer, 
+                        check_in_rating, seat_comfort, crew_service, food_quality, punctuality, 
+                        review_comment, improvement_needed, recommend, sentiment, fake_review,
+                        content_hash
+                    ) + aspect_values)
+                    review_id = cursor.lastrowid
+
+                    # Queue emergencies for airline staff in the same transaction as the review
+                    if sentiment == "Emergency":
+                        publish_alert(conn, review_id, airline, review_comment)
+
+                    # Weekly complaint term sketches, also in the review's transaction
+                    record_complaint(conn, airline, review_comment, sentiment, datetime.date.today())
+                    # Decayed sentiment counts behind the live reputation score: one row per airline
+                    record_sentiment(conn, airline, sentiment)
+        except sqlite3.IntegrityError as error:
+            # Another session stored the same review after the check; the
+            # unique content_hash index rejected this copy
+            if "content_hash" not in str(error):
+                raise
+            review_id = None
+
+if submitted and review_id is None:
+    st.warning("⚠️ This review has already been submitted.")
+
+elif submitted:
+    duplicate_index.add(f"db:{review_id}", review_comment)
 
     # Emergency Alert
     if sentiment == "Emergency":
         st.warning("🚨 *Emergency Alert:* This review contains urgent matters!")
 
     st.success(f"✅ Sentiment: *{sentiment}* | Fake Review: *{fake_review}*")
-
-conn.close()
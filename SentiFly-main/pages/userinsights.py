@@ -5,14 +5,22 @@ import pandas as pd
 import numpy as np
 import base64
 import os
+from utils.ingest import ensure_csv_reviews
+from utils.review_repository import get_repository
+from utils.review_rollups import CSV_SOURCE, load_rollups, mean_ratings, rating_counts
+from utils.review_search import search_reviews
 st.set_page_config(page_title="Airline Insights Dashboard", layout="wide")
 # Set page title and layout
 def show():
     st.title("User Insights")
     st.write("This page displays insights for users.")
-# Load dataset
-df = pd.read_csv("airline_reviews_with_fake.csv")
-df['Date of Travel'] = pd.to_datetime(df['Date of Travel'])
+# Load the pre-aggregated review counts kept by utils.review_rollups; a
+# fresh database gets the review CSV loaded into it first
+ensure_csv_reviews()
+with get_repository().connection() as conn:
+    rollups = load_rollups(conn)
+# Categories and star ratings only exist for CSV reviews, not form reviews
+csv_rollups = rollups[rollups["source"] == CSV_SOURCE]
 
 def set_background(image_path):
     if os.path.exists(image_path):
@@ -36,6 +44,9 @@ set_background(r"SentiFly-main/Images/bg8.jpeg")  # Adjust path if needed
 # Page Title
 st.markdown("#  User Insights Dashboard")
 st.markdown("---")
+if rollups.empty:
+    st.info("No reviews yet.")
+    st.stop()
 
 # Overall Analysis Section
 st.markdown("##  Overall Airline Analysis")
@@ -45,13 +56,14 @@ col3, col4 = st.columns(2)
 # Different Airlines Present (Treemap)
 with col1:
     st.subheader("Different Airlines Present")
-    fig_airlines = px.treemap(df, path=["Airline Name"], title="Airline Distribution", color_discrete_sequence=px.colors.sequential.Sunset)
+    airline_counts = rollups.groupby("airline")["reviews"].sum().rename_axis("Airline Name").reset_index()
+    fig_airlines = px.treemap(airline_counts, path=["Airline Name"], values="reviews", title="Airline Distribution", color_discrete_sequence=px.colors.sequential.Sunset)
     st.plotly_chart(fig_airlines, use_container_width=True)
 
 # Flight Type Comparison (Donut Chart)
 with col2:
     st.subheader("Flight Type Comparison")
-    flight_type_counts = df["Flight Type"].value_counts().reset_index()
+    flight_type_counts = rollups.groupby("flight_type")["reviews"].sum().sort_values(ascending=False).reset_index()
     flight_type_counts.columns = ["Flight Type", "count"]
     fig_flight_type = px.pie(flight_type_counts, names="Flight Type", values="count", hole=0.4, title="Domestic vs International Flights", color_discrete_sequence=px.colors.sequential.Sunsetdark_r)
     st.plotly_chart(fig_flight_type, use_container_width=True)
@@ -59,7 +71,8 @@ with col2:
 # Sentiment Breakdown (Grouped Bar Chart)
 with col3:
     st.subheader("Sentiment Comparison Across Airlines")
-    sentiment_counts = df.groupby("Airline Name")["Sentiment"].value_counts().unstack()
+    sentiment_counts = rollups.pivot_table(index="airline", columns="sentiment", values="reviews", aggfunc="sum")
+    sentiment_counts = sentiment_counts.rename_axis(index="Airline Name", columns="Sentiment")
     fig_sentiment = px.bar(
         sentiment_counts, 
         barmode="group", 
@@ -73,17 +86,18 @@ with col3:
 # Most Common Review Categories (Vertical Bar Chart)
 with col4:
     st.subheader("Most Common Review Categories")
-    category_counts = df["Review Category"].value_counts().reset_index()
+    category_counts = csv_rollups.groupby("category")["reviews"].sum().sort_values(ascending=False).reset_index()
     category_counts.columns = ["Review Category", "count"]
     fig_review_category = px.bar(category_counts, x="Review Category", y="count", title="Top Review Categories", color_discrete_sequence=px.colors.sequential.Rainbow)
     st.plotly_chart(fig_review_category, use_container_width=True)
 
 # Airline Selection Dropdown
 st.markdown("##  Select an Airline for Detailed Insights")
-selected_airline = st.selectbox("Choose an airline", df["Airline Name"].unique())
+selected_airline = st.selectbox("Choose an airline", sorted(rollups["airline"].unique()))
 
 # Filter Data
-airline_df = df[df["Airline Name"] == selected_airline]
+airline_rollups = rollups[rollups["airline"] == selected_airline]
+airline_csv_rollups = csv_rollups[csv_rollups["airline"] == selected_airline]
 
 # Detailed Airline Insights
 st.markdown(f"###  Insights for {selected_airline}")
@@ -93,7 +107,7 @@ col7, col8 = st.columns(2)
 # Sentiment Breakdown (3D Inverted Funnel Chart)
 with col5:
     st.subheader("Sentiment Breakdown")
-    sentiment_values = airline_df["Sentiment"].value_counts()
+    sentiment_values = airline_rollups.groupby("sentiment")["reviews"].sum().sort_values(ascending=False)
     fig_airline_sentiment = px.funnel(x=sentiment_values.values, y=sentiment_values.index, title="Sentiment Distribution", color_discrete_sequence=["#FDCB82", "#FF6B6B", "#DDA15E"])
     st.plotly_chart(fig_airline_sentiment, use_container_width=True)
 
@@ -101,15 +115,17 @@ with col5:
 # Fake Review Analysis (Donut Chart)
 with col6:
     st.subheader("Fake Reviews Analysis")
-    fake_review_counts = airline_df["Fake Review"].value_counts().reset_index()
-    fake_review_counts.columns = ["Fake Review", "count"]
+    fake_total = int(airline_rollups["fake_reviews"].sum())
+    fake_review_counts = pd.DataFrame(
+        {"Fake Review": [0, 1], "count": [int(airline_rollups["reviews"].sum()) - fake_total, fake_total]}
+    )
     fig_fake_reviews = px.pie(fake_review_counts, names="Fake Review", values="count", hole=0.5, title="Proportion of Fake Reviews", color_discrete_sequence=px.colors.sequential.Sunsetdark_r)
     st.plotly_chart(fig_fake_reviews, use_container_width=True)
 
 # Alternative Service Ratings Visualization (Hexbin Chart)
 with col7:
     st.subheader("Service Ratings Heatmap")
-    service_ratings = airline_df.pivot_table(index="Review Category", values="Rating", aggfunc="mean").reset_index()
+    service_ratings = mean_ratings(airline_csv_rollups, "category").rename(columns={"category": "Review Category"})
     fig_service_ratings = px.imshow(service_ratings.set_index("Review Category").T, labels=dict(x="Review Category", y="Rating"), title="Service Ratings Overview", color_continuous_scale="Sunsetdark")
     st.plotly_chart(fig_service_ratings, use_container_width=True)
 
@@ -117,15 +133,36 @@ with col7:
 # Additional Useful Graph (Bubble Chart)
 with col8:
     st.subheader("Review Ratings vs Sentiment")
-    fig_bubble = px.scatter(airline_df, x="Sentiment", y="Rating", size="Rating", color="Sentiment", title="Sentiment vs Rating", color_discrete_sequence=px.colors.sequential.Inferno)
+    # One bubble per sentiment and star rating, sized by the number of reviews
+    rating_bubbles = rating_counts(airline_csv_rollups, "sentiment").rename(columns={"sentiment": "Sentiment"})
+    fig_bubble = px.scatter(rating_bubbles, x="Sentiment", y="Rating", size="Reviews", color="Sentiment", title="Sentiment vs Rating", color_discrete_sequence=px.colors.sequential.Inferno)
     st.plotly_chart(fig_bubble, use_container_width=True)
 
+# 🔍 Full-text search, ranked by SQLite FTS5 (utils.review_search)
+st.markdown("## Search Reviews")
+col_search, col_page = st.columns([4, 1])
+with col_search:
+    search_text = st.text_input(f"Search {selected_airline} reviews", placeholder="e.g. lost baggage", key="review_search_text")
+with col_page:
+    search_page = st.number_input("Page", min_value=1, value=1, step=1, key="review_search_page")
+if search_text:
+    with get_repository().connection() as conn:
+        search_results, more_results = search_reviews(
+            conn, search_text, selected_airline, page=int(search_page), page_size=10
+        )
+    if not search_results:
+        st.write("No matching reviews.")
+    for result in search_results:
+        st.markdown(f"**{result.airline}** · {result.travel_date} · {result.snippet}")
+    if more_results:
+        st.caption("More results on the next page.")
+
 # Personalized Airline Suggestions
 st.markdown("##  Personalized Airline Suggestions")
 user_preference = st.selectbox("What matters most to you?", ["Budget-friendly", "Comfort", "On-time performance", "Good food", "Friendly staff"])
 
 # Generate dynamic personalized airline suggestions
-suggestions = df.groupby("Airline Name").agg({"Rating": "mean"}).reset_index()
+suggestions = mean_ratings(csv_rollups, "airline")
 suggestions.columns = ["Airline Name", "Overall Score"]
 
 # Add slight variations to make suggestions dynamic
@@ -0,0 +1,63 @@
+import pytest
+
+from pages.models import SentimentAnalyzer
+from utils.benchmark import legacy_analyze, legacy_count_keywords
+from utils.keyword_matcher import KeywordMatcher, tokenize
+
+LEXICONS = [
+    ["bad", "delayed", "lost luggage"],
+    ["okay"],
+    ["good", "great", "on time"],
+]
+
+TEXTS = [
+    "Great crew, great food and the flight was on time!",
+    "Bad, bad, bad. Delayed twice and lost luggage; lost luggage again",
+    "It was okay I guess",
+    "Nothing to report",
+    "",
+    None,
+]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(LEXICONS)
+
+
+@pytest.fixture(scope="module")
+def plain_analyzer():
+    return SentimentAnalyzer(contextual=False)
+
+
+def test_words_count_on_every_occurrence(matcher):
+    assert matcher.count("good good GOOD") == [0, 0, 3]
+
+
+def test_phrases_count_once_per_text(matcher):
+    assert matcher.count("lost luggage, then lost luggage again") == [1, 0, 0]
+
+
+def test_all_categories_in_one_scan(matcher):
+    assert matcher.count("bad food, okay seats, great crew, on time") == [1, 1, 2]
+
+
+def test_phrase_prefix_alone_is_no_hit(matcher):
+    assert matcher.count("on the lost flight") == [0, 0, 0]
+
+
+def test_count_tokens_matches_count(matcher):
+    for text in TEXTS:
+        assert matcher.count_tokens(tokenize(text)) == matcher.count(text)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_legacy_scorer(plain_analyzer, text):
+    lexicons = plain_analyzer.lexicons
+    expected = [
+        legacy_count_keywords(plain_analyzer, text, keywords)
+        for keywords in (lexicons.negative_keywords, lexicons.neutral_keywords,
+                         lexicons.positive_keywords, lexicons.emergency_keywords)
+    ]
+    assert plain_analyzer.matcher.count(text) == expected
+    assert plain_analyzer.analyze(text)["sentiment"] == legacy_analyze(plain_analyzer, text)
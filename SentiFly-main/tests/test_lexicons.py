@@ -0,0 +1,103 @@
+import json
+import os
+
+import pytest
+
+from pages.models import SentimentAnalyzer
+from utils.lexicons import LexiconReloader, load_lexicons
+from utils.utils import LEXICONS_PATH
+
+
+@pytest.fixture
+def lexicon_file(tmp_path):
+    with open(LEXICONS_PATH, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    path = tmp_path / "lexicons.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path, data
+
+
+def write(path, data):
+    """Write lexicon data and move the mtime on, so the change is seen even within one clock tick."""
+    previous = os.stat(path).st_mtime_ns
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(previous + 10 ** 9, previous + 10 ** 9))
+
+
+def test_reload_swaps_in_the_new_version(lexicon_file):
+    path, data = lexicon_file
+    analyzer = SentimentAnalyzer(cache_size=16, lexicon_path=str(path))
+    reloader = LexiconReloader(analyzer, path=str(path))
+    assert analyzer.analyze_review("the zorbly crew").scores["Positive"] == 0
+    old_state = analyzer.lexicons
+
+    data["version"] += 1
+    data["lexicons"]["positive"].append("zorbly")
+    write(path, data)
+
+    assert reloader.check()
+    assert analyzer.lexicon_version == data["version"]
+    assert analyzer.lexicons is not old_state
+    assert "zorbly" in analyzer.lexicons.positive_keywords
+    assert analyzer.analyze_review("the zorbly crew").scores["Positive"] > 0
+    assert analyzer.analyze("the zorbly crew")["sentiment"] == "Positive"
+    # Nothing more to do until the file changes again
+    assert not reloader.check()
+
+
+def test_unchanged_version_is_not_reloaded(lexicon_file):
+    path, data = lexicon_file
+    analyzer = SentimentAnalyzer(lexicon_path=str(path))
+    reloader = LexiconReloader(analyzer, path=str(path))
+    old_state = analyzer.lexicons
+
+    data["lexicons"]["positive"].append("zorbly")
+    write(path, data)
+
+    assert not reloader.check()
+    assert analyzer.lexicons is old_state
+
+
+@pytest.mark.parametrize("change", [
+    lambda data: data.update(format_version=99),
+    lambda data: data["lexicons"].pop("emergency"),
+    lambda data: data["aspects"].update({"seat; DROP TABLE reviews": ["seat"]}),
+])
+def test_invalid_file_keeps_the_current_lexicons(lexicon_file, change):
+    path, data = lexicon_file
+    analyzer = SentimentAnalyzer(lexicon_path=str(path))
+    reloader = LexiconReloader(analyzer, path=str(path))
+    old_state = analyzer.lexicons
+
+    data["version"] += 1
+    change(data)
+    write(path, data)
+
+    with pytest.raises(ValueError):
+        load_lexicons(str(path))
+    assert not reloader.check()
+    assert analyzer.lexicons is old_state
+
+
+def test_lexicon_state_is_read_only(lexicon_file):
+    path, _ = lexicon_file
+    state = SentimentAnalyzer(lexicon_path=str(path)).lexicons
+    with pytest.raises(AttributeError):
+        state.matcher = None
+    with pytest.raises(TypeError):
+        state.intensifiers["very"] = 10.0
+    assert isinstance(state.positive_keywords, tuple)
+
+
+def test_cached_results_follow_a_reload(lexicon_file):
+    path, data = lexicon_file
+    analyzer = SentimentAnalyzer(cache_size=16, lexicon_path=str(path))
+    reloader = LexiconReloader(analyzer, path=str(path))
+    assert analyzer.analyze_review("zorbly zorbly").scores["Negative"] == 0
+
+    data["version"] += 1
+    data["lexicons"]["negative"].append("zorbly")
+    write(path, data)
+    reloader.check()
+
+    assert analyzer.analyze_review("zorbly zorbly").scores["Negative"] > 0
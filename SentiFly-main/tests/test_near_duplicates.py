@@ -0,0 +1,66 @@
+import pytest
+
+from utils.near_duplicates import NearDuplicateIndex
+
+TEMPLATE = "Amazing airline best crew best food best seats would fly again with them every single time"
+VARIANTS = [
+    TEMPLATE,
+    TEMPLATE.replace("Amazing", "Awesome"),
+    "Honestly " + TEMPLATE,
+    TEMPLATE.replace("every single time", "every time"),
+]
+UNRELATED = "The flight from Delhi was delayed four hours and my bag arrived damaged in Mumbai"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return NearDuplicateIndex(str(tmp_path / "reviews.db"))
+
+
+def test_signature_is_deterministic(index):
+    assert (index.signature(TEMPLATE) == index.signature(TEMPLATE)).all()
+    assert len(index.signature(TEMPLATE)) == index.num_perm
+
+
+def test_text_without_words_is_not_indexed(index):
+    assert index.signature("!!! ...") is None
+    assert not index.add("db:1", "!!! ...")
+    assert index.size() == 0
+
+
+def test_finds_near_copies_and_skips_unrelated_reviews(index):
+    index.add_many((f"db:{i}", text) for i, text in enumerate(VARIANTS))
+    index.add("db:99", UNRELATED)
+
+    matches = dict(index.find_near_duplicates(TEMPLATE))
+    assert "db:0" in matches and matches["db:0"] == 1.0
+    assert "db:99" not in matches
+    assert all(similarity >= index.threshold for similarity in matches.values())
+    assert index.find_near_duplicates("Clean plane and friendly staff") == []
+
+
+def test_matches_are_sorted_by_similarity(index):
+    index.add_many((f"db:{i}", text) for i, text in enumerate(VARIANTS))
+    similarities = [similarity for _, similarity in index.find_near_duplicates(TEMPLATE)]
+    assert similarities == sorted(similarities, reverse=True)
+
+
+def test_adding_a_review_again_replaces_it(index):
+    index.add("db:1", TEMPLATE)
+    index.add("db:1", TEMPLATE)
+    assert index.size() == 1
+    assert [key for key, _ in index.find_near_duplicates(TEMPLATE)] == ["db:1"]
+
+
+def test_templated_needs_a_cluster(index):
+    index.add_many((f"db:{i}", text) for i, text in enumerate(VARIANTS[:2]))
+    assert not index.is_templated(TEMPLATE)
+    index.add("db:2", VARIANTS[2])
+    assert index.is_templated(TEMPLATE)
+    # A review already in the index does not count towards its own cluster
+    assert not index.is_templated(TEMPLATE, exclude_key="db:0")
+
+
+def test_band_count_must_divide_signature_length(tmp_path):
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(str(tmp_path / "reviews.db"), num_perm=64, bands=10)
@@ -0,0 +1,67 @@
+import pytest
+
+from pages.models import SentimentAnalyzer
+from utils.keyword_matcher import CLAUSE_BREAK, KeywordMatcher, strip_clause_breaks, tokenize, tokenize_clauses
+
+# Negative, Neutral, Positive; a negated Negative keyword counts as Neutral
+# and a negated Positive or Neutral one as Negative
+LEXICONS = [["bad", "delayed"], ["okay"], ["good", "great"]]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(
+        LEXICONS, negators=["not", "never"], intensifiers={"very": 2.0}, negation_flip=[1, 0, 0]
+    )
+
+
+@pytest.mark.parametrize("text, counts", [
+    ("not good", [1, 0, 0]),
+    ("never a bad day", [0, 1, 0]),
+    ("very good", [0, 0, 2]),
+    ("not very good", [2, 0, 0]),
+    ("good not", [0, 0, 1]),
+])
+def test_modifiers_apply_to_the_next_keyword(matcher, text, counts):
+    assert matcher.count(text) == counts
+
+
+def test_negation_reaches_three_tokens(matcher):
+    assert matcher.count("not at all good") == [1, 0, 0]
+    assert matcher.count("not at all the good") == [0, 0, 1]
+
+
+@pytest.mark.parametrize("text, counts", [
+    ("not good. Great crew!", [1, 0, 1]),
+    ("not. good", [0, 0, 1]),
+    ("very, good", [0, 0, 1]),
+    ("not late, great crew", [0, 0, 1]),
+])
+def test_clause_punctuation_ends_the_scope(matcher, text, counts):
+    assert matcher.count(text) == counts
+
+
+def test_same_text_without_the_break_stays_negated(matcher):
+    assert matcher.count("not late great crew") == [1, 0, 0]
+
+
+@pytest.mark.parametrize("text, n_breaks", [
+    ("rated 4.5 stars", 0),
+    ("check-in was fine", 0),
+    ('"Bad." she said', 1),
+    ("end.", 0),
+])
+def test_only_punctuation_before_whitespace_breaks(text, n_breaks):
+    tokens = tokenize_clauses(text)
+    assert tokens.count(CLAUSE_BREAK) == n_breaks
+    assert strip_clause_breaks(tokens) == tokenize(text)
+
+
+def test_non_ascii_text_gets_the_same_breaks():
+    assert tokenize_clauses("café bad. très good") == ["café", "bad", CLAUSE_BREAK, "très", "good"]
+
+
+def test_analyzer_uses_clause_scopes():
+    analyzer = SentimentAnalyzer()
+    assert analyzer.analyze("The flight was not late great crew")["sentiment"] == "Negative"
+    assert analyzer.analyze("The flight was not late. Great crew!")["sentiment"] == "Positive"
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pages.models import SentimentAnalyzer
+from utils.near_duplicates import NearDuplicateIndex
+from utils.rescore import aspect_csv_column, rescore_csv, rescore_db, sentiment_score
+from utils.review_repository import aspect_column, get_repository
+
+TEXTS = [
+    "Great crew and comfortable seats, excellent service",
+    "Terrible delay, rude staff and lost baggage",
+    "The flight took off",
+    "Emergency landing after smoke in the cabin",
+    "Best best best best best best airline ever",
+]
+TEMPLATE = "Amazing airline best crew best food best seats would fly again with them every single time"
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return SentimentAnalyzer()
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "reviews.csv"
+    pd.DataFrame({
+        "Airline Name": ["IndiGo"] * len(TEXTS),
+        "Review Text": TEXTS,
+        "Sentiment": ["Neutral"] * len(TEXTS),
+        "Sentiment Score": [0.5] * len(TEXTS),
+        "Fake Review": [0] * len(TEXTS),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_sentiment_score_is_a_positivity_between_0_and_1(analyzer):
+    scores = sentiment_score(analyzer.analyze_many(TEXTS))
+    assert scores[0] == 1.0
+    assert scores[1] == 0.0
+    assert scores[2] == 0.5
+    assert ((scores >= 0) & (scores <= 1)).all()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rescore_csv_rewrites_the_scored_columns(analyzer, csv_path, workers):
+    assert rescore_csv(csv_path, chunk_size=2, workers=workers) == len(TEXTS)
+
+    rescored = pd.read_csv(csv_path)
+    expected = analyzer.analyze_many(TEXTS, aspects=True)
+    assert rescored["Review Text"].tolist() == TEXTS
+    assert rescored["Sentiment"].tolist() == [analyzer.labels[code] for code in expected["label_code"]]
+    assert rescored["Sentiment Score"].tolist() == sentiment_score(expected).tolist()
+    assert rescored["Fake Review"].tolist() == expected["is_fake"].astype(int).tolist()
+    for name in analyzer.aspect_names:
+        np.testing.assert_array_equal(rescored[aspect_csv_column(name)], expected[f"aspect_{name}"])
+
+
+def test_rescore_csv_leaves_the_file_alone_on_failure(tmp_path):
+    path = tmp_path / "reviews.csv"
+    path.write_text("Airline Name,Review\nIndiGo,Great crew\n")
+    with pytest.raises(KeyError):
+        rescore_csv(str(path), workers=1)
+    assert path.read_text() == "Airline Name,Review\nIndiGo,Great crew\n"
+    assert [entry.name for entry in tmp_path.iterdir()] == ["reviews.csv"]
+
+
+def test_rescore_db_updates_every_row(analyzer, tmp_path):
+    db_path = str(tmp_path / "reviews.db")
+    with get_repository(db_path).connection() as conn, conn:
+        conn.executemany(
+            "INSERT INTO reviews (review_comment, sentiment, fake_review) VALUES (?, 'Neutral', 'Genuine')",
+            [(text,) for text in TEXTS]
+        )
+
+    assert rescore_db(db_path, chunk_size=2, workers=1) == len(TEXTS)
+
+    expected = analyzer.analyze_many(TEXTS, aspects=True)
+    seat = aspect_column("seat_comfort")
+    with get_repository(db_path).connection() as conn:
+        rows = conn.execute(f"SELECT sentiment, fake_review, {seat} FROM reviews ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == [analyzer.labels[code] for code in expected["label_code"]]
+    assert [row[1] == "Fake" for row in rows] == expected["is_fake"].tolist()
+    # Aspects the review does not mention are stored as NULL
+    assert rows[0][2] > 0 and rows[2][2] is None
+
+
+def test_rescore_db_keeps_near_duplicate_verdicts(tmp_path):
+    db_path = str(tmp_path / "reviews.db")
+    copies = [TEMPLATE, TEMPLATE + " again", "Honestly " + TEMPLATE, TEMPLATE.replace("Amazing", "Awesome")]
+    with get_repository(db_path).connection() as conn, conn:
+        # Caught only by the near-duplicate check when they were submitted
+        conn.executemany(
+            "INSERT INTO reviews (review_comment, fake_review) VALUES (?, 'Fake')", [(text,) for text in copies]
+        )
+        # Flagged before, but no longer caught by any rule
+        conn.execute("INSERT INTO reviews (review_comment, fake_review) VALUES ('The flight took off', 'Fake')")
+    NearDuplicateIndex(db_path).add_many((f"db:{row_id}", text) for row_id, text in enumerate(copies, start=1))
+
+    rescore_db(db_path, workers=1)
+
+    with get_repository(db_path).connection() as conn:
+        verdicts = [row[0] for row in conn.execute("SELECT fake_review FROM reviews ORDER BY id")]
+    assert verdicts == ["Fake"] * 4 + ["Genuine"]
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from utils.review_repository import (
+    ReviewRepository, create_legacy_schema, get_repository, import_legacy_reviews
+)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = ReviewRepository(str(tmp_path / "pool.db"), create_legacy_schema, size=2)
+    yield repository
+    repository.close()
+
+
+def test_schema_and_pragmas_are_applied(repository):
+    with repository.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'reviews'").fetchone()
+
+
+def test_connections_are_reused(repository):
+    with repository.connection() as first:
+        pass
+    with repository.connection() as second:
+        assert second is first
+    with repository.connection() as outer, repository.connection() as inner:
+        assert inner is not outer
+
+
+def test_borrowers_wait_when_the_pool_is_full(repository):
+    borrowed = threading.Event()
+
+    def borrow():
+        with repository.connection():
+            borrowed.set()
+
+    with repository.connection(), repository.connection():
+        waiter = threading.Thread(target=borrow)
+        waiter.start()
+        assert not borrowed.wait(0.2)
+    assert borrowed.wait(5)
+    waiter.join()
+    assert len(repository._connections) == 2
+
+
+def test_open_transaction_is_rolled_back_on_return(repository):
+    with repository.connection() as conn:
+        conn.execute("INSERT INTO reviews (review) VALUES ('never committed')")
+        assert conn.in_transaction
+    with repository.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 0
+
+
+def test_pool_needs_a_connection(tmp_path):
+    with pytest.raises(ValueError):
+        ReviewRepository(str(tmp_path / "pool.db"), size=0)
+
+
+def test_one_repository_per_database_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repository = get_repository("reviews.db")
+    assert get_repository(str(tmp_path / "reviews.db")) is repository
+    assert get_repository(str(tmp_path / "other.db")) is not repository
+
+
+def test_legacy_import_skips_reviews_already_present(tmp_path):
+    legacy = get_repository(str(tmp_path / "legacy.db"), create_legacy_schema)
+    repository = get_repository(str(tmp_path / "reviews.db"))
+    with legacy.connection() as conn, conn:
+        conn.executemany(
+            "INSERT INTO reviews (name, email, airline, review, sentiment, fake_review) VALUES (?, ?, ?, ?, ?, ?)",
+            [("A", "a@x.com", "IndiGo", "Great crew", "Positive", "Genuine"),
+             ("B", "b@x.com", "IndiGo", "great   CREW", "Positive", "Genuine"),
+             ("C", "c@x.com", "Vistara", "Lost my bag", "Negative", "Genuine")]
+        )
+
+    # The second review normalizes to the same text as the first
+    assert import_legacy_reviews(legacy, repository) == 2
+    assert import_legacy_reviews(legacy, repository) == 0
+    with repository.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 2
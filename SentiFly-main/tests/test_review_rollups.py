@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from utils.review_repository import get_repository
+from utils.review_rollups import (
+    ROLLUP_KEY, drop_rollup_triggers, load_rollups, mean_ratings, rating_counts, rebuild_rollups,
+    rollup_csv_reviews
+)
+
+AIRLINES = ["IndiGo", "SpiceJet", "Vistara"]
+SENTIMENTS = ["Positive", "Negative", "Neutral", None]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with get_repository(str(tmp_path / "reviews.db")).connection() as conn:
+        yield conn
+
+
+def insert_csv_review(conn, review_id, rng):
+    conn.execute(
+        "INSERT INTO csv_reviews (review_id, airline, travel_date, review_category, sentiment, flight_type, "
+        "is_fake, rating) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (review_id, rng.choice(AIRLINES), rng.choice(["2024-01-15", "2024-02-03", None]),
+         rng.choice(["Food", "Legroom", None]), rng.choice(SENTIMENTS), rng.choice(["Domestic", None]),
+         rng.choice([0, 1]), rng.choice([1, 2, 3, 4, 5, None]))
+    )
+
+
+def insert_form_review(conn, rng):
+    conn.execute(
+        "INSERT INTO reviews (airline, date_of_travel, sentiment, flight_type, fake_review) VALUES (?, ?, ?, ?, ?)",
+        (rng.choice(AIRLINES), rng.choice(["2024-03-10", "not a date"]), rng.choice(SENTIMENTS),
+         rng.choice(["International", None]), rng.choice(["Fake", "Genuine"]))
+    )
+
+
+def snapshot(conn):
+    rollups = load_rollups(conn)
+    return rollups.sort_values(list(ROLLUP_KEY)).reset_index(drop=True)
+
+
+def test_triggers_match_a_rebuild(conn):
+    rng = random.Random(7)
+    with conn:
+        for review_id in range(60):
+            insert_csv_review(conn, review_id, rng)
+        for _ in range(30):
+            insert_form_review(conn, rng)
+    with conn:
+        conn.execute("UPDATE csv_reviews SET sentiment = 'Negative', rating = 1 WHERE review_id % 3 = 0")
+        conn.execute("UPDATE reviews SET fake_review = 'Fake' WHERE id % 4 = 0")
+        conn.execute("DELETE FROM csv_reviews WHERE review_id % 5 = 0")
+        conn.execute("DELETE FROM reviews WHERE id % 7 = 0")
+
+    maintained = snapshot(conn)
+    rebuild_rollups(conn)
+    assert maintained.equals(snapshot(conn))
+    assert maintained["reviews"].sum() == 48 + 26
+
+
+def test_rows_left_without_reviews_are_dropped(conn):
+    with conn:
+        conn.execute("INSERT INTO csv_reviews (review_id, airline, travel_date, rating) VALUES (0, 'IndiGo', '2024-01-15', 4)")
+    assert len(load_rollups(conn)) == 1
+    with conn:
+        conn.execute("DELETE FROM csv_reviews")
+    assert load_rollups(conn).empty
+
+
+def test_unparseable_dates_count_under_year_zero(conn):
+    with conn:
+        conn.execute("INSERT INTO reviews (airline, date_of_travel) VALUES ('IndiGo', 'someday')")
+    row = load_rollups(conn).iloc[0]
+    assert (row["source"], row["year"], row["month"], row["category"]) == ("form", 0, 0, "Uncategorised")
+
+
+def test_bulk_rows_are_added_once(conn):
+    rng = random.Random(3)
+    with conn:
+        for review_id in range(10):
+            insert_csv_review(conn, review_id, rng)
+    drop_rollup_triggers(conn, "csv_reviews")
+    with conn:
+        for review_id in range(10, 25):
+            insert_csv_review(conn, review_id, rng)
+    assert load_rollups(conn)["reviews"].sum() == 10
+
+    rollup_csv_reviews(conn, 10)
+    assert load_rollups(conn)["reviews"].sum() == 25
+    # The triggers are back
+    with conn:
+        insert_csv_review(conn, 25, rng)
+    assert load_rollups(conn)["reviews"].sum() == 26
+
+
+def test_filters_and_rating_summaries(conn):
+    with conn:
+        conn.executemany(
+            "INSERT INTO csv_reviews (review_id, airline, travel_date, rating) VALUES (?, ?, ?, ?)",
+            [(0, "IndiGo", "2024-01-15", 5), (1, "IndiGo", "2024-01-20", 3), (2, "Vistara", "2024-02-01", 4),
+             (3, "IndiGo", "2023-06-01", None)]
+        )
+    assert load_rollups(conn, airline="IndiGo", year=2024)["reviews"].sum() == 2
+
+    rollups = load_rollups(conn)
+    ratings = mean_ratings(rollups, "airline").set_index("airline")["Rating"]
+    assert ratings.to_dict() == {"IndiGo": 4.0, "Vistara": 4.0}
+    counts = rating_counts(rollups, "airline")
+    assert sorted(map(tuple, counts.values.tolist())) == [("IndiGo", 3, 1), ("IndiGo", 5, 1), ("Vistara", 4, 1)]
@@ -0,0 +1,85 @@
+from datetime import date
+
+import pytest
+
+from utils.review_repository import get_repository
+from utils.review_search import drop_search_triggers, match_query, rebuild_search_index, search_reviews
+
+CSV_REVIEWS = [
+    (0, "IndiGo", "2024-01-10", "Lost baggage at Delhi, nobody helped"),
+    (1, "SpiceJet", "2024-03-05", "My baggage was lost and found two days later"),
+    (2, "IndiGo", "2024-06-20", "Friendly crew and tasty food"),
+]
+FORM_REVIEWS = [
+    ("Vistara", "2024-02-14", "Baggage lost on the connecting flight"),
+    ("IndiGo", "2024-05-01", "Seats were clean"),
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with get_repository(str(tmp_path / "reviews.db")).connection() as conn:
+        with conn:
+            conn.executemany(
+                "INSERT INTO csv_reviews (review_id, airline, travel_date, review_text) VALUES (?, ?, ?, ?)",
+                CSV_REVIEWS
+            )
+            conn.executemany(
+                "INSERT INTO reviews (airline, date_of_travel, review_comment) VALUES (?, ?, ?)",
+                FORM_REVIEWS
+            )
+        yield conn
+
+
+def found(results):
+    return sorted((result.source, result.review_id) for result in results)
+
+
+def test_match_query_quotes_every_word():
+    assert match_query('lost "baggage" OR') == '"lost" "baggage" "or"'
+    assert match_query("?!") is None
+
+
+def test_searches_both_tables(conn):
+    results, more = search_reviews(conn, "lost baggage")
+    assert found(results) == [("csv", 0), ("csv", 1), ("form", 1)]
+    assert not more
+    assert all("**" in result.snippet for result in results)
+    assert all(result.score > 0 for result in results)
+
+
+def test_stemming_matches_word_forms(conn):
+    assert found(search_reviews(conn, "helping")[0]) == [("csv", 0)]
+
+
+def test_filters_by_airline_and_travel_date(conn):
+    assert found(search_reviews(conn, "baggage", airline="IndiGo")[0]) == [("csv", 0)]
+    results = search_reviews(conn, "baggage", start_date=date(2024, 2, 1), end_date=date(2024, 12, 31))[0]
+    assert found(results) == [("csv", 1), ("form", 1)]
+
+
+def test_pages_do_not_overlap(conn):
+    first, more = search_reviews(conn, "baggage", page=1, page_size=2)
+    second, last = search_reviews(conn, "baggage", page=2, page_size=2)
+    assert more and not last
+    assert len(first) == 2 and len(second) == 1
+    assert not set(found(first)) & set(found(second))
+
+
+def test_triggers_follow_updates_and_deletes(conn):
+    with conn:
+        conn.execute("UPDATE csv_reviews SET review_text = 'Great legroom' WHERE review_id = 0")
+        conn.execute("DELETE FROM reviews WHERE id = 1")
+        conn.execute("INSERT INTO reviews (airline, date_of_travel, review_comment) VALUES ('Akasa', '2024-07-01', 'Baggage delayed')")
+    assert found(search_reviews(conn, "baggage")[0]) == [("csv", 1), ("form", 3)]
+    assert found(search_reviews(conn, "legroom")[0]) == [("csv", 0)]
+
+
+def test_rebuild_indexes_rows_loaded_without_triggers(conn):
+    drop_search_triggers(conn, "csv_reviews")
+    with conn:
+        conn.execute("INSERT INTO csv_reviews (review_id, airline, review_text) VALUES (3, 'Akasa', 'Baggage fees')")
+    assert ("csv", 3) not in found(search_reviews(conn, "baggage")[0])
+
+    rebuild_search_index(conn)
+    assert ("csv", 3) in found(search_reviews(conn, "baggage")[0])
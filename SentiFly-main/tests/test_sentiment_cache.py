@@ -0,0 +1,35 @@
+import pytest
+
+from pages.models import SentimentAnalyzer
+
+# Same words; only the clause punctuation decides whether "not" reaches "great"
+UNPUNCTUATED = "The flight was not late great crew"
+PUNCTUATED = "The flight was not late. Great crew!"
+
+
+@pytest.fixture
+def cached():
+    return SentimentAnalyzer(cache_size=64)
+
+
+@pytest.fixture(scope="module")
+def uncached():
+    return SentimentAnalyzer()
+
+
+def test_clause_breaks_change_the_result(uncached):
+    assert uncached.analyze(UNPUNCTUATED)["sentiment"] == "Negative"
+    assert uncached.analyze(PUNCTUATED)["sentiment"] == "Positive"
+
+
+@pytest.mark.parametrize("order", [(UNPUNCTUATED, PUNCTUATED), (PUNCTUATED, UNPUNCTUATED)])
+def test_cache_keeps_clause_breaks_apart(cached, uncached, order):
+    for text in order:
+        assert cached.analyze(text) == uncached.analyze(text)
+        assert cached.analyze_review(text).scores == uncached.analyze_review(text).scores
+
+
+def test_cache_hits_for_the_same_text(cached, uncached):
+    for _ in range(3):
+        assert cached.analyze_review(PUNCTUATED).sentiment == uncached.analyze_review(PUNCTUATED).sentiment
+    assert cached.cache_info().hits == 2
@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from pages.models import SentimentAnalyzer
+from utils.utils import TEXT_FEATURE_COLUMNS, extract_text_features, text_feature_matrix
+
+TEXTS = [
+    "Flight 123 was delayed 45 minutes, see http://x.com <b>bad</b>",
+    "Best crew EVER!!! Best food, best seats. Best best best",
+    "Is this the worst airline? Worst. Check-in took 2h at www.example.com",
+    "Café très bien, équipage sympa 10/10",
+    "line one\nline two\twith tabs",
+    "",
+    None,
+]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return SentimentAnalyzer()
+
+
+def assert_features_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        assert math.isclose(actual[name], value, rel_tol=1e-6), name
+
+
+def test_analyze_review_drops_digits_urls_and_html(analyzer):
+    features = analyzer.analyze_review(TEXTS[0]).features
+    assert features["word_count"] == 6
+    assert features == extract_text_features(TEXTS[0])
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_analyze_review_matches_extract_text_features(analyzer, text):
+    assert_features_equal(analyzer.analyze_review(text).features, extract_text_features(text))
+
+
+def test_text_feature_matrix_matches_extract_text_features():
+    matrix, columns = text_feature_matrix(TEXTS)
+    assert columns == TEXT_FEATURE_COLUMNS
+    for row, text in zip(matrix, TEXTS):
+        assert_features_equal(dict(zip(columns, row.tolist())), extract_text_features(text))
@@ -0,0 +1,419 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from pages.models import (
+    DEFAULT_TRANSFORMER_MODEL, LearnedSentimentAnalyzer, SentimentAnalyzer, TransformerSentimentAnalyzer
+)
+from utils.review_embeddings import ReviewEmbeddingIndex, build_embedding_index
+from utils.utils import (
+    REVIEWS_CSV_PATH, TEXT_FEATURE_COLUMNS, clean_text, clean_text_series, extract_text_features,
+    review_text_hash, text_feature_matrix
+)
+
+# Batch throughput the learned model must sustain to replace the keyword scorer
+LEARNED_TARGET_ROWS_PER_SEC = 20000
+
+# Largest throughput loss accepted for negation/intensifier handling
+CONTEXTUAL_MAX_SLOWDOWN = 0.10
+
+
+def load_labelled_reviews(csv_path=REVIEWS_CSV_PATH, repeat=1):
+    """
+    Load review texts with their Sentiment labels
+
+    Args:
+        csv_path (str): Path to the review CSV
+        repeat (int): Number of times to repeat the rows
+
+    Returns:
+        DataFrame: "Review Text" and "Sentiment" columns
+    """
+    df = pd.read_csv(csv_path, usecols=["Review Text", "Sentiment"])
+    return pd.concat([df] * repeat, ignore_index=True) if repeat > 1 else df
+
+
+def holdout_split(df, test_fraction=0.25, by_text=False, seed=0):
+    """
+    Split reviews into train and test sets
+
+    Args:
+        df (DataFrame): Labelled reviews
+        test_fraction (float): Approximate share of rows (or distinct texts) held out
+        by_text (bool): Split by normalized text, so copies of the same
+            review never land on both sides
+        seed (int): Seed of the row split
+
+    Returns:
+        tuple: (train DataFrame, test DataFrame)
+    """
+    if by_text:
+        buckets = df["Review Text"].map(lambda text: int(review_text_hash(text)[:8], 16) % 100)
+        is_test = (buckets < test_fraction * 100).to_numpy()
+    else:
+        is_test = np.random.default_rng(seed).random(len(df)) < test_fraction
+    return df[~is_test], df[is_test]
+
+
+def load_review_texts(csv_path=REVIEWS_CSV_PATH, repeat=1):
+    """
+    Load review texts from the review CSV
+
+    Args:
+        csv_path (str): Path to the review CSV
+        repeat (int): Number of times to repeat the texts to enlarge the run
+
+    Returns:
+        list: Review texts
+    """
+    texts = pd.read_csv(csv_path, usecols=["Review Text"])["Review Text"].tolist()
+    return texts * repeat
+
+
+def time_call(func, texts):
+    """
+    Time a scoring function over all texts
+
+    Args:
+        func (callable): Function scoring a single text
+        texts (list): Review texts
+
+    Returns:
+        tuple: (results, elapsed seconds)
+    """
+    start = time.perf_counter()
+    results = [func(text) for text in texts]
+    return results, time.perf_counter() - start
+
+
+def legacy_count_keywords(analyzer, text, keyword_list):
+    """
+    Count one lexicon's keywords the way the scorer did before the
+    compiled matcher: each word hit, plus each phrase found anywhere
+
+    Args:
+        analyzer (SentimentAnalyzer): Analyzer providing preprocess()
+        text (str): Review text
+        keyword_list (list): Keywords and phrases of one category
+
+    Returns:
+        int: Number of hits
+    """
+    text = analyzer.preprocess(text)
+    words = text.split()
+    single_word_count = sum(1 for word in words if word in keyword_list)
+    phrase_count = sum(1 for phrase in keyword_list if len(phrase.split()) > 1 and phrase in text)
+    return single_word_count + phrase_count
+
+
+def legacy_analyze(analyzer, text):
+    """
+    Reference implementation of SentimentAnalyzer.analyze using four
+    separate legacy_count_keywords passes
+
+    Args:
+        analyzer (SentimentAnalyzer): Analyzer providing the lexicons
+        text (str): Review text
+
+    Returns:
+        str: Sentiment label
+    """
+    scores = [
+        legacy_count_keywords(analyzer, text, analyzer.lexicons.negative_keywords) * 1.0,
+        legacy_count_keywords(analyzer, text, analyzer.lexicons.neutral_keywords) * 0.8,
+        legacy_count_keywords(analyzer, text, analyzer.lexicons.positive_keywords) * 1.2,
+        legacy_count_keywords(analyzer, text, analyzer.lexicons.emergency_keywords) * 2.0
+    ]
+    return analyzer.labels[scores.index(max(scores))]
+
+
+def report(name, n_rows, elapsed, baseline=None):
+    """Print throughput of one benchmark run."""
+    line = f"{name:<28} {n_rows:>9} rows  {elapsed:8.3f} s  {n_rows / elapsed:>12,.0f} rows/s"
+    if baseline:
+        line += f"  {baseline / elapsed:6.2f}x"
+    print(line)
+
+
+def bench_matcher(texts):
+    """Compare the compiled keyword matcher with the four-pass scorer."""
+    analyzer = SentimentAnalyzer(contextual=False)
+
+    legacy, legacy_time = time_call(lambda text: legacy_analyze(analyzer, text), texts)
+    compiled, compiled_time = time_call(lambda text: analyzer.analyze(text)["sentiment"], texts)
+
+    report("four-pass count_keywords", len(texts), legacy_time)
+    report("compiled matcher", len(texts), compiled_time, legacy_time)
+
+    agreement = sum(a == b for a, b in zip(legacy, compiled)) / len(texts)
+    print(f"label agreement: {agreement:.2%}")
+
+
+def bench_contextual(texts, rounds=5):
+    """Compare plain keyword counting with negation/intensifier-aware counting."""
+    plain = SentimentAnalyzer(contextual=False)
+    contextual = SentimentAnalyzer()
+
+    # Best of a few rounds keeps timer noise out of the comparison
+    plain_time = contextual_time = float("inf")
+    for _ in range(rounds):
+        plain_labels, elapsed = time_call(lambda text: plain.analyze(text)["sentiment"], texts)
+        plain_time = min(plain_time, elapsed)
+        contextual_labels, elapsed = time_call(lambda text: contextual.analyze(text)["sentiment"], texts)
+        contextual_time = min(contextual_time, elapsed)
+
+    report("plain keywords", len(texts), plain_time)
+    report("negation + intensifiers", len(texts), contextual_time, plain_time)
+
+    slowdown = contextual_time / plain_time - 1
+    verdict = "within" if slowdown <= CONTEXTUAL_MAX_SLOWDOWN else "outside"
+    print(f"slowdown {slowdown:+.1%}, {verdict} the {CONTEXTUAL_MAX_SLOWDOWN:.0%} margin")
+
+    changed = sum(a != b for a, b in zip(plain_labels, contextual_labels))
+    print(f"labels changed by negation/intensifiers: {changed} of {len(texts)}")
+
+
+def bench_batch(texts):
+    """Compare per-row analyze/detect_fake_review dicts with analyze_many."""
+    analyzer = SentimentAnalyzer()
+
+    start = time.perf_counter()
+    rows = [
+        {"sentiment": analyzer.analyze(text)["sentiment"], "fake": analyzer.detect_fake_review(text)}
+        for text in texts
+    ]
+    pd.DataFrame(rows)
+    per_row_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pd.DataFrame(analyzer.analyze_many(texts))
+    batch_time = time.perf_counter() - start
+
+    report("per-row dicts", len(texts), per_row_time)
+    report("analyze_many", len(texts), batch_time, per_row_time)
+
+
+def bench_learned(texts, csv_path=REVIEWS_CSV_PATH, repeat=1):
+    """Compare accuracy and throughput of the keyword and learned scorers."""
+    reviews = load_labelled_reviews(csv_path, repeat)
+    keyword = SentimentAnalyzer()
+    labels = np.asarray(keyword.labels)
+
+    for split_name, by_text in (("random row split", False), ("distinct-text split", True)):
+        train, test = holdout_split(reviews, by_text=by_text)
+        print(f"-- {split_name}: train rows {len(train)}, held-out rows {len(test)} "
+              f"({test['Review Text'].nunique()} distinct texts)")
+
+        learned = LearnedSentimentAnalyzer()
+        start = time.perf_counter()
+        learned.fit(train["Review Text"], train["Sentiment"])
+        print(f"training time: {time.perf_counter() - start:.2f} s")
+
+        for name, analyzer in (("keyword scorer", keyword), ("learned hashed model", learned)):
+            start = time.perf_counter()
+            result = analyzer.analyze_many(test["Review Text"])
+            elapsed = time.perf_counter() - start
+            accuracy = (labels[result["label_code"]] == test["Sentiment"].to_numpy()).mean()
+            report(name, len(test), elapsed)
+            print(f"{'':<28} accuracy {accuracy:.2%}")
+
+    _, single_time = time_call(learned.analyze, test["Review Text"].tolist())
+    report("learned, one text per call", len(test), single_time)
+
+    _, batch_time = time_call(lambda chunk: learned.analyze_many(chunk), [texts])
+    rows_per_sec = len(texts) / batch_time
+    verdict = "meets" if rows_per_sec >= LEARNED_TARGET_ROWS_PER_SEC else "misses"
+    print(f"learned batch throughput {rows_per_sec:,.0f} rows/s {verdict} "
+          f"the {LEARNED_TARGET_ROWS_PER_SEC:,} rows/s target")
+
+
+def bench_clean(texts, rounds=3):
+    """Compare row-by-row clean_text with the chunked clean_text_series."""
+    series = pd.Series(texts)
+
+    row_time = series_time = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        per_row = series.map(clean_text)
+        row_time = min(row_time, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vectorized = clean_text_series(series)
+        series_time = min(series_time, time.perf_counter() - start)
+
+    report("Series.map(clean_text)", len(texts), row_time)
+    report("clean_text_series", len(texts), series_time, row_time)
+
+    mismatches = int((per_row != vectorized).sum())
+    print(f"rows differing from clean_text: {mismatches} of {len(texts)}")
+
+
+def bench_features(texts):
+    """Compare per-row extract_text_features dicts with the float32 feature matrix."""
+    start = time.perf_counter()
+    per_row = pd.DataFrame([extract_text_features(text) for text in texts], columns=TEXT_FEATURE_COLUMNS)
+    per_row_time = time.perf_counter() - start
+
+    text_feature_matrix(texts[:1])  # builds the uppercase lookup once
+    start = time.perf_counter()
+    matrix, columns = text_feature_matrix(texts)
+    matrix_time = time.perf_counter() - start
+
+    # Separate run for memory, tracing would distort the timing
+    tracemalloc.start()
+    text_feature_matrix(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report("extract_text_features rows", len(texts), per_row_time)
+    report("text_feature_matrix", len(texts), matrix_time, per_row_time)
+    print(f"matrix {matrix.nbytes / 2 ** 20:.1f} MiB, peak traced memory {peak / 2 ** 20:.1f} MiB")
+
+    matches = np.array_equal(per_row.to_numpy(dtype=np.float32), matrix) and columns == TEXT_FEATURE_COLUMNS
+    print(f"matches extract_text_features: {matches}")
+
+
+def concurrent_latencies(analyze, texts, clients):
+    """
+    Call analyze on every text from several client threads at once
+
+    Args:
+        analyze (callable): Function scoring a single text
+        texts (list): Review texts, split round-robin across clients
+        clients (int): Number of concurrent client threads
+
+    Returns:
+        tuple: (per-call latencies in seconds, wall-clock seconds)
+    """
+    latencies = [[] for _ in range(clients)]
+
+    def client(idx):
+        for text in texts[idx::clients]:
+            start = time.perf_counter()
+            analyze(text)
+            latencies[idx].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(idx,)) for idx in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate([np.asarray(values) for values in latencies]), time.perf_counter() - start
+
+
+def report_latency(name, latencies, elapsed):
+    """Print latency percentiles and throughput of one concurrent run."""
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(f"{name:<28} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms  "
+          f"{len(latencies) / elapsed:>10,.0f} rows/s")
+
+
+def bench_transformer(texts, model_name=DEFAULT_TRANSFORMER_MODEL, limit=512, clients=16,
+                      max_batch_size=16, max_wait_ms=5.0):
+    """Compare the keyword analyzer with the quantized transformer, with and without micro-batching."""
+    texts = texts[:limit]
+    print(f"{len(texts)} texts, {clients} concurrent clients, model {model_name}")
+
+    keyword = SentimentAnalyzer()
+    report_latency("keyword analyzer", *concurrent_latencies(keyword.analyze, texts, clients))
+
+    for name, batch_size in (("transformer, no batching", 1), ("transformer, micro-batched", max_batch_size)):
+        analyzer = TransformerSentimentAnalyzer(model_name, max_batch_size=batch_size, max_wait_ms=max_wait_ms)
+        analyzer.analyze(texts[0])  # warm-up
+        report_latency(name, *concurrent_latencies(analyzer.analyze, texts, clients))
+        batcher = analyzer.batcher
+        print(f"{'':<28} mean batch size {batcher.n_items / max(batcher.n_batches, 1):.1f}")
+
+        if batch_size > 1:
+            start = time.perf_counter()
+            analyzer.analyze_many(texts)
+            report("transformer analyze_many", len(texts), time.perf_counter() - start)
+        analyzer.close()
+
+
+def bench_similar(texts, queries=200, k=10):
+    """Time the embedding build and IVF queries against a brute-force scan of every vector."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "reviews.csv")
+        pd.DataFrame({"Review Text": texts}).to_csv(csv_path, index=False)
+
+        start = time.perf_counter()
+        build_embedding_index(csv_path, os.path.join(tmp_dir, "index"))
+        report("build_embedding_index", len(texts), time.perf_counter() - start)
+
+        index = ReviewEmbeddingIndex(os.path.join(tmp_dir, "index"))
+        vectors = np.asarray(index.vectors)
+        review_ids = np.asarray(index.review_ids)
+        print(f"{len(index)} vectors in {len(index.centroids)} lists, {vectors.nbytes / 2 ** 20:.1f} MiB")
+
+        rng = np.random.default_rng(0)
+        ivf_latencies, scan_latencies, recall = [], [], []
+        for review_id in rng.choice(len(index), size=min(queries, len(index)), replace=False):
+            query = index.vector(review_id)
+            start = time.perf_counter()
+            found = index.search(query, k, exclude=[review_id])
+            ivf_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scores = vectors @ query
+            scores[review_ids == review_id] = -np.inf
+            exact = review_ids[np.argsort(-scores)[:k]]
+            scan_latencies.append(time.perf_counter() - start)
+
+            # Ties are common with duplicate texts, so compare similarity levels rather than ids
+            exact_scores = np.sort(scores[np.isin(review_ids, exact)])[::-1]
+            found_scores = np.array([score for _, score in found])
+            recall.append(np.mean(np.isin(np.round(found_scores, 5), np.round(exact_scores, 5))) if found else 0.0)
+
+        for name, latencies in (("IVF search", ivf_latencies), ("brute-force scan", scan_latencies)):
+            p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+            print(f"{name:<28} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+        print(f"recall@{k}: {np.mean(recall):.3f}")
+
+
+BENCHMARKS = {
+    "matcher": bench_matcher,
+    "clean": bench_clean,
+    "features": bench_features,
+    "batch": bench_batch,
+    "contextual": bench_contextual,
+    "learned": bench_learned,
+    "transformer": bench_transformer,
+    "similar": bench_similar,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark review scoring throughput")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV to score")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the CSV rows N times")
+    parser.add_argument("--model", default=DEFAULT_TRANSFORMER_MODEL, help="Transformer model name or path")
+    parser.add_argument("--limit", type=int, default=512, help="Texts scored by the transformer benchmark")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients in the transformer benchmark")
+    parser.add_argument("--max-batch-size", type=int, default=16, help="Micro-batch size limit")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Micro-batch wait limit in milliseconds")
+    args = parser.parse_args()
+
+    texts = load_review_texts(args.csv, args.repeat)
+    # The transformer benchmark needs the optional torch/transformers packages
+    names = sorted(set(BENCHMARKS) - {"transformer"}) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        print(f"== {name} ==")
+        if name == "learned":
+            bench_learned(texts, args.csv, args.repeat)
+        elif name == "transformer":
+            bench_transformer(texts, args.model, args.limit, args.clients, args.max_batch_size, args.max_wait_ms)
+        else:
+            BENCHMARKS[name](texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+import argparse
+import datetime
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from utils.hashing import HASH_PRIME
+from utils.keyword_matcher import tokenize
+from utils.utils import REVIEWS_CSV_PATH, REVIEWS_DB_PATH
+
+# Reviews whose terms are counted as complaints
+COMPLAINT_SENTIMENTS = ("Negative", "Emergency")
+
+# Function words and domain words that would otherwise top every airline's list
+STOPWORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been before being below between
+    both but by can could did do does doing down during each even ever every few flight flights for from
+    further had has have having he her here hers him his how i if in into is it its itself just me more most
+    my no nor not now of off on once only or other our ours out over own same she should so some such than
+    that the their theirs them then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your yours airline airlines also
+    one get got us
+""".split())
+
+
+def complaint_terms(text):
+    """
+    Distinct content words of a review
+
+    Each term is counted once per review so one long rant cannot dominate
+    an airline's list.
+
+    Args:
+        text (str): Review text
+
+    Returns:
+        set: Lowercased terms, without stopwords, numbers and very short words
+    """
+    return {word for word in tokenize(text) if len(word) > 2 and not word.isdigit() and word not in STOPWORDS}
+
+
+def time_bucket(date):
+    """
+    ISO week a review falls into, e.g. "2025-W12"
+
+    Args:
+        date (datetime.date): Review date
+
+    Returns:
+        str: Bucket label; labels sort chronologically
+    """
+    year, week, _ = date.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class CountMinSketch:
+    """
+    Approximate term counts in a fixed depth x width table of counters.
+
+    Every term increments one counter per row; its estimate is the minimum
+    over the rows, which never undercounts and overcounts by at most
+    2 * total / width with high probability.
+    """
+
+    def __init__(self, width=2048, depth=4, counts=None, seed=7):
+        self.width = width
+        self.depth = depth
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(HASH_PRIME), size=(depth, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(HASH_PRIME), size=(depth, 1), dtype=np.uint64)
+        self.counts = np.zeros((depth, width), dtype=np.uint32) if counts is None else counts
+
+    def _columns(self, terms):
+        hashes = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in terms), dtype=np.uint64, count=len(terms))
+        return ((self._a * hashes[None, :] + self._b) % HASH_PRIME % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, terms):
+        """
+        Count one occurrence of each term
+
+        Args:
+            terms (list): Terms to count
+
+        Returns:
+            np.ndarray: Flat indices into counts of the counters incremented
+        """
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        cells = np.arange(self.depth)[:, None] * self.width + self._columns(terms)
+        np.add.at(self.counts.reshape(-1), cells, 1)
+        return cells.ravel()
+
+    def estimate(self, term):
+        """
+        Estimated count of a term
+
+        Args:
+            term (str): Term to look up
+
+        Returns:
+            int: Upper bound on the term's true count
+        """
+        columns = self._columns([term])[:, 0]
+        return int(self.counts[np.arange(self.depth), columns].min())
+
+    def to_bytes(self):
+        return self.counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob, width, depth):
+        counts = np.frombuffer(blob, dtype=np.uint32).reshape(depth, width).copy()
+        return cls(width, depth, counts)
+
+
+class SpaceSaving:
+    """
+    Space-saving heavy hitters: the most frequent terms in `capacity` counters.
+
+    A new term takes over the smallest counter and inherits its count as
+    error, so every term more frequent than total / capacity is guaranteed
+    to be held, with count - error <= true count <= count.
+    """
+
+    def __init__(self, capacity=64, counters=None):
+        self.capacity = capacity
+        # term -> [count, error]
+        self.counters = counters if counters is not None else {}
+
+    def add(self, term):
+        """
+        Count one occurrence of a term
+
+        Args:
+            term (str): Term to count
+
+        Returns:
+            str: Term whose counter was taken over, or None
+        """
+        counter = self.counters.get(term)
+        if counter is not None:
+            counter[0] += 1
+        elif len(self.counters) < self.capacity:
+            self.counters[term] = [1, 0]
+        else:
+            evicted = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(evicted)[0]
+            self.counters[term] = [floor + 1, floor]
+            return evicted
+        return None
+
+    def top(self, k):
+        """Return the k largest (term, count, error) entries, most frequent first."""
+        ranked = sorted(self.counters.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(term, count, error) for term, (count, error) in ranked[:k]]
+
+
+class ComplaintSummary:
+    """
+    Count-Min sketch plus space-saving heavy hitters for one airline and week.
+
+    Counters and terms changed since the summary was loaded are tracked, so
+    save() rewrites only those instead of the whole sketch and term list.
+    """
+
+    def __init__(self, airline, bucket, sketch=None, heavy_hitters=None, n_reviews=0, rowid=None):
+        self.airline = airline
+        self.bucket = bucket
+        self.sketch = sketch or CountMinSketch()
+        self.heavy_hitters = heavy_hitters or SpaceSaving()
+        self.n_reviews = n_reviews
+        # rowid of the stored sketch, None until it is first saved
+        self.rowid = rowid
+        self._changed_cells = set()
+        self._changed_terms = set()
+        self._evicted_terms = set()
+
+    def add_review(self, text):
+        """
+        Count the terms of one complaint
+
+        Args:
+            text (str): Review text
+
+        Returns:
+            int: Number of distinct terms counted
+        """
+        terms = sorted(complaint_terms(text))
+        self._changed_cells.update(self.sketch.add(terms).tolist())
+        for term in terms:
+            evicted = self.heavy_hitters.add(term)
+            self._changed_terms.add(term)
+            self._evicted_terms.discard(term)
+            if evicted is not None:
+                self._evicted_terms.add(evicted)
+                self._changed_terms.discard(evicted)
+        self.n_reviews += 1
+        return len(terms)
+
+    @classmethod
+    def load(cls, conn, airline, bucket):
+        """
+        Read a stored summary, or start an empty one
+
+        Args:
+            conn (sqlite3.Connection): Open database connection
+            airline (str): Airline name
+            bucket (str): Week from time_bucket()
+
+        Returns:
+            ComplaintSummary: Summary to update and save()
+        """
+        row = conn.execute(
+            "SELECT rowid, n_reviews, width, depth, counts FROM complaint_sketches WHERE airline = ? AND bucket = ?",
+            (airline, bucket)
+        ).fetchone()
+        if row is None:
+            return cls(airline, bucket)
+
+        rowid, n_reviews, width, depth, blob = row
+        counters = {
+            term: [count, error] for term, count, error in conn.execute(
+                "SELECT term, count, error FROM complaint_heavy_hitters WHERE airline = ? AND bucket = ?",
+                (airline, bucket)
+            )
+        }
+        return cls(airline, bucket, CountMinSketch.from_bytes(blob, width, depth), SpaceSaving(counters=counters),
+                   n_reviews, rowid)
+
+    def save(self, conn):
+        """
+        Write what changed since the summary was loaded or last saved; does not commit
+
+        A new summary is inserted whole. For a stored one, only the changed
+        counters are written into its sketch blob in place, and only the
+        changed and evicted heavy hitters are touched.
+
+        Args:
+            conn (sqlite3.Connection): Open database connection
+        """
+        sketch = self.sketch
+        if self.rowid is None:
+            self.rowid = conn.execute(
+                "INSERT OR REPLACE INTO complaint_sketches (airline, bucket, n_reviews, width, depth, counts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.airline, self.bucket, self.n_reviews, sketch.width, sketch.depth, sketch.to_bytes())
+            ).lastrowid
+        else:
+            conn.execute("UPDATE complaint_sketches SET n_reviews = ? WHERE rowid = ?", (self.n_reviews, self.rowid))
+            counts = sketch.counts.reshape(-1)
+            with conn.blobopen("complaint_sketches", "counts", self.rowid) as blob:
+                for cell in sorted(self._changed_cells):
+                    blob.seek(cell * counts.itemsize)
+                    blob.write(counts[cell].tobytes())
+
+        conn.executemany(
+            "DELETE FROM complaint_heavy_hitters WHERE airline = ? AND bucket = ? AND term = ?",
+            [(self.airline, self.bucket, term) for term in self._evicted_terms]
+        )
+        counters = self.heavy_hitters.counters
+        conn.executemany(
+            "INSERT OR REPLACE INTO complaint_heavy_hitters (airline, bucket, term, count, error) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(self.airline, self.bucket, term, *counters[term]) for term in self._changed_terms]
+        )
+        self._changed_cells.clear()
+        self._changed_terms.clear()
+        self._evicted_terms.clear()
+
+
+def ensure_complaint_tables(conn):
+    """
+    Create the sketch and heavy-hitter tables
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS complaint_sketches (
+                airline TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                n_reviews INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                depth INTEGER NOT NULL,
+                counts BLOB NOT NULL,
+                PRIMARY KEY (airline, bucket)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS complaint_heavy_hitters (
+                airline TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                term TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                error INTEGER NOT NULL,
+                PRIMARY KEY (airline, bucket, term)
+            )
+        """)
+        # Serves top-K straight from the index in count order
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_complaint_heavy_hitters_rank "
+            "ON complaint_heavy_hitters (airline, bucket, count DESC, term)"
+        )
+
+
+def record_complaint(conn, airline, review_comment, sentiment, date):
+    """
+    Update the airline's weekly complaint summary with a new review
+
+    Does not commit, so the update can share the review's transaction.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Airline the review is about
+        review_comment (str): Review text
+        sentiment (str): Sentiment label; only complaints are counted
+        date (datetime.date): Date the review was written
+
+    Returns:
+        bool: Whether the review was counted
+    """
+    if sentiment not in COMPLAINT_SENTIMENTS:
+        return False
+    summary = ComplaintSummary.load(conn, airline, time_bucket(date))
+    summary.add_review(review_comment)
+    summary.save(conn)
+    return True
+
+
+def top_complaint_terms(conn, airline, bucket, k=10):
+    """
+    Most frequent complaint terms of one airline and week
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Airline name
+        bucket (str): Week from time_bucket()
+        k (int): Number of terms
+
+    Returns:
+        list: (term, count, error) tuples, most frequent first; the true
+            count lies between count - error and count
+    """
+    return conn.execute(
+        "SELECT term, count, error FROM complaint_heavy_hitters WHERE airline = ? AND bucket = ? "
+        "ORDER BY count DESC, term LIMIT ?",
+        (airline, bucket, k)
+    ).fetchall()
+
+
+def estimate_term_count(conn, airline, bucket, term):
+    """
+    Estimated number of complaints mentioning a term, heavy hitter or not
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Airline name
+        bucket (str): Week from time_bucket()
+        term (str): Term to look up
+
+    Returns:
+        int: Count-Min estimate; 0 if the week has no complaints
+    """
+    row = conn.execute(
+        "SELECT width, depth, counts FROM complaint_sketches WHERE airline = ? AND bucket = ?", (airline, bucket)
+    ).fetchone()
+    if row is None:
+        return 0
+    width, depth, blob = row
+    return CountMinSketch.from_bytes(blob, width, depth).estimate(term.lower())
+
+
+def complaint_buckets(conn, airline):
+    """
+    Weeks with complaints for an airline, newest first
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Airline name
+
+    Returns:
+        list: (bucket, number of complaints) pairs
+    """
+    return conn.execute(
+        "SELECT bucket, n_reviews FROM complaint_sketches WHERE airline = ? ORDER BY bucket DESC", (airline,)
+    ).fetchall()
+
+
+def rebuild_complaint_summaries(conn, csv_path=REVIEWS_CSV_PATH, chunk_size=20000):
+    """
+    Recount every complaint in the CSV and in the reviews table
+
+    Summaries are built in memory and written once each, in a single
+    transaction that replaces the stored ones. CSV reviews are bucketed by
+    date of travel, as they carry no submission date.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        csv_path (str): Review CSV
+        chunk_size (int): CSV rows read per chunk
+
+    Returns:
+        int: Number of complaints counted
+    """
+    ensure_complaint_tables(conn)
+    summaries = {}
+    n_counted = 0
+
+    def count(airline, text, date):
+        key = (airline, time_bucket(date))
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = ComplaintSummary(*key)
+        summary.add_review(text)
+
+    columns = ["Airline Name", "Review Text", "Sentiment", "Date of Travel"]
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_size):
+        chunk = chunk[chunk["Sentiment"].isin(COMPLAINT_SENTIMENTS)]
+        dates = pd.to_datetime(chunk["Date of Travel"], errors="coerce").dt.date
+        for airline, text, date in zip(chunk["Airline Name"], chunk["Review Text"], dates):
+            if pd.notna(date):
+                count(airline, text, date)
+                n_counted += 1
+
+    placeholders = ",".join("?" * len(COMPLAINT_SENTIMENTS))
+    rows = conn.execute(
+        f"SELECT airline, review_comment, date_of_travel FROM reviews WHERE sentiment IN ({placeholders})",
+        COMPLAINT_SENTIMENTS
+    ).fetchall()
+    for airline, text, date in rows:
+        try:
+            count(airline, text, datetime.date.fromisoformat(date))
+        except (TypeError, ValueError):
+            continue
+        n_counted += 1
+
+    with conn:
+        conn.execute("DELETE FROM complaint_sketches")
+        conn.execute("DELETE FROM complaint_heavy_hitters")
+        for summary in summaries.values():
+            summary.save(conn)
+    return n_counted
+
+
+def main():
+    # Imported here as review_repository imports this module for its schema
+    from utils.review_repository import get_repository
+
+    parser = argparse.ArgumentParser(description="Weekly complaint term summaries per airline")
+    subparsers = parser.add_subparsers(dest="task", required=True)
+    subparsers.add_parser("rebuild", help="Recount all complaints in the CSV and the reviews table")
+    top = subparsers.add_parser("top", help="Show the top complaint terms of an airline")
+    top.add_argument("airline")
+    top.add_argument("--week", help="Week such as 2025-W12; defaults to the latest")
+    top.add_argument("-k", type=int, default=10, help="Number of terms")
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV")
+    args = parser.parse_args()
+
+    with get_repository(args.db).connection() as conn:
+        if args.task == "rebuild":
+            start = time.perf_counter()
+            n_counted = rebuild_complaint_summaries(conn, args.csv)
+            print(f"Counted {n_counted} complaints in {time.perf_counter() - start:.2f} s")
+            return
+
+        buckets = complaint_buckets(conn, args.airline)
+        week = args.week or (buckets[0][0] if buckets else None)
+        for term, count, error in top_complaint_terms(conn, args.airline, week, args.k):
+            print(f"{term:<20} {count:>8}  (+/- {error})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_directory(path):
+    """
+    Assemble a directory next to `path` and swap it into place when done
+
+    Readers see either the previous directory or the complete new one,
+    never a half-written one. If the block raises, the partial directory
+    is removed and any previous one is left untouched.
+
+    Args:
+        path (str): Directory to create or replace
+
+    Yields:
+        str: Temporary directory to write the new contents into
+    """
+    path = os.path.abspath(path)
+    parent, name = os.path.split(path)
+    os.makedirs(parent, exist_ok=True)
+
+    tmp_dir = tempfile.mkdtemp(prefix=f".{name}-", dir=parent)
+    try:
+        yield tmp_dir
+
+        # Move any previous directory aside, then rename the new one into place
+        old_dir = None
+        if os.path.exists(path):
+            old_dir = tempfile.mkdtemp(prefix=f".{name}-old-", dir=parent)
+            os.rename(path, os.path.join(old_dir, name))
+        os.rename(tmp_dir, path)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
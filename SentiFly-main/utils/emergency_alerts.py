@@ -0,0 +1,161 @@
+import argparse
+import time
+from collections import namedtuple
+
+from utils.utils import REVIEWS_DB_PATH
+
+EmergencyAlert = namedtuple("EmergencyAlert", ["alert_id", "review_id", "airline", "review_comment", "created_at"])
+
+_ALERT_COLUMNS = "alert_id, review_id, airline, review_comment, created_at"
+
+
+def ensure_alert_table(conn):
+    """
+    Create the append-only emergency alert queue
+
+    alert_id is AUTOINCREMENT, so ids only ever grow and are never reused;
+    consumers keep the last id they have seen as their cursor.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS emergency_alerts (
+                alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                review_id INTEGER NOT NULL,
+                airline TEXT,
+                review_comment TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_emergency_alerts_airline ON emergency_alerts (airline, alert_id)"
+        )
+
+
+def publish_alert(conn, review_id, airline, review_comment):
+    """
+    Append an alert for an emergency review
+
+    Does not commit, so the alert can be written in the same transaction
+    as the review itself.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        review_id (int): id of the review in the reviews table
+        airline (str): Airline the review is about
+        review_comment (str): Review text
+
+    Returns:
+        int: alert_id of the new alert
+    """
+    cursor = conn.execute(
+        "INSERT INTO emergency_alerts (review_id, airline, review_comment) VALUES (?, ?, ?)",
+        (review_id, airline, review_comment)
+    )
+    return cursor.lastrowid
+
+
+def read_alerts(conn, after_id=0, airline=None, limit=100):
+    """
+    Read alerts appended after a cursor, oldest first
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        after_id (int): Last alert_id already seen; 0 reads from the start
+        airline (str): Only alerts for this airline, if given
+        limit (int): Maximum number of alerts returned
+
+    Returns:
+        list: EmergencyAlert tuples; the last alert_id is the next cursor
+    """
+    if airline is None:
+        rows = conn.execute(
+            f"SELECT {_ALERT_COLUMNS} FROM emergency_alerts WHERE alert_id > ? ORDER BY alert_id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT {_ALERT_COLUMNS} FROM emergency_alerts WHERE airline = ? AND alert_id > ? "
+            "ORDER BY alert_id LIMIT ?",
+            (airline, after_id, limit)
+        ).fetchall()
+    return [EmergencyAlert(*row) for row in rows]
+
+
+def latest_alerts(conn, airline=None, limit=10):
+    """
+    Read the most recent alerts, oldest first, to seed a consumer
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Only alerts for this airline, if given
+        limit (int): Number of alerts returned
+
+    Returns:
+        list: EmergencyAlert tuples
+    """
+    if airline is None:
+        rows = conn.execute(
+            f"SELECT {_ALERT_COLUMNS} FROM emergency_alerts ORDER BY alert_id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT {_ALERT_COLUMNS} FROM emergency_alerts WHERE airline = ? ORDER BY alert_id DESC LIMIT ?",
+            (airline, limit)
+        ).fetchall()
+    return [EmergencyAlert(*row) for row in reversed(rows)]
+
+
+def backfill_alerts(conn):
+    """
+    Queue alerts for emergency reviews stored before the queue existed
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+
+    Returns:
+        int: Number of alerts queued
+    """
+    ensure_alert_table(conn)
+    with conn:
+        cursor = conn.execute("""
+            INSERT INTO emergency_alerts (review_id, airline, review_comment)
+            SELECT id, airline, review_comment FROM reviews
+            WHERE sentiment = 'Emergency'
+              AND id NOT IN (SELECT review_id FROM emergency_alerts)
+            ORDER BY id
+        """)
+    return cursor.rowcount
+
+
+def main():
+    # Imported here as review_repository imports this module for its schema
+    from utils.review_repository import get_repository
+
+    parser = argparse.ArgumentParser(description="Emergency review alert queue")
+    parser.add_argument("task", choices=["backfill", "tail"])
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--airline", help="Only show alerts for this airline")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls when tailing")
+    args = parser.parse_args()
+
+    try:
+        with get_repository(args.db).connection() as conn:
+            if args.task == "backfill":
+                print(f"Queued {backfill_alerts(conn)} alerts")
+                return
+
+            cursor = 0
+            while True:
+                for alert in read_alerts(conn, cursor, args.airline):
+                    print(f"[{alert.created_at}] #{alert.review_id} {alert.airline}: {alert.review_comment}")
+                    cursor = alert.alert_id
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
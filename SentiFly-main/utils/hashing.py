@@ -0,0 +1,54 @@
+import zlib
+from itertools import chain
+
+import numpy as np
+
+# Mersenne prime for universal hash families over 32-bit keys; products
+# stay below 2**63
+HASH_PRIME = np.uint64((1 << 31) - 1)
+
+# Multiplier folding the next token's hash into an n-gram hash
+_NGRAM_MULTIPLIER = np.uint64(1000003)
+
+
+def hash_tokens(words, memo):
+    """
+    Map tokens to 32-bit hashes, memoizing the vocabulary
+
+    Args:
+        words (list): Tokens
+        memo (dict): Token -> hash, shared between calls and filled as new tokens appear
+
+    Returns:
+        np.ndarray: uint64 hash of each token
+    """
+    for word in set(words).difference(memo):
+        memo[word] = zlib.crc32(word.encode("utf-8"))
+    return np.fromiter(map(memo.__getitem__, words), dtype=np.uint64, count=len(words))
+
+
+def ngram_hashes(token_lists, ngram_order, memo):
+    """
+    Hash every word n-gram up to ngram_order that stays inside one text
+
+    Args:
+        token_lists (list): Tokenized texts
+        ngram_order (int): Longest n-gram; 1 gives unigrams only
+        memo (dict): Token hash memo passed to hash_tokens()
+
+    Returns:
+        tuple: (rows, hashes) arrays, the text index and uint64 hash of each n-gram
+    """
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    hashes = hash_tokens(list(chain.from_iterable(token_lists)), memo)
+    rows = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+
+    # Extend unigram hashes to n-grams that stay inside one text
+    all_rows, all_hashes = [rows], [hashes]
+    gram = hashes
+    for order in range(2, ngram_order + 1):
+        same_text = rows[order - 1:] == rows[:len(rows) - order + 1]
+        gram = gram[:-1] * _NGRAM_MULTIPLIER ^ hashes[order - 1:]
+        all_rows.append(rows[order - 1:][same_text])
+        all_hashes.append(gram[same_text])
+    return np.concatenate(all_rows), np.concatenate(all_hashes)
@@ -0,0 +1,231 @@
+import argparse
+import os
+import threading
+import time
+
+import pandas as pd
+
+from utils.review_repository import (
+    CSV_REVIEW_COLUMNS, create_csv_review_indexes, create_csv_review_table, drop_csv_review_indexes, get_repository
+)
+from utils.review_rollups import drop_rollup_triggers, rebuild_rollups, rollup_csv_reviews
+from utils.review_search import drop_search_triggers, index_csv_reviews, rebuild_search_index
+from utils.utils import REVIEWS_CSV_PATH, REVIEWS_DB_PATH
+
+DEFAULT_INGEST_CHUNK_SIZE = 100000
+
+# Rows written between commits; large transactions keep fsyncs rare
+DEFAULT_ROWS_PER_TRANSACTION = 1000000
+
+_INTEGER_COLUMNS = {"Rating", "Fake Review"}
+_REAL_COLUMNS = {"Sentiment Score"}
+_DATE_COLUMNS = {"Date of Travel"}
+
+_ingest_lock = threading.Lock()
+
+
+def parse_travel_dates(series):
+    """
+    Parse the CSV's travel dates, month/day/year with a per-value fallback
+
+    Args:
+        series (Series): Date of Travel values
+
+    Returns:
+        Series: datetime64 values, NaT where a date cannot be parsed
+    """
+    dates = pd.to_datetime(series, format="%m/%d/%Y", errors="coerce")
+    # Dates already in ISO or another format are parsed individually
+    retry = dates.isna() & series.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(series[retry], format="mixed", errors="coerce")
+    return dates
+
+
+def csv_source_stamp(csv_path):
+    """
+    Identify a version of the review CSV by its path, size and modification time
+
+    Args:
+        csv_path (str): Review CSV
+
+    Returns:
+        dict: "path", "size" and "mtime_ns"
+    """
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _column_values(series, csv_column):
+    """Convert one CSV column to a list of SQLite-ready Python values, None for missing."""
+    if csv_column in _INTEGER_COLUMNS:
+        series = pd.to_numeric(series, errors="coerce").round().astype("Int64")
+    elif csv_column in _REAL_COLUMNS:
+        series = pd.to_numeric(series, errors="coerce")
+    elif csv_column in _DATE_COLUMNS:
+        series = parse_travel_dates(series).dt.strftime("%Y-%m-%d")
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def typed_rows(chunk, first_id):
+    """
+    Convert a CSV chunk into csv_reviews rows
+
+    Args:
+        chunk (DataFrame): Rows read from the review CSV
+        first_id (int): review_id of the first row
+
+    Returns:
+        list: Tuples in csv_reviews column order, review_id first
+    """
+    columns = [range(first_id, first_id + len(chunk))]
+    for csv_column in CSV_REVIEW_COLUMNS:
+        if csv_column in chunk.columns:
+            columns.append(_column_values(chunk[csv_column], csv_column))
+        else:
+            columns.append([None] * len(chunk))
+    return list(zip(*columns))
+
+
+def ingest_csv(repository, csv_path=REVIEWS_CSV_PATH, chunk_size=DEFAULT_INGEST_CHUNK_SIZE,
+               rows_per_transaction=DEFAULT_ROWS_PER_TRANSACTION, append=False, progress=None):
+    """
+    Bulk-load the review CSV into the typed csv_reviews table
+
+    The CSV is streamed in chunks and written with executemany inside
+    large transactions. Indexes, the full-text sync triggers and the
+    rollup triggers are dropped for the load and rebuilt once at the end,
+    which is much faster than maintaining them per row. A full load
+    records csv_source_stamp() of the file, which ensure_csv_reviews()
+    compares against.
+
+    Args:
+        repository (ReviewRepository): Repository over the reviews database
+        csv_path (str): Review CSV
+        chunk_size (int): CSV rows converted and inserted per executemany
+        rows_per_transaction (int): Rows written between commits
+        append (bool): Add to the existing rows instead of replacing them
+        progress (callable): Called with the number of rows loaded so far
+
+    Returns:
+        tuple: (rows loaded, seconds spent loading, seconds spent building
+            the indexes, the full-text index and the rollups)
+    """
+    placeholders = ", ".join("?" * (len(CSV_REVIEW_COLUMNS) + 1))
+    column_names = ", ".join(name for name, _ in CSV_REVIEW_COLUMNS.values())
+    insert = f"INSERT INTO csv_reviews (review_id, {column_names}) VALUES ({placeholders})"
+
+    # Stamped before reading, so a CSV changed during the load is reloaded next time
+    source = csv_source_stamp(csv_path)
+
+    with repository.connection() as conn:
+        if not append:
+            # Dropping is far cheaper than deleting tens of millions of rows
+            with conn:
+                conn.execute("DROP TABLE IF EXISTS csv_reviews")
+                conn.execute("DELETE FROM csv_review_source")
+            create_csv_review_table(conn)
+        drop_csv_review_indexes(conn)
+        # The search index is filled in one pass after the load, not row by row
+        drop_search_triggers(conn, "csv_reviews")
+        drop_rollup_triggers(conn, "csv_reviews")
+        first_id = conn.execute("SELECT COALESCE(MAX(review_id) + 1, 0) FROM csv_reviews").fetchone()[0]
+
+        # Durability per commit is not needed while loading a file that can be reloaded
+        conn.execute("PRAGMA synchronous = OFF")
+        try:
+            start = time.perf_counter()
+            n_rows = 0
+            uncommitted = 0
+            for chunk in pd.read_csv(csv_path, usecols=lambda column: column in CSV_REVIEW_COLUMNS,
+                                     chunksize=chunk_size):
+                conn.executemany(insert, typed_rows(chunk, first_id + n_rows))
+                n_rows += len(chunk)
+                uncommitted += len(chunk)
+                if uncommitted >= rows_per_transaction:
+                    conn.commit()
+                    uncommitted = 0
+                if progress is not None:
+                    progress(n_rows)
+            conn.commit()
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            create_csv_review_indexes(conn)
+            if append:
+                index_csv_reviews(conn, first_id)
+                rollup_csv_reviews(conn, first_id)
+            else:
+                # Entries of the dropped rows can only be cleared by a full rebuild
+                rebuild_search_index(conn)
+                rebuild_rollups(conn)
+            with conn:
+                conn.execute("ANALYZE csv_reviews")
+                if not append:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO csv_review_source (id, path, size, mtime_ns) VALUES (0, ?, ?, ?)",
+                        (source["path"], source["size"], source["mtime_ns"])
+                    )
+            index_time = time.perf_counter() - start
+        finally:
+            conn.execute("PRAGMA synchronous = NORMAL")
+
+    return n_rows, load_time, index_time
+
+
+def ensure_csv_reviews(repository=None, csv_path=REVIEWS_CSV_PATH):
+    """
+    Load the review CSV into csv_reviews unless it is already loaded from
+    the file as it is now
+
+    Lets the dashboards fill csv_reviews, its full-text index and the
+    rollups on first use instead of needing a separate ingest run. The
+    stored csv_source_stamp() of the last load is compared with the file,
+    so a changed CSV replaces the rows and rebuilds the full-text index
+    and the rollups; when nothing changed only one stat and one small
+    lookup are paid.
+
+    Args:
+        repository (ReviewRepository): Repository over the reviews database,
+            the default one if None
+        csv_path (str): Review CSV
+
+    Returns:
+        int: Rows loaded by this call, 0 if csv_reviews was current or
+            there is no CSV
+    """
+    repository = repository or get_repository()
+
+    def loaded():
+        with repository.connection() as conn:
+            row = conn.execute("SELECT path, size, mtime_ns FROM csv_review_source WHERE id = 0").fetchone()
+        return row is not None and dict(zip(("path", "size", "mtime_ns"), row)) == csv_source_stamp(csv_path)
+
+    if not os.path.exists(csv_path) or loaded():
+        return 0
+    with _ingest_lock:
+        if loaded():
+            return 0
+        return ingest_csv(repository, csv_path)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the review CSV into SQLite")
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV to load")
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_INGEST_CHUNK_SIZE, help="CSV rows per batch")
+    parser.add_argument("--rows-per-transaction", type=int, default=DEFAULT_ROWS_PER_TRANSACTION,
+                        help="Rows written between commits")
+    parser.add_argument("--append", action="store_true", help="Keep rows already loaded")
+    args = parser.parse_args()
+
+    n_rows, load_time, index_time = ingest_csv(
+        get_repository(args.db), args.csv, args.chunk_size, args.rows_per_transaction, args.append,
+        progress=lambda n: print(f"\r{n:,} rows", end="", flush=True)
+    )
+    print(f"\rLoaded {n_rows:,} rows in {load_time:.2f} s ({n_rows / max(load_time, 1e-9):,.0f} rows/s), "
+          f"indexed in {index_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
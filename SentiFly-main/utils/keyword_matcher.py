@@ -0,0 +1,435 @@
+import re
+
+# Same normalisation SentimentAnalyzer.preprocess applies
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+# Sentence and clause punctuation; it ends a clause when whitespace
+# follows, possibly after a quote or bracket, so "4.5" and "check-in" do
+# not split one
+CLAUSE_PUNCTUATION = ".,!?;:"
+_CLAUSE_END_RE = re.compile(f"[{re.escape(CLAUSE_PUNCTUATION)}](?=[^\\w\\s]*\\s)")
+
+# Token tokenize_clauses() puts at clause ends: a single upper case
+# letter, so lowercased text can never produce it and it is never a new
+# string object
+CLAUSE_BREAK = "X"
+_SPACED_BREAK = f" {CLAUSE_BREAK} "
+
+# For ASCII text one str.translate pass does what tokenize_clauses()
+# otherwise needs two regex passes for: delete the characters tokenize()
+# strips, turn every whitespace into a space and clause punctuation into
+# a placeholder, which becomes a break where a space follows it
+_CLAUSE_MARK = "\x00"
+_ASCII_CLAUSE_TABLE = str.maketrans({
+    **{chr(code): None for code in range(128) if _NON_WORD_RE.match(chr(code))},
+    **{chr(code): " " for code in range(128) if chr(code).isspace()},
+    **{char: _CLAUSE_MARK for char in CLAUSE_PUNCTUATION},
+})
+
+# Modifier markers for negator words and clause breaks in the trie
+_NEGATE = "negate"
+_BREAK = "break"
+
+
+def tokenize(text):
+    """
+    Lowercase text, strip special characters and split into tokens
+
+    Args:
+        text (str): Raw review text
+
+    Returns:
+        list: Tokens in reading order
+    """
+    if not isinstance(text, str):
+        return []
+    return _NON_WORD_RE.sub('', text.lower()).split()
+
+
+def tokenize_clauses(text):
+    """
+    Tokenize like tokenize(), with a CLAUSE_BREAK token at every clause end
+
+    Args:
+        text (str): Raw review text
+
+    Returns:
+        list: Tokens in reading order; dropping the CLAUSE_BREAK tokens
+            gives exactly tokenize(text)
+    """
+    if not isinstance(text, str):
+        return []
+    text = text.lower()
+    if text.isascii():
+        text = text.translate(_ASCII_CLAUSE_TABLE)
+        text = text.replace(_CLAUSE_MARK + " ", _SPACED_BREAK).replace(_CLAUSE_MARK, "")
+    else:
+        text = _NON_WORD_RE.sub('', _CLAUSE_END_RE.sub(_SPACED_BREAK, text))
+    return text.split()
+
+
+def strip_clause_breaks(tokens):
+    """
+    Drop the CLAUSE_BREAK tokens from a tokenize_clauses() token list
+
+    Args:
+        tokens (list): Tokens, with or without clause breaks
+
+    Returns:
+        list: The words alone, as tokenize() returns them
+    """
+    if CLAUSE_BREAK not in tokens:
+        return tokens
+    return [token for token in tokens if token != CLAUSE_BREAK]
+
+
+class KeywordMatcher:
+    """
+    Token trie compiled from several keyword lists at once.
+
+    Every single-word keyword is counted on each occurrence and every
+    multi-word phrase is counted once if it appears anywhere in the text,
+    as in the scorer it replaced, kept as utils.benchmark.legacy_count_keywords.
+    A text is scanned a single time and the counts for all categories are
+    returned together.
+
+    Negators and intensifiers are optional and handled in the same scan: a
+    negator moves the next keyword hit within `negation_scope` tokens to
+    the category given by `negation_flip`, and an intensifier scales the
+    next keyword hit within two tokens by its multiplier. Neither reaches
+    past a CLAUSE_BREAK token, so with tokenize_clauses() "not late. Great
+    crew!" keeps "great" positive; phrases do not span one either.
+
+    Aspect terms (seat, crew, food, ...) can be compiled into the same trie.
+    count_tokens_with_aspects() counts the same hits and also attributes
+    every polar keyword hit to an aspect mentioned within `aspect_window`
+    tokens, still in a single scan; count_tokens() does no aspect work.
+    """
+
+    def __init__(self, lexicons, negators=(), intensifiers=None, negation_flip=None, negation_scope=3,
+                 aspects=None, aspect_polarity=None, aspect_window=5):
+        """
+        Compile the keyword lists into the trie
+
+        Args:
+            lexicons (list): One list of keywords/phrases per category, in
+                the order the counts should be returned
+            negators (iterable): Words that negate the following keyword
+            intensifiers (dict): Word -> multiplier for the following keyword
+            negation_flip (list): Category each category moves to when negated
+            negation_scope (int): Tokens a negator reaches forward
+            aspects (dict): Aspect name -> list of terms/phrases naming it
+            aspect_polarity (list): Sign each category contributes to an aspect
+            aspect_window (int): Tokens between a keyword and the aspect it describes
+        """
+        self.n_categories = len(lexicons)
+        self._phrase_count = 0
+        # Each node is [children, categories hit by a word ending here,
+        # (phrase_id, category) pairs for phrases ending here, modifier,
+        # aspects named by a term ending here]
+        self._root = {}
+
+        for category, keywords in enumerate(lexicons):
+            for keyword in keywords:
+                self._add(keyword, category)
+
+        self.aspect_names = list(aspects or {})
+        self.aspect_polarity = list(aspect_polarity or [0] * self.n_categories)
+        self.aspect_window = aspect_window
+        for aspect_id, name in enumerate(self.aspect_names):
+            for term in aspects[name]:
+                node = self._node_for(tokenize(term))
+                if node is not None and aspect_id not in node[4]:
+                    node[4] = node[4] + (aspect_id,)
+
+        # Modifiers live on root nodes so a token still costs one dict lookup
+        self.negation_flip = list(negation_flip or range(self.n_categories))
+        self.negation_scope = negation_scope
+        self.contextual = bool(negators or intensifiers)
+        for word in negators:
+            self._root_node(word)[3] = _NEGATE
+        for word, multiplier in (intensifiers or {}).items():
+            self._root_node(word)[3] = float(multiplier)
+        # Tokenizer for texts counted with this matcher
+        self.tokenize = tokenize_clauses if self.contextual else tokenize
+        if self.contextual:
+            self._root_node(CLAUSE_BREAK)[3] = _BREAK
+
+    def _root_node(self, word):
+        node = self._root.get(word)
+        if node is None:
+            node = self._root[word] = [{}, (), (), None, ()]
+        return node
+
+    def _node_for(self, tokens):
+        """Return the trie node for a token sequence, creating the path."""
+        children = self._root
+        node = None
+        for token in tokens:
+            node = children.get(token)
+            if node is None:
+                node = [{}, (), (), None, ()]
+                children[token] = node
+            children = node[0]
+        return node
+
+    def _add(self, keyword, category):
+        tokens = tokenize(keyword)
+        if not tokens:
+            return
+
+        node = self._node_for(tokens)
+        if len(tokens) == 1:
+            if category not in node[1]:
+                node[1] = node[1] + (category,)
+        else:
+            node[2] = node[2] + ((self._phrase_count, category),)
+            self._phrase_count += 1
+
+    def count_tokens(self, tokens):
+        """
+        Count keyword hits per category in an already tokenized text
+
+        Args:
+            tokens (list): Tokens as produced by tokenize(), or by
+                tokenize_clauses() to keep modifiers inside their clause
+
+        Returns:
+            list: Hit count per category, weighted by negation and
+                intensifiers when those are configured
+        """
+        if self.contextual:
+            return self._count_contextual(tokens)
+
+        counts = [0] * self.n_categories
+        root = self._root
+        seen_phrases = None
+        n_tokens = len(tokens)
+
+        for i, token in enumerate(tokens):
+            node = root.get(token)
+            if node is None:
+                continue
+
+            for category in node[1]:
+                counts[category] += 1
+
+            # Walk the trie forward for multi-word phrases
+            j = i + 1
+            children = node[0]
+            while children and j < n_tokens:
+                node = children.get(tokens[j])
+                if node is None:
+                    break
+                for phrase_id, category in node[2]:
+                    if seen_phrases is None:
+                        seen_phrases = set()
+                    if phrase_id not in seen_phrases:
+                        seen_phrases.add(phrase_id)
+                        counts[category] += 1
+                children = node[0]
+                j += 1
+
+        return counts
+
+    def _count_contextual(self, tokens):
+        counts = [0.0] * self.n_categories
+        root = self._root
+        flip = self.negation_flip
+        scope = self.negation_scope
+        seen_phrases = None
+        n_tokens = len(tokens)
+        # Modifier scopes are kept as token positions so words that are not
+        # in the trie cost exactly what they cost in the plain scan
+        negate_until = -1
+        boost = 1.0
+        boost_until = -1
+
+        for i, token in enumerate(tokens):
+            node = root.get(token)
+            if node is None:
+                continue
+
+            modifier = node[3]
+            if modifier is not None:
+                if modifier is _BREAK:
+                    negate_until = -1
+                    boost_until = -1
+                elif modifier is _NEGATE:
+                    negate_until = i + scope
+                else:
+                    boost = modifier
+                    boost_until = i + 2
+                continue
+
+            if i > negate_until and i > boost_until:
+                # Nothing pending: count exactly like the plain scan
+                for category in node[1]:
+                    counts[category] += 1.0
+                j = i + 1
+                children = node[0]
+                while children and j < n_tokens:
+                    node = children.get(tokens[j])
+                    if node is None:
+                        break
+                    for phrase_id, category in node[2]:
+                        if seen_phrases is None:
+                            seen_phrases = set()
+                        if phrase_id not in seen_phrases:
+                            seen_phrases.add(phrase_id)
+                            counts[category] += 1.0
+                    children = node[0]
+                    j += 1
+                continue
+
+            negated = i <= negate_until
+            weight = boost if i <= boost_until else 1.0
+            hit = False
+            for category in node[1]:
+                counts[flip[category] if negated else category] += weight
+                hit = True
+
+            # Walk the trie forward for multi-word phrases
+            j = i + 1
+            children = node[0]
+            while children and j < n_tokens:
+                node = children.get(tokens[j])
+                if node is None:
+                    break
+                for phrase_id, category in node[2]:
+                    if seen_phrases is None:
+                        seen_phrases = set()
+                    if phrase_id not in seen_phrases:
+                        seen_phrases.add(phrase_id)
+                        counts[flip[category] if negated else category] += weight
+                        hit = True
+                children = node[0]
+                j += 1
+
+            if hit:
+                # A keyword consumes the pending negation and intensifier
+                negate_until = -1
+                boost_until = -1
+
+        return counts
+
+    def count_tokens_with_aspects(self, tokens):
+        """
+        Count keyword hits per category and score every aspect in one scan
+
+        Args:
+            tokens (list): Tokens as produced by tokenize() or tokenize_clauses()
+
+        Returns:
+            tuple: (hit count per category, score per aspect). An aspect
+                score is the signed sum of the polar keyword hits attributed
+                to it, 0.0 if it is mentioned without any, and None if the
+                text never mentions it.
+        """
+        counts = [0.0] * self.n_categories
+        root = self._root
+        flip = self.negation_flip
+        scope = self.negation_scope
+        seen_phrases = None
+        n_tokens = len(tokens)
+        negate_until = -1
+        boost = 1.0
+        boost_until = -1
+
+        polarity = self.aspect_polarity
+        window = self.aspect_window
+        aspect_scores = [None] * len(self.aspect_names)
+        # Polar hits as [position, signed weight, aspect, distance to it]
+        polar_hits = []
+        last_aspect = None
+        last_aspect_at = -window - 1
+
+        for i, token in enumerate(tokens):
+            node = root.get(token)
+            if node is None:
+                continue
+
+            modifier = node[3]
+            if modifier is not None:
+                if modifier is _BREAK:
+                    negate_until = -1
+                    boost_until = -1
+                elif modifier is _NEGATE:
+                    negate_until = i + scope
+                else:
+                    boost = modifier
+                    boost_until = i + 2
+                continue
+
+            negated = i <= negate_until
+            weight = boost if i <= boost_until else 1.0
+            hit_categories = []
+            for category in node[1]:
+                category = flip[category] if negated else category
+                counts[category] += weight
+                hit_categories.append(category)
+            mentions = node[4]
+
+            # Walk the trie forward for multi-word phrases
+            j = i + 1
+            children = node[0]
+            while children and j < n_tokens:
+                node = children.get(tokens[j])
+                if node is None:
+                    break
+                for phrase_id, category in node[2]:
+                    if seen_phrases is None:
+                        seen_phrases = set()
+                    if phrase_id not in seen_phrases:
+                        seen_phrases.add(phrase_id)
+                        category = flip[category] if negated else category
+                        counts[category] += weight
+                        hit_categories.append(category)
+                if node[4]:
+                    mentions = mentions + node[4]
+                children = node[0]
+                j += 1
+
+            if hit_categories:
+                negate_until = -1
+                boost_until = -1
+
+            for category in hit_categories:
+                if polarity[category]:
+                    distance = i - last_aspect_at
+                    if distance <= window:
+                        polar_hits.append([i, polarity[category] * weight, last_aspect, distance])
+                    else:
+                        polar_hits.append([i, polarity[category] * weight, None, window + 1])
+            for aspect_id in mentions:
+                if aspect_scores[aspect_id] is None:
+                    aspect_scores[aspect_id] = 0.0
+                # A hit normally describes the aspect before it ("seats
+                # were uncomfortable"); it moves forward to this one
+                # only if it had none or directly precedes it ("rude crew")
+                for polar_hit in reversed(polar_hits):
+                    distance = i - polar_hit[0]
+                    if distance > window:
+                        break
+                    if distance and (polar_hit[2] is None or distance == 1):
+                        polar_hit[2] = aspect_id
+                        polar_hit[3] = distance
+                last_aspect = aspect_id
+                last_aspect_at = i
+
+        for _, signed_weight, aspect_id, _ in polar_hits:
+            if aspect_id is not None:
+                aspect_scores[aspect_id] += signed_weight
+        return counts, aspect_scores
+
+    def count(self, text):
+        """
+        Count keyword hits per category in raw text
+
+        Args:
+            text (str): Raw review text
+
+        Returns:
+            list: Hit count per category
+        """
+        return self.count_tokens(self.tokenize(text))
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import re
+import threading
+
+from utils.utils import LEXICONS_PATH
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the lexicon file itself changes
+LEXICON_FORMAT_VERSION = 1
+
+LEXICON_CATEGORIES = ("positive", "negative", "neutral", "emergency")
+
+# Aspect names become reviews table column names (see aspect_column), which
+# are written into SQL unquoted
+ASPECT_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def load_lexicons(path=LEXICONS_PATH):
+    """
+    Read and validate a sentiment lexicon file
+
+    Args:
+        path (str): JSON lexicon file
+
+    Returns:
+        dict: Lexicon data with "version", "lexicons", "negators",
+            "intensifiers", "negation_flip", "fake_indicators" and "aspects"
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    if data.get("format_version") != LEXICON_FORMAT_VERSION:
+        raise ValueError(f"Unsupported lexicon format version: {data.get('format_version')}")
+    if not isinstance(data.get("version"), int):
+        raise ValueError("Lexicon file must have an integer version")
+
+    missing = [category for category in LEXICON_CATEGORIES if category not in data.get("lexicons", {})]
+    if missing:
+        raise ValueError(f"Lexicon file is missing categories: {', '.join(missing)}")
+    for category in LEXICON_CATEGORIES:
+        if not all(isinstance(keyword, str) for keyword in data["lexicons"][category]):
+            raise ValueError(f"Lexicon '{category}' must be a list of strings")
+
+    data.setdefault("negators", [])
+    data.setdefault("intensifiers", {})
+    data.setdefault("negation_flip", {})
+    data.setdefault("fake_indicators", [])
+    data.setdefault("aspects", {})
+
+    invalid = [name for name in data["aspects"] if not isinstance(name, str) or not ASPECT_NAME_RE.match(name)]
+    if invalid:
+        raise ValueError(f"Invalid aspect names (use lowercase letters, digits and underscores): {', '.join(invalid)}")
+    return data
+
+
+def _file_signature(path):
+    """Return what identifies a version of the file on disk, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LexiconReloader(threading.Thread):
+    """
+    Background thread that reloads an analyzer's lexicons when the file changes.
+
+    The new matcher is compiled on this thread and swapped into the analyzer
+    with a single assignment, so scoring calls keep using the old matcher
+    until the new one is complete. A file that fails to load is logged and
+    the current lexicons stay in place.
+    """
+
+    def __init__(self, analyzer, path=LEXICONS_PATH, interval=2.0):
+        """
+        Args:
+            analyzer (SentimentAnalyzer): Analyzer whose lexicons are reloaded
+            path (str): Lexicon file to watch
+            interval (float): Seconds between checks of the file
+        """
+        super().__init__(name="lexicon-reloader", daemon=True)
+        self.analyzer = analyzer
+        self.path = path
+        self.interval = interval
+        self._signature = _file_signature(path)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Reload the lexicons if the file changed since the last check
+
+        Returns:
+            bool: Whether new lexicons were swapped in
+        """
+        signature = _file_signature(self.path)
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            data = load_lexicons(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Keeping lexicon version {self.analyzer.lexicon_version}: {str(e)}")
+            return False
+
+        if data["version"] == self.analyzer.lexicon_version:
+            logger.warning(f"{self.path} changed but is still version {data['version']}; bump the version to reload it")
+            return False
+        self.analyzer.apply_lexicons(data)
+        logger.info(f"Loaded lexicon version {data['version']} from {self.path}")
+        return True
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Queue marker that stops the worker thread
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item calls into batched calls.
+
+    Callers submit one item at a time from any thread. A worker thread takes
+    the first waiting item, keeps collecting until it has `max_batch_size`
+    items or `max_wait` seconds have passed, and calls `batch_fn` once for
+    the whole batch. Each caller gets its own result back through a Future.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait=0.005):
+        """
+        Start the worker thread
+
+        Args:
+            batch_fn (callable): Takes a list of items, returns one result per item
+            max_batch_size (int): Largest batch passed to batch_fn
+            max_wait (float): Seconds the first item of a batch may wait for more
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # Counters for the mean batch size actually achieved
+        self.n_batches = 0
+        self.n_items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Queue one item
+
+        Args:
+            item: Input for batch_fn
+
+        Returns:
+            Future: Resolves to the item's result
+        """
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        """Score one item, blocking until its batch has run."""
+        return self.submit(item).result()
+
+    def _collect(self, first):
+        """Gather a batch starting with first; returns (batch, stop requested)."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Items already queued join the batch even after the deadline
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+
+            items = [item for item, _ in batch]
+            self.n_batches += 1
+            self.n_items += len(items)
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self):
+        """Run what is already queued, then stop the worker thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
@@ -0,0 +1,272 @@
+import argparse
+import hashlib
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from utils.hashing import HASH_PRIME
+from utils.keyword_matcher import tokenize
+from utils.review_repository import get_repository
+from utils.utils import REVIEWS_CSV_PATH, REVIEWS_DB_PATH
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures with LSH banding over word shingles, stored in SQLite.
+
+    Each review is reduced to a MinHash signature and every band of the
+    signature is written to an indexed bucket table, so a new review is
+    compared only against reviews sharing at least one bucket instead of
+    the whole corpus. Reviews are added one at a time as they are inserted.
+    The tables are created with the review schema and read through the
+    shared connection pool.
+    """
+
+    def __init__(self, db_path=REVIEWS_DB_PATH, num_perm=64, bands=16, shingle_size=3,
+                 threshold=0.8, seed=1):
+        """
+        Set up the hash permutations over the index tables of a database
+
+        Args:
+            db_path (str): Reviews database holding the index
+            num_perm (int): MinHash signature length
+            bands (int): Number of LSH bands; must divide num_perm
+            shingle_size (int): Words per shingle
+            threshold (float): Estimated Jaccard similarity for a near-duplicate
+            seed (int): Seed of the hash permutations
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(HASH_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(HASH_PRIME), size=num_perm, dtype=np.uint64)
+
+        self.repository = get_repository(db_path)
+
+    def shingles(self, text):
+        """
+        Hash the word shingles of a text
+
+        Args:
+            text (str): Review text
+
+        Returns:
+            np.ndarray: Unique 32-bit shingle hashes
+        """
+        words = tokenize(text)
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+
+        k = min(self.shingle_size, len(words))
+        hashes = {
+            zlib.crc32(" ".join(words[i:i + k]).encode("utf-8"))
+            for i in range(len(words) - k + 1)
+        }
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a text
+
+        Args:
+            text (str): Review text
+
+        Returns:
+            np.ndarray: uint32 signature, or None for texts without words
+        """
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % HASH_PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _band_buckets(self, signature):
+        """Hash each band of a signature to a signed 64-bit bucket id."""
+        buckets = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(chunk, digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+        return buckets
+
+    def add(self, doc_key, text):
+        """
+        Add one review to the index
+
+        Args:
+            doc_key (str): Unique review key, e.g. "db:42" or "csv:17"
+            text (str): Review text
+
+        Returns:
+            bool: Whether the review was indexed
+        """
+        return self.add_many([(doc_key, text)]) == 1
+
+    def add_many(self, items):
+        """
+        Add reviews to the index in a single transaction
+
+        Args:
+            items (iterable): (doc_key, text) pairs
+
+        Returns:
+            int: Number of reviews indexed
+        """
+        signature_rows = []
+        bucket_rows = []
+        for doc_key, text in items:
+            signature = self.signature(text)
+            if signature is None:
+                continue
+            signature_rows.append((doc_key, signature.tobytes()))
+            bucket_rows.extend((band, bucket, doc_key) for band, bucket in self._band_buckets(signature))
+
+        with self.repository.connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO minhash_signatures (doc_key, signature) VALUES (?, ?)",
+                signature_rows
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO minhash_buckets (band, bucket, doc_key) VALUES (?, ?, ?)",
+                bucket_rows
+            )
+        return len(signature_rows)
+
+    def find_near_duplicates(self, text, max_candidates=64):
+        """
+        Find indexed reviews whose estimated Jaccard similarity reaches the threshold
+
+        Args:
+            text (str): Review text
+            max_candidates (int): Cap on candidates read per band bucket
+
+        Returns:
+            list: (doc_key, similarity) pairs, most similar first
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+
+        with self.repository.connection() as conn:
+            candidates = set()
+            for band, bucket in self._band_buckets(signature):
+                rows = conn.execute(
+                    "SELECT doc_key FROM minhash_buckets WHERE band = ? AND bucket = ? LIMIT ?",
+                    (band, bucket, max_candidates)
+                ).fetchall()
+                candidates.update(row[0] for row in rows)
+
+            if not candidates:
+                return []
+
+            keys = list(candidates)
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                f"SELECT doc_key, signature FROM minhash_signatures WHERE doc_key IN ({placeholders})",
+                keys
+            ).fetchall()
+
+        matches = []
+        for doc_key, blob in rows:
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+            if similarity >= self.threshold:
+                matches.append((doc_key, similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def is_templated(self, text, min_cluster_size=3, exclude_key=None):
+        """
+        Check whether a review belongs to a cluster of near-copies
+
+        Args:
+            text (str): Review text
+            min_cluster_size (int): Near-duplicates needed to call it templated
+            exclude_key (str): Key of the review itself when it is already indexed
+
+        Returns:
+            bool: True if enough near-duplicates are already indexed
+        """
+        matches = [doc_key for doc_key, _ in self.find_near_duplicates(text) if doc_key != exclude_key]
+        return len(matches) >= min_cluster_size
+
+    def size(self):
+        """Return the number of indexed reviews."""
+        with self.repository.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM minhash_signatures").fetchone()[0]
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_duplicate_index(db_path=REVIEWS_DB_PATH):
+    """
+    Return the process-wide NearDuplicateIndex, opening it on first use
+    """
+    global _shared_index
+    if _shared_index is None:
+        with _shared_index_lock:
+            if _shared_index is None:
+                _shared_index = NearDuplicateIndex(db_path)
+    return _shared_index
+
+
+def build_index(index, csv_path=REVIEWS_CSV_PATH, db_path=REVIEWS_DB_PATH, chunk_size=5000):
+    """
+    Index every review in the CSV and in the reviews table
+
+    Args:
+        index (NearDuplicateIndex): Index to fill
+        csv_path (str): Review CSV, rows keyed "csv:<row number>"
+        db_path (str): Database with the reviews table, rows keyed "db:<id>"
+        chunk_size (int): Reviews per transaction
+
+    Returns:
+        int: Number of reviews indexed
+    """
+    n_indexed = 0
+    row_offset = 0
+    for chunk in pd.read_csv(csv_path, usecols=["Review Text"], chunksize=chunk_size):
+        keys = (f"csv:{row_offset + i}" for i in range(len(chunk)))
+        n_indexed += index.add_many(zip(keys, chunk["Review Text"].tolist()))
+        row_offset += len(chunk)
+
+    with get_repository(db_path).connection() as conn:
+        cursor = conn.execute("SELECT id, review_comment FROM reviews")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            n_indexed += index.add_many((f"db:{row_id}", text) for row_id, text in rows)
+
+    return n_indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the near-duplicate review index")
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV to index")
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Database holding the reviews table and the index")
+    args = parser.parse_args()
+
+    index = NearDuplicateIndex(args.db)
+    with index.repository.connection() as conn, conn:
+        conn.execute("DELETE FROM minhash_signatures")
+        conn.execute("DELETE FROM minhash_buckets")
+
+    start = time.perf_counter()
+    n_indexed = build_index(index, args.csv, args.db)
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {n_indexed} reviews in {elapsed:.2f} s ({n_indexed / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from utils.utils import REVIEWS_CSV_PATH, REVIEWS_DB_PATH
+
+# Days after which a review counts half as much as a new one
+REPUTATION_HALF_LIFE_DAYS = float(os.getenv("REPUTATION_HALF_LIFE_DAYS", "30"))
+
+_SECONDS_PER_DAY = 86400.0
+
+# Sentiment label -> column of the decayed weight it adds to
+_SENTIMENT_COLUMNS = {
+    "Positive": "positive", "Negative": "negative", "Neutral": "neutral", "Emergency": "emergency"
+}
+
+AirlineReputation = namedtuple(
+    "AirlineReputation",
+    ["airline", "positive_rate", "negative_rate", "neutral_rate", "emergency_rate", "weight", "score"]
+)
+
+
+def ensure_reputation_table(conn):
+    """
+    Create the per-airline decayed sentiment table
+
+    Each row holds the exponentially decayed number of positive, negative,
+    neutral and emergency reviews as of updated_at (unix seconds).
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS airline_reputation (
+                airline TEXT PRIMARY KEY,
+                positive REAL NOT NULL DEFAULT 0,
+                negative REAL NOT NULL DEFAULT 0,
+                emergency REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                neutral REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Tables created before neutral reviews were counted
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(airline_reputation)")}
+        if "neutral" not in columns:
+            conn.execute("ALTER TABLE airline_reputation ADD COLUMN neutral REAL NOT NULL DEFAULT 0")
+
+
+def _decay(elapsed_seconds, half_life_days):
+    """Weight left after elapsed_seconds for the given half-life."""
+    return 0.5 ** (elapsed_seconds / (half_life_days * _SECONDS_PER_DAY))
+
+
+def record_sentiment(conn, airline, sentiment, timestamp=None, half_life_days=REPUTATION_HALF_LIFE_DAYS):
+    """
+    Add one review to its airline's decayed sentiment counts
+
+    Reads and writes a single row, whatever the number of past reviews.
+    Does not commit, so the update can share the review's transaction.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Airline the review is about
+        sentiment (str): Positive, Negative, Neutral or Emergency
+        timestamp (float): Review time in unix seconds; defaults to now
+        half_life_days (float): Decay half-life
+
+    Returns:
+        bool: Whether the sentiment was counted
+    """
+    column = _SENTIMENT_COLUMNS.get(sentiment)
+    if column is None:
+        return False
+    timestamp = time.time() if timestamp is None else timestamp
+
+    row = conn.execute(
+        "SELECT positive, negative, neutral, emergency, updated_at FROM airline_reputation WHERE airline = ?",
+        (airline,)
+    ).fetchone()
+    counts = dict(positive=0.0, negative=0.0, neutral=0.0, emergency=0.0)
+    updated_at = timestamp
+    if row is not None:
+        counts.update(positive=row[0], negative=row[1], neutral=row[2], emergency=row[3])
+        updated_at = row[4]
+
+    if timestamp >= updated_at:
+        # Age the stored counts to the new review, which then weighs 1
+        factor = _decay(timestamp - updated_at, half_life_days)
+        counts = {name: value * factor for name, value in counts.items()}
+        counts[column] += 1.0
+        updated_at = timestamp
+    else:
+        # A review older than the row is added already aged
+        counts[column] += _decay(updated_at - timestamp, half_life_days)
+
+    conn.execute(
+        "INSERT OR REPLACE INTO airline_reputation (airline, positive, negative, neutral, emergency, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (airline, counts["positive"], counts["negative"], counts["neutral"], counts["emergency"], updated_at)
+    )
+    return True
+
+
+def reputation_score(positive, negative, emergency):
+    """
+    0-100 score from decayed sentiment counts; emergencies weigh double
+
+    Args:
+        positive (float): Decayed positive count
+        negative (float): Decayed negative count
+        emergency (float): Decayed emergency count
+
+    Returns:
+        float: Reputation score, or None without any reviews
+    """
+    denominator = positive + negative + 2.0 * emergency
+    if denominator <= 0:
+        return None
+    return 100.0 * positive / denominator
+
+
+def airline_reputations(conn, airline=None, now=None, half_life_days=REPUTATION_HALF_LIFE_DAYS):
+    """
+    Read decayed sentiment rates and reputation scores
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        airline (str): Only this airline, if given
+        now (float): Time the counts are aged to, in unix seconds; defaults to now
+        half_life_days (float): Decay half-life
+
+    Returns:
+        list: AirlineReputation tuples, best score first; weight is the
+            decayed number of reviews behind the rates
+    """
+    if airline is None:
+        rows = conn.execute(
+            "SELECT airline, positive, negative, neutral, emergency, updated_at FROM airline_reputation"
+        )
+    else:
+        rows = conn.execute(
+            "SELECT airline, positive, negative, neutral, emergency, updated_at FROM airline_reputation "
+            "WHERE airline = ?",
+            (airline,)
+        )
+    now = time.time() if now is None else now
+
+    reputations = []
+    for name, positive, negative, neutral, emergency, updated_at in rows:
+        total = positive + negative + neutral + emergency
+        if total <= 0:
+            continue
+        # Rates do not change with age, only the weight behind them does
+        weight = total * _decay(max(now - updated_at, 0.0), half_life_days)
+        reputations.append(AirlineReputation(
+            name, positive / total, negative / total, neutral / total, emergency / total, weight,
+            reputation_score(positive, negative, emergency)
+        ))
+    reputations.sort(key=lambda reputation: reputation.score, reverse=True)
+    return reputations
+
+
+def rebuild_reputations(conn, csv_path=REVIEWS_CSV_PATH, half_life_days=REPUTATION_HALF_LIFE_DAYS,
+                        chunk_size=20000):
+    """
+    Recompute every airline's decayed counts from the CSV and the reviews table
+
+    CSV reviews are dated by their date of travel; reviews in the table by
+    their date of travel too, as older databases carry no submission time.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        csv_path (str): Review CSV
+        half_life_days (float): Decay half-life
+        chunk_size (int): CSV rows read per chunk
+
+    Returns:
+        int: Number of reviews counted
+    """
+    ensure_reputation_table(conn)
+    frames = [
+        chunk.rename(columns={"Airline Name": "airline", "Sentiment": "sentiment", "Date of Travel": "date"})
+        for chunk in pd.read_csv(
+            csv_path, usecols=["Airline Name", "Sentiment", "Date of Travel"], chunksize=chunk_size
+        )
+    ]
+    frames.append(pd.read_sql_query(
+        "SELECT airline, sentiment, date_of_travel AS date FROM reviews", conn
+    ))
+    reviews = pd.concat(frames, ignore_index=True)
+    dates = pd.to_datetime(reviews["date"], errors="coerce", format="mixed")
+    reviews = reviews[reviews["sentiment"].isin(_SENTIMENT_COLUMNS) & dates.notna()].copy()
+    # Whole seconds whatever resolution pandas parsed the dates at
+    reviews["timestamp"] = (dates[reviews.index] - pd.Timestamp(0)) // pd.Timedelta("1s")
+
+    # Closed form of the per-review updates: every review is aged to the
+    # airline's newest one
+    newest = reviews.groupby("airline")["timestamp"].transform("max")
+    reviews["weight"] = _decay(newest - reviews["timestamp"], half_life_days)
+    counts = reviews.pivot_table(
+        index="airline", columns="sentiment", values="weight", aggfunc="sum", fill_value=0.0
+    ).reindex(columns=list(_SENTIMENT_COLUMNS), fill_value=0.0)
+    updated_at = reviews.groupby("airline")["timestamp"].max()
+
+    with conn:
+        conn.execute("DELETE FROM airline_reputation")
+        conn.executemany(
+            "INSERT INTO airline_reputation (airline, positive, negative, neutral, emergency, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(airline, float(row["Positive"]), float(row["Negative"]), float(row["Neutral"]),
+              float(row["Emergency"]), float(updated_at[airline])) for airline, row in counts.iterrows()]
+        )
+    return len(reviews)
+
+
+def main():
+    # Imported here as review_repository imports this module for its schema
+    from utils.review_repository import get_repository
+
+    parser = argparse.ArgumentParser(description="Time-decayed airline reputation scores")
+    parser.add_argument("task", choices=["rebuild", "show"])
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV")
+    args = parser.parse_args()
+
+    with get_repository(args.db).connection() as conn:
+        if args.task == "rebuild":
+            start = time.perf_counter()
+            n_reviews = rebuild_reputations(conn, args.csv)
+            print(f"Counted {n_reviews} reviews in {time.perf_counter() - start:.2f} s")
+
+        for reputation in airline_reputations(conn):
+            print(f"{reputation.airline:<15} score {reputation.score:5.1f}  "
+                  f"positive {reputation.positive_rate:6.1%}  negative {reputation.negative_rate:6.1%}  "
+                  f"neutral {reputation.neutral_rate:6.1%}  "
+                  f"emergency {reputation.emergency_rate:6.1%}  weight {reputation.weight:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pages.models import SentimentAnalyzer
+from utils.near_duplicates import NearDuplicateIndex
+from utils.review_repository import aspect_column, ensure_aspect_columns, get_repository
+from utils.utils import REVIEWS_CSV_PATH, REVIEWS_DB_PATH
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# One analyzer per worker process, built by the pool initializer
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer()
+
+
+def _score_chunk(texts):
+    """
+    Score one chunk of review texts inside a worker process
+
+    Args:
+        texts (list): Review texts
+
+    Returns:
+        tuple: (sentiment labels array, sentiment score array, fake flag
+            array, dict of aspect name -> score array with NaN where the
+            aspect is not mentioned)
+    """
+    analyzer = _worker_analyzer or SentimentAnalyzer()
+    result = analyzer.analyze_many(texts, aspects=True)
+    labels = np.asarray(analyzer.labels, dtype=object)[result["label_code"]]
+    aspects = {name: result[f"aspect_{name}"] for name in analyzer.aspect_names}
+    return labels, sentiment_score(result), result["is_fake"], aspects
+
+
+def sentiment_score(result):
+    """
+    Positivity of each text between 0 and 1 from its keyword scores
+
+    0.5 plus half the share of positive weight minus negative and
+    emergency weight, so texts with no sentiment keywords score 0.5.
+
+    Args:
+        result (dict): Columns returned by SentimentAnalyzer.analyze_many()
+
+    Returns:
+        np.ndarray: Scores rounded to two decimals, as in the review CSV
+    """
+    positive = result["positive_score"]
+    negative = result["negative_score"] + result["emergency_score"]
+    total = positive + negative + result["neutral_score"]
+    polarity = np.divide(positive - negative, total, out=np.zeros_like(total), where=total > 0)
+    return np.round(0.5 + 0.5 * polarity, 2)
+
+
+def _score_chunks(text_chunks, workers):
+    """
+    Score chunks across a process pool, yielding results in input order
+
+    Args:
+        text_chunks (iterable): Lists of review texts
+        workers (int): Number of worker processes; 1 scores in-process
+
+    Yields:
+        tuple: (sentiment labels, sentiment scores, fake flags, aspect scores) per chunk
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker()
+        for texts in text_chunks:
+            yield _score_chunk(texts)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # Keep a bounded number of chunks in flight and hand results back
+        # in submission order
+        pending = deque()
+        for texts in text_chunks:
+            pending.append(pool.submit(_score_chunk, texts))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def aspect_csv_column(aspect_name):
+    """Column of the review CSV holding one aspect's score, e.g. "Aspect Seat Comfort"."""
+    return "Aspect " + aspect_name.replace("_", " ").title()
+
+
+def rescore_csv(csv_path=REVIEWS_CSV_PATH, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """
+    Rescore every row of the review CSV and rewrite its Sentiment,
+    Sentiment Score and Fake Review columns, plus one "Aspect <Name>"
+    column per aspect
+
+    The CSV is read and written in chunks; the rewritten file replaces the
+    original only once every chunk has been written.
+
+    Args:
+        csv_path (str): Path to the review CSV
+        chunk_size (int): Rows per chunk
+        workers (int): Worker processes (defaults to the CPU count)
+
+    Returns:
+        int: Number of rows rescored
+    """
+    tmp_path = csv_path + ".rescoring"
+    chunks = deque()
+
+    def text_chunks():
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            chunks.append(chunk)
+            yield chunk["Review Text"].tolist()
+
+    n_rows = 0
+    header = True
+    try:
+        for labels, scores, is_fake, aspects in _score_chunks(text_chunks(), workers):
+            chunk = chunks.popleft()
+            chunk["Sentiment"] = labels
+            chunk["Sentiment Score"] = scores
+            chunk["Fake Review"] = is_fake.astype(np.int64)
+            for name, scores in aspects.items():
+                chunk[aspect_csv_column(name)] = scores
+            chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+            header = False
+            n_rows += len(chunk)
+        os.replace(tmp_path, csv_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return n_rows
+
+
+def rescore_db(db_path=REVIEWS_DB_PATH, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """
+    Rescore every row of the reviews table and update its sentiment,
+    fake_review and aspect columns
+
+    A review is stored as Fake when the keyword rules flag it, or when it
+    was flagged before and still belongs to a cluster of near-copies in
+    the MinHash index, the other check made when reviews are submitted.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        chunk_size (int): Rows per chunk
+        workers (int): Worker processes (defaults to the CPU count)
+
+    Returns:
+        int: Number of rows rescored
+    """
+    aspect_names = SentimentAnalyzer().aspect_names
+    assignments = ", ".join(f"{aspect_column(name)} = ?" for name in aspect_names)
+    duplicate_index = NearDuplicateIndex(db_path)
+    row_chunks = deque()
+
+    def text_chunks():
+        # Page by primary key so no read cursor stays open across the writes
+        last_id = -1
+        while True:
+            rows = conn.execute(
+                "SELECT id, review_comment, fake_review FROM reviews WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            row_chunks.append(rows)
+            yield [row[1] for row in rows]
+
+    n_rows = 0
+    with get_repository(db_path).connection() as conn:
+        ensure_aspect_columns(conn, aspect_names)
+        for labels, _, is_fake, aspects in _score_chunks(text_chunks(), workers):
+            rows = row_chunks.popleft()
+            ids = [row[0] for row in rows]
+            # Keep near-duplicate verdicts; only rows flagged before need the index lookup
+            is_fake = [
+                fake or (stored == "Fake" and duplicate_index.is_templated(text, exclude_key=f"db:{row_id}"))
+                for fake, (row_id, text, stored) in zip(is_fake.tolist(), rows)
+            ]
+            fake_values = np.where(is_fake, "Fake", "Genuine")
+            # NaN (aspect not mentioned) is stored as NULL
+            aspect_values = [
+                [None if np.isnan(score) else score for score in aspects[name].tolist()]
+                for name in aspect_names
+            ]
+            with conn:
+                conn.executemany(
+                    f"UPDATE reviews SET sentiment = ?, fake_review = ?, {assignments} WHERE id = ?",
+                    zip(labels.tolist(), fake_values.tolist(), *aspect_values, ids)
+                )
+            n_rows += len(ids)
+
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore stored reviews with the current lexicons")
+    parser.add_argument("store", choices=["csv", "db"], help="Which review store to rescore")
+    parser.add_argument("--path", help="Path to the CSV file or SQLite database")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.store == "csv":
+        n_rows = rescore_csv(args.path or REVIEWS_CSV_PATH, args.chunk_size, args.workers)
+    else:
+        n_rows = rescore_db(args.path or REVIEWS_DB_PATH, args.chunk_size, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"Rescored {n_rows} rows in {elapsed:.2f} s ({n_rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
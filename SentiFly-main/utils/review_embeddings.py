@@ -0,0 +1,293 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.artifacts import load_artifact, save_artifact
+from utils.hashing import ngram_hashes
+from utils.keyword_matcher import tokenize
+from utils.utils import REVIEW_EMBEDDINGS_PATH, REVIEWS_CSV_PATH
+
+ARTIFACT_KIND = "review_embeddings"
+
+# Similarity gap below which search(distinct=True) treats two reviews as copies
+_DISTINCT_TOLERANCE = 1e-5
+
+
+class ReviewEmbedder:
+    """
+    Fixed-width review vectors from signed feature hashing of word n-grams.
+
+    Every unigram and bigram is hashed to one of `dim` columns with a +1/-1
+    sign and the row is L2-normalized, so the dot product of two vectors
+    approximates the cosine similarity of their n-gram counts. No training
+    and no vocabulary are needed, so any text can be embedded the same way.
+    """
+
+    def __init__(self, dim=256, ngram_order=2):
+        self.dim = dim
+        self.ngram_order = ngram_order
+        self._token_hashes = {}
+
+    def embed(self, texts):
+        """
+        Embed texts into L2-normalized float32 vectors
+
+        Args:
+            texts (list): Review texts
+
+        Returns:
+            np.ndarray: (n_texts, dim) float32 array; texts without words give zero rows
+        """
+        token_lists = [tokenize(text) for text in texts]
+        rows, hashes = ngram_hashes(token_lists, self.ngram_order, self._token_hashes)
+
+        columns = (hashes % np.uint64(self.dim)).astype(np.int64)
+        signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+        vectors = np.bincount(
+            rows * self.dim + columns, weights=signs, minlength=len(token_lists) * self.dim
+        ).reshape(len(token_lists), self.dim)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors.astype(np.float32)
+
+
+def _spherical_kmeans(vectors, n_lists, iterations=10, seed=0):
+    """
+    Cluster unit vectors by cosine similarity
+
+    Args:
+        vectors (np.ndarray): (n, dim) float32 training sample
+        n_lists (int): Number of clusters
+        iterations (int): Refinement rounds
+        seed (int): Seed for the initial centroids
+
+    Returns:
+        np.ndarray: (n_lists, dim) float32 unit centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = (vectors @ centroids.T).argmax(axis=1)
+        counts = np.bincount(assignment, minlength=n_lists)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.zeros_like(centroids)
+        filled = np.flatnonzero(counts)
+        sums[filled] = np.add.reduceat(vectors[order], starts[filled], axis=0)
+
+        # Empty clusters are re-seeded with random sample points
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), size=len(empty))]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+
+def build_embedding_index(csv_path=REVIEWS_CSV_PATH, out_path=REVIEW_EMBEDDINGS_PATH, dim=256,
+                          n_lists=None, chunk_size=50000, sample_size=100000, version=1):
+    """
+    Embed every review of the CSV and write a memory-mappable IVF index
+
+    Vectors are written chunk by chunk to a memory-mapped scratch file and
+    then stored grouped by inverted list, so a query reads a few contiguous
+    slices. Review ids are CSV row numbers.
+
+    Args:
+        csv_path (str): Review CSV
+        out_path (str): Index directory to create or replace
+        dim (int): Embedding width
+        n_lists (int): Inverted lists; defaults to about 4 * sqrt(n_reviews)
+        chunk_size (int): Reviews embedded per chunk
+        sample_size (int): Vectors used to train the list centroids
+        version (int): Index version recorded in the manifest
+
+    Returns:
+        int: Number of reviews indexed
+    """
+    embedder = ReviewEmbedder(dim)
+    n_rows = sum(len(chunk) for chunk in pd.read_csv(csv_path, usecols=["Review Text"], chunksize=chunk_size))
+    if not n_rows:
+        raise ValueError("CSV file contains no reviews")
+
+    scratch_dir = tempfile.mkdtemp(prefix=".embeddings-", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        raw = np.lib.format.open_memmap(
+            os.path.join(scratch_dir, "raw.npy"), mode="w+", dtype=np.float32, shape=(n_rows, dim)
+        )
+        row = 0
+        for chunk in pd.read_csv(csv_path, usecols=["Review Text"], chunksize=chunk_size):
+            raw[row:row + len(chunk)] = embedder.embed(chunk["Review Text"].tolist())
+            row += len(chunk)
+
+        n_lists = n_lists or max(1, min(int(4 * np.sqrt(n_rows)), n_rows))
+        rng = np.random.default_rng(0)
+        sample = raw[np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))]
+        centroids = _spherical_kmeans(sample, min(n_lists, len(sample)))
+
+        assignment = np.empty(n_rows, dtype=np.int32)
+        for start in range(0, n_rows, chunk_size):
+            assignment[start:start + chunk_size] = (raw[start:start + chunk_size] @ centroids.T).argmax(axis=1)
+
+        # Drop lists nothing was assigned to, so probes only visit real lists
+        counts = np.bincount(assignment, minlength=len(centroids))
+        used = np.flatnonzero(counts)
+        centroids = centroids[used]
+        remap = np.zeros(len(counts), dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        assignment = remap[assignment]
+
+        # Store vectors grouped by list: list i holds rows offsets[i]:offsets[i + 1]
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts[used])
+
+        vectors = np.lib.format.open_memmap(
+            os.path.join(scratch_dir, "vectors.npy"), mode="w+", dtype=np.float32, shape=(n_rows, dim)
+        )
+        for start in range(0, n_rows, chunk_size):
+            vectors[start:start + chunk_size] = raw[order[start:start + chunk_size]]
+
+        save_artifact(
+            out_path, ARTIFACT_KIND,
+            {
+                "vectors": vectors,
+                "review_ids": order.astype(np.int64),
+                "centroids": centroids,
+                "list_offsets": offsets
+            },
+            {"dim": dim, "ngram_order": embedder.ngram_order, "source": os.path.basename(csv_path)},
+            version
+        )
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return n_rows
+
+
+class ReviewEmbeddingIndex:
+    """
+    Similar-review search over an index written by build_embedding_index.
+
+    Arrays are memory-mapped read-only, so opening the index is instant and
+    only the inverted lists a query probes are read from disk.
+    """
+
+    def __init__(self, path=REVIEW_EMBEDDINGS_PATH, mmap=True):
+        artifact = load_artifact(path, kind=ARTIFACT_KIND, mmap=mmap)
+        self.artifact = artifact
+        self.vectors = artifact["vectors"]
+        self.review_ids = artifact["review_ids"]
+        self.centroids = artifact["centroids"]
+        self.list_offsets = artifact["list_offsets"]
+        self.embedder = ReviewEmbedder(artifact.params["dim"], artifact.params["ngram_order"])
+        # Position of each review id inside the list-ordered arrays
+        self._id_order = np.argsort(self.review_ids)
+        self._sorted_ids = self.review_ids[self._id_order]
+
+    def __len__(self):
+        return len(self.review_ids)
+
+    def vector(self, review_id):
+        """
+        Return the stored vector of a review
+
+        Args:
+            review_id (int): Review id (CSV row number)
+
+        Returns:
+            np.ndarray: float32 vector, or None if the id is not indexed
+        """
+        idx = np.searchsorted(self._sorted_ids, review_id)
+        if idx == len(self._sorted_ids) or self._sorted_ids[idx] != review_id:
+            return None
+        return np.asarray(self.vectors[self._id_order[idx]])
+
+    def search(self, query, k=5, nprobe=16, exclude=(), distinct=False):
+        """
+        Find the reviews most similar to a query
+
+        Args:
+            query: Review text, or a vector from ReviewEmbedder.embed
+            k (int): Number of results
+            nprobe (int): Inverted lists scanned; more is slower and more exact
+            exclude (iterable): Review ids left out of the results
+            distinct (bool): Return one review per similarity value, which
+                collapses reposted copies of the same text
+
+        Returns:
+            list: (review_id, cosine similarity) pairs, most similar first
+        """
+        if isinstance(query, str):
+            query = self.embedder.embed([query])[0]
+        if not np.any(query):
+            return []
+
+        lists = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        ids, scores = [], []
+        for list_id in lists:
+            start, end = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            if start == end:
+                continue
+            ids.append(self.review_ids[start:end])
+            scores.append(self.vectors[start:end] @ query)
+        if not ids:
+            return []
+
+        ids = np.concatenate(ids)
+        scores = np.concatenate(scores)
+        exclude = np.fromiter(exclude, dtype=np.int64)
+        if len(exclude):
+            keep = ~np.isin(ids, exclude)
+            ids, scores = ids[keep], scores[keep]
+        if distinct:
+            # Identical vectors score the same up to float32 rounding
+            first = np.lexsort((ids, scores))
+            keep = np.ones(len(first), dtype=bool)
+            keep[1:] = np.diff(scores[first]) > _DISTINCT_TOLERANCE
+            ids, scores = ids[first[keep]], scores[first[keep]]
+
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[idx]), float(scores[idx])) for idx in top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the review embedding index")
+    subparsers = parser.add_subparsers(dest="task", required=True)
+
+    build = subparsers.add_parser("build", help="Embed every review in the CSV")
+    build.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV to embed")
+    build.add_argument("--out", default=REVIEW_EMBEDDINGS_PATH, help="Index directory")
+    build.add_argument("--dim", type=int, default=256, help="Embedding width")
+    build.add_argument("--lists", type=int, default=None, help="Number of inverted lists")
+
+    search = subparsers.add_parser("search", help="Find reviews similar to a text")
+    search.add_argument("text", help="Query text")
+    search.add_argument("--index", default=REVIEW_EMBEDDINGS_PATH, help="Index directory")
+    search.add_argument("-k", type=int, default=5, help="Number of results")
+    search.add_argument("--nprobe", type=int, default=16, help="Inverted lists scanned")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.task == "build":
+        n_rows = build_embedding_index(args.csv, args.out, args.dim, args.lists)
+        elapsed = time.perf_counter() - start
+        print(f"Embedded {n_rows} reviews in {elapsed:.2f} s ({n_rows / elapsed:,.0f} rows/s)")
+    else:
+        index = ReviewEmbeddingIndex(args.index)
+        results = index.search(args.text, args.k, args.nprobe)
+        elapsed = time.perf_counter() - start
+        for review_id, similarity in results:
+            print(f"{review_id:>10}  {similarity:.3f}")
+        print(f"{len(results)} results from {len(index)} reviews in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+import argparse
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.complaint_terms import ensure_complaint_tables
+from utils.emergency_alerts import ensure_alert_table
+from utils.reputation import ensure_reputation_table
+from utils.review_rollups import create_rollup_tables
+from utils.review_search import create_search_index
+from utils.utils import LEGACY_REVIEWS_DB_PATH, REVIEWS_DB_PATH, normalize_review_text, review_text_hash
+
+# Connections kept open per database and process; Streamlit serves every
+# session from its own thread, so this caps concurrent database work
+POOL_SIZE = int(os.getenv("REVIEW_DB_POOL_SIZE", "8"))
+
+# Prepared statements sqlite3 keeps per connection, keyed by SQL text
+CACHED_STATEMENTS = 256
+
+# Applied to every pooled connection; journal_mode is persistent and set once per file
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA foreign_keys = ON",
+)
+
+
+class ReviewRepository:
+    """
+    Per-process pool of tuned connections to one SQLite database.
+
+    The schema is created once when the pool is opened, not on every page
+    run. Connections are opened lazily up to `size`, switched to WAL so
+    dashboard reads do not block review inserts, and handed back to the
+    pool instead of being closed. Each connection caches its prepared
+    statements, so repeated queries skip SQL parsing.
+    """
+
+    def __init__(self, path, schema=None, size=POOL_SIZE):
+        """
+        Open the pool and set up the database
+
+        Args:
+            path (str): SQLite database file
+            schema (callable): Called with a connection to create tables and indexes
+            size (int): Maximum number of open connections
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._connections = []
+
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            if schema is not None:
+                schema(conn)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection, waiting while all of them are in use
+
+        A transaction left open by the caller is rolled back when the
+        connection returns to the pool.
+
+        Yields:
+            sqlite3.Connection: Pooled connection; do not close it
+        """
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every pooled connection, letting SQLite refresh its statistics first."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            conn.close()
+
+
+def create_review_schema(conn):
+    """
+    Create the reviews table and every table kept alongside it
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                email TEXT,
+                airline TEXT,
+                flight_type TEXT,
+                seat_class TEXT,
+                date_of_travel TEXT,
+                purpose_of_travel TEXT,
+                source TEXT,
+                destination TEXT,
+                booking_method TEXT,
+                frequent_flyer TEXT,
+                check_in_rating TEXT,
+                seat_comfort TEXT,
+                crew_service TEXT,
+                food_quality TEXT,
+                punctuality TEXT,
+                review_comment TEXT,
+                improvement_needed TEXT,
+                recommend TEXT,
+                sentiment TEXT,
+                fake_review TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for column in ("airline", "date_of_travel", "sentiment", "fake_review"):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_reviews_{column} ON reviews ({column})")
+    ensure_content_hash_column(conn)
+    ensure_alert_table(conn)
+    ensure_complaint_tables(conn)
+    ensure_reputation_table(conn)
+    create_csv_review_table(conn)
+    create_csv_review_indexes(conn)
+    create_search_index(conn)
+    create_rollup_tables(conn)
+    create_minhash_tables(conn)
+
+
+# CSV column -> (csv_reviews column, declared type); dates are stored as
+# ISO-8601 text, which sorts and compares chronologically
+CSV_REVIEW_COLUMNS = {
+    "Airline Name": ("airline", "TEXT NOT NULL"),
+    "Flight Type": ("flight_type", "TEXT"),
+    "Review Category": ("review_category", "TEXT"),
+    "Review Text": ("review_text", "TEXT"),
+    "Sentiment": ("sentiment", "TEXT"),
+    "Rating": ("rating", "INTEGER"),
+    "Date of Travel": ("travel_date", "DATE"),
+    "Source": ("source", "TEXT"),
+    "Destination": ("destination", "TEXT"),
+    "Sentiment Score": ("sentiment_score", "REAL"),
+    "Fake Review": ("is_fake", "INTEGER"),
+}
+
+# Index name -> indexed columns of csv_reviews
+CSV_REVIEW_INDEXES = {
+    "idx_csv_reviews_airline_date": "airline, travel_date",
+    "idx_csv_reviews_travel_date": "travel_date",
+    "idx_csv_reviews_sentiment": "sentiment, airline",
+    "idx_csv_reviews_fake": "is_fake, airline",
+}
+
+
+def create_csv_review_table(conn):
+    """
+    Create the typed table the review CSV is ingested into
+
+    review_id is the CSV row number, the same id the embedding index uses.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    columns = ",\n".join(f"    {name} {sql_type}" for name, sql_type in CSV_REVIEW_COLUMNS.values())
+    with conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS csv_reviews (\n    review_id INTEGER PRIMARY KEY,\n{columns}\n)")
+        # Stat stamp of the CSV the rows were loaded from, one row at most
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS csv_review_source (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            )
+        """)
+
+
+def create_csv_review_indexes(conn):
+    """
+    Create the csv_reviews indexes on airline, travel date, sentiment and fake flag
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    with conn:
+        for name, columns in CSV_REVIEW_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON csv_reviews ({columns})")
+
+
+def drop_csv_review_indexes(conn):
+    """
+    Drop the csv_reviews indexes, so a bulk load does not maintain them row by row
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    with conn:
+        for name in CSV_REVIEW_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def create_minhash_tables(conn):
+    """
+    Create the MinHash signature and LSH bucket tables of utils.near_duplicates
+
+    A review is in each band bucket at most once, so indexing it again does
+    not add rows. Bucket tables from before that rule have their repeated
+    rows removed.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS minhash_signatures (
+                doc_key TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS minhash_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                doc_key TEXT NOT NULL
+            )
+        """)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_minhash_buckets'").fetchone():
+            conn.execute("""
+                DELETE FROM minhash_buckets WHERE rowid NOT IN (
+                    SELECT MIN(rowid) FROM minhash_buckets GROUP BY band, bucket, doc_key
+                )
+            """)
+            conn.execute("DROP INDEX idx_minhash_buckets")
+        # Also serves the lookups by (band, bucket)
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_minhash_buckets_unique ON minhash_buckets (band, bucket, doc_key)"
+        )
+
+
+def create_legacy_schema(conn):
+    """
+    Create the reviews table of the older standalone store (reviews.db)
+
+    Args:
+        conn (sqlite3.Connection): Connection to the legacy database
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                email TEXT,
+                airline TEXT,
+                review TEXT,
+                sentiment TEXT,
+                fake_review TEXT,
+                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_repository(path=REVIEWS_DB_PATH, schema=create_review_schema):
+    """
+    Return the process-wide repository for a database, opening it on first use
+
+    Args:
+        path (str): SQLite database file
+        schema (callable): Schema set up when the repository is first opened
+
+    Returns:
+        ReviewRepository: Shared repository
+    """
+    key = os.path.abspath(path)
+    repository = _repositories.get(key)
+    if repository is None:
+        with _repositories_lock:
+            repository = _repositories.get(key)
+            if repository is None:
+                repository = _repositories[key] = ReviewRepository(path, schema)
+    return repository
+
+
+@atexit.register
+def _close_repositories():
+    for repository in list(_repositories.values()):
+        repository.close()
+
+
+def initialize_databases():
+    """Create the schemas of both review databases."""
+    get_repository(REVIEWS_DB_PATH, create_review_schema)
+    get_repository(LEGACY_REVIEWS_DB_PATH, create_legacy_schema)
+
+
+def import_legacy_reviews(legacy_repository, repository):
+    """
+    Copy reviews from the legacy store into the reviews table
+
+    Reviews whose content hash is already present are skipped, so the
+    import can be repeated.
+
+    Args:
+        legacy_repository (ReviewRepository): Repository over reviews.db
+        repository (ReviewRepository): Repository over the reviews database
+
+    Returns:
+        int: Number of reviews copied
+    """
+    with legacy_repository.connection() as legacy_conn:
+        rows = legacy_conn.execute(
+            "SELECT name, email, airline, review, sentiment, fake_review, date FROM reviews ORDER BY id"
+        ).fetchall()
+
+    n_copied = 0
+    with repository.connection() as conn, conn:
+        # Tables created before the timestamp column existed cannot gain it,
+        # as SQLite only adds columns with constant defaults
+        has_timestamp = "timestamp" in {row[1] for row in conn.execute("PRAGMA table_info(reviews)")}
+        columns = "name, email, airline, review_comment, sentiment, fake_review, content_hash"
+        if has_timestamp:
+            columns += ", timestamp"
+        insert = f"INSERT OR IGNORE INTO reviews ({columns}) VALUES ({', '.join('?' * len(columns.split(', ')))})"
+
+        for name, email, airline, review, sentiment, fake_review, date in rows:
+            values = (name, email, airline, review, sentiment, fake_review, review_content_hash(review))
+            # Skipped by the unique content_hash index when already present
+            n_copied += conn.execute(insert, values + (date,) if has_timestamp else values).rowcount
+    return n_copied
+
+
+def review_content_hash(text):
+    """
+    Content hash stored with a review, used to spot exact duplicates
+
+    Args:
+        text (str): Review comment
+
+    Returns:
+        str: Hash of the normalized comment, or None for an empty comment
+    """
+    normalized = normalize_review_text(text)
+    if not normalized:
+        return None
+    return review_text_hash(normalized, normalized=True)
+
+
+def ensure_content_hash_column(conn):
+    """
+    Add the content_hash column and its unique index to the reviews table
+
+    At most one review holds each hash, so two sessions submitting the same
+    text cannot both store it. Databases whose index was not unique keep
+    the hash on the earliest copy of each review only.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reviews)")}
+    with conn:
+        if "content_hash" not in columns:
+            conn.execute("ALTER TABLE reviews ADD COLUMN content_hash TEXT")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_reviews_content_hash'").fetchone():
+            conn.execute("""
+                UPDATE reviews SET content_hash = NULL
+                WHERE content_hash IS NOT NULL AND id > (
+                    SELECT MIN(id) FROM reviews AS first WHERE first.content_hash = reviews.content_hash
+                )
+            """)
+            conn.execute("DROP INDEX idx_reviews_content_hash")
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_unique_content_hash "
+            "ON reviews (content_hash) WHERE content_hash IS NOT NULL"
+        )
+
+
+def aspect_column(aspect_name):
+    """
+    Name of the reviews table column holding one aspect's sentiment score
+
+    Args:
+        aspect_name (str): Aspect name, e.g. "seat_comfort"
+
+    Returns:
+        str: Column name, e.g. "aspect_seat_comfort"
+    """
+    return f"aspect_{aspect_name}"
+
+
+def ensure_aspect_columns(conn, aspect_names):
+    """
+    Add one REAL column per aspect to the reviews table
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        aspect_names (list): Aspect names from SentimentAnalyzer.aspect_names
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reviews)")}
+    with conn:
+        for name in aspect_names:
+            if aspect_column(name) not in columns:
+                conn.execute(f"ALTER TABLE reviews ADD COLUMN {aspect_column(name)} REAL")
+
+
+def find_duplicate_review(conn, content_hash):
+    """
+    Look up an existing review with the same content hash
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        content_hash (str): Hash from review_content_hash()
+
+    Returns:
+        int: id of the existing review, or None
+    """
+    if content_hash is None:
+        return None
+    row = conn.execute(
+        "SELECT id FROM reviews WHERE content_hash = ? LIMIT 1", (content_hash,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def backfill_content_hashes(conn, chunk_size=5000):
+    """
+    Populate content_hash for reviews stored before the column existed
+
+    Copies of a review that is already hashed are left without a hash.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        chunk_size (int): Rows updated per transaction
+
+    Returns:
+        int: Number of rows hashed
+    """
+    ensure_content_hash_column(conn)
+    n_rows = 0
+    last_id = -1
+    while True:
+        rows = conn.execute(
+            "SELECT id, review_comment FROM reviews WHERE id > ? AND content_hash IS NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        with conn:
+            conn.executemany(
+                "UPDATE OR IGNORE reviews SET content_hash = ? WHERE id = ?",
+                [(review_content_hash(text), row_id) for row_id, text in rows]
+            )
+        n_rows += len(rows)
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance tasks for the review database")
+    parser.add_argument("task", choices=["init", "backfill-hashes", "import-legacy"])
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--legacy-db", default=LEGACY_REVIEWS_DB_PATH, help="Path to the legacy reviews.db")
+    args = parser.parse_args()
+
+    repository = get_repository(args.db)
+    start = time.perf_counter()
+    if args.task == "init":
+        get_repository(args.legacy_db, create_legacy_schema)
+        print(f"Initialized {args.db} and {args.legacy_db}")
+    elif args.task == "backfill-hashes":
+        with repository.connection() as conn:
+            n_rows = backfill_content_hashes(conn)
+        print(f"Hashed {n_rows} reviews in {time.perf_counter() - start:.2f} s")
+    else:
+        n_rows = import_legacy_reviews(get_repository(args.legacy_db, create_legacy_schema), repository)
+        print(f"Imported {n_rows} legacy reviews in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
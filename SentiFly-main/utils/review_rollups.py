@@ -0,0 +1,307 @@
+import argparse
+import time
+
+import pandas as pd
+
+from utils.utils import REVIEWS_DB_PATH
+
+# Dimensions a rollup row is keyed by; flight type is kept too for the
+# domestic / international split on the user dashboard
+ROLLUP_KEY = ("source", "airline", "year", "month", "category", "sentiment", "flight_type")
+
+# Source of a rollup row: the review CSV, or reviews submitted through the
+# form, which have neither a review category nor a star rating
+CSV_SOURCE = "csv"
+FORM_SOURCE = "form"
+
+# Star ratings counted per rollup row, so mean ratings and rating
+# distributions can both be read back
+RATING_STARS = (1, 2, 3, 4, 5)
+
+# Category of reviews not filed under one
+UNCATEGORISED = "Uncategorised"
+
+# Table -> rollup expressions of a row; {row} is "new", "old" or a table alias
+_ROLLUP_SOURCES = {
+    "csv_reviews": {
+        "source": f"'{CSV_SOURCE}'",
+        "airline": "{row}.airline",
+        "date": "{row}.travel_date",
+        "category": f"COALESCE({{row}}.review_category, '{UNCATEGORISED}')",
+        "sentiment": "COALESCE({row}.sentiment, 'Unknown')",
+        "flight_type": "COALESCE({row}.flight_type, 'Unknown')",
+        "fake": "({row}.is_fake IS 1)",
+        "rating": "{row}.rating",
+        "columns": "airline, travel_date, review_category, sentiment, flight_type, is_fake, rating",
+    },
+    "reviews": {
+        "source": f"'{FORM_SOURCE}'",
+        "airline": "COALESCE({row}.airline, 'Unknown')",
+        "date": "{row}.date_of_travel",
+        "category": f"'{UNCATEGORISED}'",
+        "sentiment": "COALESCE({row}.sentiment, 'Unknown')",
+        "flight_type": "COALESCE({row}.flight_type, 'Unknown')",
+        "fake": "({row}.fake_review IS 'Fake')",
+        "rating": "NULL",
+        "columns": "airline, date_of_travel, sentiment, flight_type, fake_review",
+    },
+}
+
+_COUNT_COLUMNS = ("reviews", "fake_reviews") + tuple(f"rating_{stars}" for stars in RATING_STARS)
+
+
+def _key_values(table, row):
+    """Rollup key expressions of one row, in ROLLUP_KEY order."""
+    source = {name: expression.format(row=row) for name, expression in _ROLLUP_SOURCES[table].items()}
+    # Reviews without a parseable travel date are kept under year and month 0
+    return [
+        source["source"],
+        source["airline"],
+        f"COALESCE(CAST(strftime('%Y', {source['date']}) AS INTEGER), 0)",
+        f"COALESCE(CAST(strftime('%m', {source['date']}) AS INTEGER), 0)",
+        source["category"],
+        source["sentiment"],
+        source["flight_type"],
+    ]
+
+
+def _count_values(table, row, sign=""):
+    """Count expressions one row adds to its rollup row, in _COUNT_COLUMNS order."""
+    source = {name: expression.format(row=row) for name, expression in _ROLLUP_SOURCES[table].items()}
+    return [f"{sign}1", f"{sign}{source['fake']}"] + [
+        f"{sign}({source['rating']} IS {stars})" for stars in RATING_STARS
+    ]
+
+
+def _upsert(values):
+    """INSERT of rollup counts that adds to an existing row of the same key."""
+    additions = ", ".join(f"{column} = {column} + excluded.{column}" for column in _COUNT_COLUMNS)
+    return (
+        f"INSERT INTO review_rollups ({', '.join(ROLLUP_KEY + _COUNT_COLUMNS)}) {values} "
+        f"ON CONFLICT ({', '.join(ROLLUP_KEY)}) DO UPDATE SET {additions}"
+    )
+
+
+def _row_statements(table, row, sign):
+    """Statements adding (sign "") or removing (sign "-") one row of table."""
+    keys = _key_values(table, row)
+    statements = [_upsert(f"VALUES ({', '.join(keys + _count_values(table, row, sign))})")]
+    if sign:
+        # Rollup rows left without reviews are dropped
+        match = " AND ".join(f"{column} = {value}" for column, value in zip(ROLLUP_KEY, keys))
+        statements.append(f"DELETE FROM review_rollups WHERE {match} AND reviews <= 0")
+    return statements
+
+
+def _create_triggers(conn, table):
+    insert = _row_statements(table, "new", "")
+    delete = _row_statements(table, "old", "-")
+    for action, event, statements in (
+        ("insert", "INSERT", insert),
+        ("delete", "DELETE", delete),
+        ("update", f"UPDATE OF {_ROLLUP_SOURCES[table]['columns']}", delete + insert),
+    ):
+        body = "".join(f"{statement};\n" for statement in statements)
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_{action} AFTER {event} ON {table} BEGIN\n{body}END"
+        )
+
+
+def _add_table(conn, table, where="", params=()):
+    """Add the rows of table matching where to the rollups with one grouped scan."""
+    keys = _key_values(table, "t")
+    counts = [f"SUM({value})" for value in _count_values(table, "t")]
+    conn.execute(
+        _upsert(f"SELECT {', '.join(keys + counts)} FROM {table} t "
+                f"WHERE {where or 'true'} GROUP BY {', '.join(map(str, range(1, len(keys) + 1)))}"),
+        params
+    )
+
+
+def create_rollup_tables(conn):
+    """
+    Create the dashboard rollup table and the triggers that maintain it
+
+    review_rollups holds review counts, fake review counts and per-star
+    rating counts of csv_reviews and reviews, one row per source, airline,
+    travel year and month, category, sentiment and flight type. Insert,
+    delete and update triggers on both tables keep it current, so
+    dashboards read a few hundred rows instead of every review. A table
+    created over existing reviews is filled once; one from before the
+    source column is rebuilt.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database,
+            with the reviews and csv_reviews tables already created
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(review_rollups)")}
+    exists = bool(columns)
+    if exists and "source" not in columns:
+        # The key changed, so the table is recreated rather than altered
+        for table in _ROLLUP_SOURCES:
+            drop_rollup_triggers(conn, table)
+        with conn:
+            conn.execute("DROP TABLE review_rollups")
+        exists = False
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS review_rollups (
+                source TEXT NOT NULL,
+                airline TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                flight_type TEXT NOT NULL,
+                {", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in _COUNT_COLUMNS)},
+                PRIMARY KEY ({", ".join(ROLLUP_KEY)})
+            ) WITHOUT ROWID
+        """)
+        for table in _ROLLUP_SOURCES:
+            _create_triggers(conn, table)
+        if not exists:
+            for table in _ROLLUP_SOURCES:
+                _add_table(conn, table)
+
+
+def drop_rollup_triggers(conn, table):
+    """
+    Stop maintaining the rollups from one table, e.g. for a bulk load
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+        table (str): "csv_reviews" or "reviews"
+    """
+    with conn:
+        for action in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_rollup_{action}")
+
+
+def rebuild_rollups(conn):
+    """
+    Recompute every rollup row from both review tables and restore the triggers
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    with conn:
+        conn.execute("DELETE FROM review_rollups")
+        for table in _ROLLUP_SOURCES:
+            _add_table(conn, table)
+            _create_triggers(conn, table)
+
+
+def rollup_csv_reviews(conn, first_id):
+    """
+    Add csv_reviews rows loaded without triggers and restore the triggers
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+        first_id (int): First review_id not counted yet
+    """
+    with conn:
+        _add_table(conn, "csv_reviews", "t.review_id >= ?", (first_id,))
+        _create_triggers(conn, "csv_reviews")
+
+
+def load_rollups(conn, airline=None, year=None, month=None, source=None):
+    """
+    Read rollup rows, optionally for one airline, travel year and month
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+        airline (str): Only this airline, if given
+        year (int): Only this travel year, if given
+        month (int): Only this travel month (1-12), if given
+        source (str): Only CSV_SOURCE or FORM_SOURCE rows, if given
+
+    Returns:
+        DataFrame: One row per rollup key, with the ROLLUP_KEY columns,
+            reviews, fake_reviews and rating_1 to rating_5
+    """
+    filters = []
+    params = []
+    for column, value in (("airline", airline), ("year", year), ("month", month), ("source", source)):
+        if value is not None:
+            filters.append(f"{column} = ?")
+            params.append(value)
+    where = f" WHERE {' AND '.join(filters)}" if filters else ""
+    return pd.read_sql_query(f"SELECT * FROM review_rollups{where}", conn, params=params)
+
+
+def rollup_dimensions(conn):
+    """
+    Airlines and travel periods that have rollup rows, for dashboard filters
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+
+    Returns:
+        tuple: (sorted airlines, sorted travel years, sorted travel months 1-12)
+    """
+    airlines = [row[0] for row in conn.execute("SELECT DISTINCT airline FROM review_rollups ORDER BY airline")]
+    periods = conn.execute("SELECT DISTINCT year, month FROM review_rollups WHERE year > 0").fetchall()
+    return airlines, sorted({year for year, _ in periods}), sorted({month for _, month in periods})
+
+
+def mean_ratings(rollups, by):
+    """
+    Mean star rating per group of rollup rows
+
+    Args:
+        rollups (DataFrame): Rows from load_rollups
+        by (str or list): Rollup columns to group by
+
+    Returns:
+        DataFrame: The group columns and Rating, for groups with ratings
+    """
+    stars = [f"rating_{stars}" for stars in RATING_STARS]
+    totals = rollups.groupby(by)[stars].sum()
+    rated = totals.sum(axis=1)
+    ratings = (totals * list(RATING_STARS)).sum(axis=1)[rated > 0] / rated[rated > 0]
+    return ratings.rename("Rating").reset_index()
+
+
+def rating_counts(rollups, by):
+    """
+    Number of reviews per star rating within each group of rollup rows
+
+    Args:
+        rollups (DataFrame): Rows from load_rollups
+        by (str or list): Rollup columns to group by
+
+    Returns:
+        DataFrame: The group columns, Rating and Reviews, without empty cells
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    totals = rollups.groupby(by)[[f"rating_{stars}" for stars in RATING_STARS]].sum().reset_index()
+    counts = totals.melt(id_vars=by, var_name="Rating", value_name="Reviews")
+    counts["Rating"] = counts["Rating"].str[len("rating_"):].astype(int)
+    return counts[counts["Reviews"] > 0].reset_index(drop=True)
+
+
+def main():
+    # Imported here as review_repository imports this module for its schema
+    from utils.review_repository import get_repository
+
+    parser = argparse.ArgumentParser(description="Pre-aggregated review counts for the dashboards")
+    parser.add_argument("task", choices=["rebuild", "show"])
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    parser.add_argument("--airline", help="Only this airline")
+    args = parser.parse_args()
+
+    with get_repository(args.db).connection() as conn:
+        if args.task == "rebuild":
+            start = time.perf_counter()
+            rebuild_rollups(conn)
+            print(f"Rebuilt the rollups in {time.perf_counter() - start:.2f} s")
+
+        rollups = load_rollups(conn, args.airline)
+        summary = rollups.groupby("airline")[["reviews", "fake_reviews"]].sum()
+        summary["mean rating"] = mean_ratings(rollups, "airline").set_index("airline")["Rating"]
+        print(summary.to_string(float_format="{:.2f}".format))
+        print(f"{len(rollups)} rollup rows for {int(rollups['reviews'].sum())} reviews")
+
+
+if __name__ == "__main__":
+    main()
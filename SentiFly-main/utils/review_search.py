@@ -0,0 +1,240 @@
+import argparse
+import time
+from collections import namedtuple
+
+from utils.keyword_matcher import tokenize
+from utils.utils import REVIEWS_DB_PATH
+
+SearchResult = namedtuple("SearchResult", ["source", "review_id", "airline", "travel_date", "snippet", "score"])
+
+# Table -> its full-text index and the columns search reads. Each index is
+# external-content over its own table with the table's integer primary
+# key as rowid, so text, snippets and filter columns are read back by
+# rowid lookups and nothing is stored twice.
+_SEARCH_SOURCES = {
+    "csv_reviews": {
+        "source": "csv", "index": "csv_review_search", "id": "review_id",
+        "text": "review_text", "date": "travel_date",
+    },
+    "reviews": {
+        "source": "form", "index": "form_review_search", "id": "id",
+        "text": "review_comment", "date": "date_of_travel",
+    },
+}
+
+
+def _create_triggers(conn, table):
+    index, row_id, text = (_SEARCH_SOURCES[table][key] for key in ("index", "id", "text"))
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index} (rowid, {text}) VALUES (new.{row_id}, new.{text});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {index} ({index}, rowid, {text}) VALUES ('delete', old.{row_id}, old.{text});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {text} ON {table} BEGIN
+            INSERT INTO {index} ({index}, rowid, {text}) VALUES ('delete', old.{row_id}, old.{text});
+            INSERT INTO {index} (rowid, {text}) VALUES (new.{row_id}, new.{text});
+        END
+    """)
+
+
+def drop_search_triggers(conn, table):
+    """
+    Stop keeping the search index in sync with one table, e.g. for a bulk load
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+        table (str): "csv_reviews" or "reviews"
+    """
+    with conn:
+        for action in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_search_{action}")
+
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def create_search_index(conn):
+    """
+    Create the FTS5 indexes over csv_reviews.review_text and reviews.review_comment
+
+    Each table gets its own external-content index: it stores only the
+    full-text index and reads text back from its table by primary key,
+    so review text is not stored twice. Insert, delete and update
+    triggers keep both in sync. An index created over existing rows is
+    filled once; the single index over both tables that older databases
+    have is replaced.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database,
+            with the reviews and csv_reviews tables already created
+    """
+    if _table_exists(conn, "review_search"):
+        # Its triggers have the same names, so they go first
+        for table in _SEARCH_SOURCES:
+            drop_search_triggers(conn, table)
+        with conn:
+            conn.execute("DROP TABLE review_search")
+            conn.execute("DROP VIEW IF EXISTS review_search_content")
+
+    with conn:
+        for table, source in _SEARCH_SOURCES.items():
+            index = source["index"]
+            exists = _table_exists(conn, index)
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+                    {source["text"]},
+                    content = '{table}',
+                    content_rowid = '{source["id"]}',
+                    tokenize = 'porter unicode61'
+                )
+            """)
+            _create_triggers(conn, table)
+            if not exists:
+                conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def rebuild_search_index(conn):
+    """
+    Re-index every review of both tables and restore the sync triggers
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+    """
+    with conn:
+        for table, source in _SEARCH_SOURCES.items():
+            conn.execute(f"INSERT INTO {source['index']} ({source['index']}) VALUES ('rebuild')")
+            _create_triggers(conn, table)
+
+
+def index_csv_reviews(conn, first_id):
+    """
+    Index csv_reviews rows loaded without triggers and restore the triggers
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+        first_id (int): First review_id that is not indexed yet
+    """
+    with conn:
+        conn.execute(
+            "INSERT INTO csv_review_search (rowid, review_text) "
+            "SELECT review_id, review_text FROM csv_reviews WHERE review_id >= ?",
+            (first_id,)
+        )
+        _create_triggers(conn, "csv_reviews")
+
+
+def match_query(text):
+    """
+    Turn free text into an FTS5 query matching reviews containing every word
+
+    Args:
+        text (str): Search box input, e.g. "lost baggage"
+
+    Returns:
+        str: FTS5 query, or None if the text has no words
+    """
+    words = tokenize(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_reviews(conn, text, airline=None, start_date=None, end_date=None, page=1, page_size=20):
+    """
+    Full-text search over both review tables, best matches first
+
+    Each table's index is matched in its own branch of one query, with
+    the airline and date filters as plain conditions on that table's
+    columns, read by primary key for every match. Scores are bm25 within
+    each table's index.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the reviews database
+        text (str): Words to search for
+        airline (str): Only reviews of this airline, if given
+        start_date (datetime.date): Earliest travel date, if given
+        end_date (datetime.date): Latest travel date, if given
+        page (int): 1-based page number
+        page_size (int): Results per page
+
+    Returns:
+        tuple: (list of SearchResult, whether another page follows)
+    """
+    query = match_query(text)
+    if query is None:
+        return [], False
+
+    branches = []
+    params = []
+    for table, source in _SEARCH_SOURCES.items():
+        index, date = source["index"], source["date"]
+        conditions = [f"{index} MATCH ?"]
+        params.append(query)
+        if airline is not None:
+            conditions.append("t.airline = ?")
+            params.append(airline)
+        if start_date is not None:
+            conditions.append(f"t.{date} >= ?")
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            conditions.append(f"t.{date} <= ?")
+            params.append(end_date.isoformat())
+        branches.append(f"""
+            SELECT '{source["source"]}' AS source, t.{source["id"]} AS review_id, t.airline, t.{date},
+                   snippet({index}, 0, '**', '**', '…', 16), bm25({index}) AS score
+            FROM {index} JOIN {table} t ON t.{source["id"]} = {index}.rowid
+            WHERE {" AND ".join(conditions)}
+        """)
+
+    # Ties are broken by id so pages do not overlap; one extra row tells
+    # whether there is a next page without counting all matches
+    params += [page_size + 1, (page - 1) * page_size]
+    rows = conn.execute(
+        f"{'UNION ALL'.join(branches)} ORDER BY score, source, review_id LIMIT ? OFFSET ?", params
+    ).fetchall()
+
+    results = [
+        SearchResult(source, review_id, airline_name, travel_date, snippet, -score)
+        for source, review_id, airline_name, travel_date, snippet, score in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
+
+
+def main():
+    # Imported here as review_repository imports this module for its schema
+    from utils.review_repository import get_repository
+
+    parser = argparse.ArgumentParser(description="Full-text review search")
+    subparsers = parser.add_subparsers(dest="task", required=True)
+    subparsers.add_parser("rebuild", help="Re-index every review")
+    search = subparsers.add_parser("search", help="Search review text")
+    search.add_argument("text", help="Words to search for")
+    search.add_argument("--airline", help="Only this airline")
+    search.add_argument("--page", type=int, default=1, help="1-based page number")
+    parser.add_argument("--db", default=REVIEWS_DB_PATH, help="Path to the SQLite database")
+    args = parser.parse_args()
+
+    with get_repository(args.db).connection() as conn:
+        start = time.perf_counter()
+        if args.task == "rebuild":
+            rebuild_search_index(conn)
+            print(f"Rebuilt the search index in {time.perf_counter() - start:.2f} s")
+            return
+
+        results, has_more = search_reviews(conn, args.text, args.airline, page=args.page)
+        elapsed = time.perf_counter() - start
+        for result in results:
+            print(f"{result.score:6.2f}  {result.source}:{result.review_id}  {result.airline}  "
+                  f"{result.travel_date}  {result.snippet}")
+        print(f"{len(results)} results in {elapsed * 1000:.1f} ms{', more on the next page' if has_more else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.directories import atomic_directory
+from utils.ingest import csv_source_stamp, parse_travel_dates
+from utils.utils import REVIEW_SNAPSHOT_PATH, REVIEWS_CSV_PATH
+
+# Bump when the snapshot layout changes; older snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 1
+# Leading underscore keeps the manifest out of Parquet dataset discovery
+MANIFEST_NAME = "_manifest.json"
+
+# CSV row number, the id used by csv_reviews and the embedding index
+REVIEW_ID_COLUMN = "Review Id"
+
+# Columns the snapshot is partitioned by, one directory level each
+PARTITION_COLUMNS = ("Airline Name", "Year")
+
+# Types of the known CSV columns; other columns are stored as float64 when
+# numeric (e.g. the aspect scores written by utils.rescore) or as strings
+_COLUMN_TYPES = {
+    REVIEW_ID_COLUMN: pa.int64(),
+    "Airline Name": pa.string(),
+    "Flight Type": pa.string(),
+    "Review Category": pa.string(),
+    "Review Text": pa.string(),
+    "Sentiment": pa.string(),
+    "Rating": pa.int8(),
+    "Date of Travel": pa.date32(),
+    "Source": pa.string(),
+    "Destination": pa.string(),
+    "Sentiment Score": pa.float64(),
+    "Fake Review": pa.int8(),
+    "Year": pa.int16(),
+}
+
+_PANDAS_TYPES = {pa.int8(): "Int8", pa.int16(): "Int16", pa.int64(): "Int64"}
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([(name, _COLUMN_TYPES[name]) for name in PARTITION_COLUMNS]), flavor="hive"
+)
+
+# Row groups small enough for id and date statistics to skip most of a file
+ROWS_PER_GROUP = 64 * 1024
+
+_build_lock = threading.Lock()
+
+
+def _snapshot_schema(csv_path):
+    """Arrow schema of the snapshot, from the CSV header and a sample of rows."""
+    sample = pd.read_csv(csv_path, nrows=1000)
+    fields = [pa.field(REVIEW_ID_COLUMN, _COLUMN_TYPES[REVIEW_ID_COLUMN])]
+    for column in sample.columns:
+        if column in _COLUMN_TYPES:
+            column_type = _COLUMN_TYPES[column]
+        elif pd.api.types.is_numeric_dtype(sample[column]):
+            column_type = pa.float64()
+        else:
+            column_type = pa.string()
+        fields.append(pa.field(column, column_type))
+    fields.append(pa.field("Year", _COLUMN_TYPES["Year"]))
+    return pa.schema(fields)
+
+
+def _typed_chunk(chunk, first_id, schema):
+    """Convert a CSV chunk to the snapshot schema, adding review ids and years."""
+    chunk = chunk.copy()
+    chunk.insert(0, REVIEW_ID_COLUMN, range(first_id, first_id + len(chunk)))
+    if "Date of Travel" in chunk.columns:
+        dates = parse_travel_dates(chunk["Date of Travel"])
+        chunk["Date of Travel"] = dates.dt.date
+        chunk["Year"] = dates.dt.year
+    for field in schema:
+        if field.name not in chunk.columns:
+            chunk[field.name] = None
+        elif field.type in _PANDAS_TYPES:
+            values = pd.to_numeric(chunk[field.name], errors="coerce").round()
+            chunk[field.name] = values.astype(_PANDAS_TYPES[field.type])
+        elif field.type == pa.float64():
+            chunk[field.name] = pd.to_numeric(chunk[field.name], errors="coerce")
+        elif field.type == pa.string():
+            chunk[field.name] = chunk[field.name].astype(object).where(chunk[field.name].notna(), None)
+    return pa.Table.from_pandas(chunk[schema.names], schema=schema, preserve_index=False)
+
+
+def build_snapshot(csv_path=REVIEWS_CSV_PATH, out_path=REVIEW_SNAPSHOT_PATH, chunk_size=100000):
+    """
+    Write the review CSV as Parquet files partitioned by airline and travel year
+
+    The CSV is streamed in chunks with explicit types: dates are parsed
+    once here instead of on every page load, and string columns are
+    dictionary-encoded. Each row keeps its CSV row number as Review Id.
+    A previous snapshot is replaced in one rename by atomic_directory().
+
+    Args:
+        csv_path (str): Review CSV
+        out_path (str): Snapshot directory to create or replace
+        chunk_size (int): CSV rows converted per batch
+
+    Returns:
+        dict: The written manifest
+    """
+    source = csv_source_stamp(csv_path)
+    schema = _snapshot_schema(csv_path)
+    n_rows = 0
+
+    def batches():
+        nonlocal n_rows
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            yield from _typed_chunk(chunk, n_rows, schema).to_batches()
+            n_rows += len(chunk)
+
+    string_columns = [field.name for field in schema
+                      if field.type == pa.string() and field.name not in PARTITION_COLUMNS]
+    with atomic_directory(out_path) as tmp_dir:
+        ds.write_dataset(
+            batches(), tmp_dir, schema=schema, format="parquet",
+            partitioning=_PARTITIONING,
+            file_options=ds.ParquetFileFormat().make_write_options(
+                use_dictionary=string_columns, compression="zstd"
+            ),
+            basename_template="part-{i}.parquet", max_rows_per_group=ROWS_PER_GROUP,
+            min_rows_per_group=min(ROWS_PER_GROUP, chunk_size), existing_data_behavior="overwrite_or_ignore"
+        )
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": source,
+            "rows": n_rows,
+            "columns": schema.names,
+            "dictionary_columns": string_columns,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+
+    return manifest
+
+
+def read_snapshot_manifest(path=REVIEW_SNAPSHOT_PATH):
+    """
+    Read a snapshot's manifest
+
+    Args:
+        path (str): Snapshot directory
+
+    Returns:
+        dict: The manifest, or None if there is no snapshot
+    """
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def ensure_snapshot(path=REVIEW_SNAPSHOT_PATH, csv_path=REVIEWS_CSV_PATH):
+    """
+    Return the snapshot's manifest, building the snapshot first if the CSV changed
+
+    A snapshot is current when it was built from the CSV's present size and
+    modification time, so only one stat and a small JSON read are paid when
+    nothing changed.
+
+    Args:
+        path (str): Snapshot directory
+        csv_path (str): Review CSV the snapshot is built from
+
+    Returns:
+        dict: Manifest of the current snapshot
+    """
+    def current_manifest():
+        manifest = read_snapshot_manifest(path)
+        if (manifest is not None and manifest["format_version"] == SNAPSHOT_FORMAT_VERSION
+                and manifest["source"] == csv_source_stamp(csv_path)):
+            return manifest
+        return None
+
+    manifest = current_manifest()
+    if manifest is None:
+        with _build_lock:
+            manifest = current_manifest() or build_snapshot(csv_path, path)
+    return manifest
+
+
+def load_reviews(columns=None, airline=None, year=None, filters=None,
+                 path=REVIEW_SNAPSHOT_PATH, csv_path=REVIEWS_CSV_PATH):
+    """
+    Read reviews from the Parquet snapshot
+
+    Only the requested columns are read, airline and year select partition
+    directories, and other filters are checked against row group
+    statistics before any page is decoded. Files are memory-mapped and
+    string columns come back as pandas categoricals.
+
+    Args:
+        columns (list): Columns to read; all of them if None
+        airline (str): Only this airline, if given
+        year (int): Only this travel year, if given
+        filters (list): Extra (column, op, value) conditions, all of which must
+            hold, e.g. [("Review Id", "in", [3, 7])]
+        path (str): Snapshot directory
+        csv_path (str): Review CSV the snapshot is built from
+
+    Returns:
+        DataFrame: Matching reviews indexed by Review Id, the CSV row number
+    """
+    manifest = ensure_snapshot(path, csv_path)
+    if columns is not None:
+        columns = [REVIEW_ID_COLUMN] + [column for column in columns if column != REVIEW_ID_COLUMN]
+    conditions = list(filters or [])
+    if airline is not None:
+        conditions.append(("Airline Name", "=", airline))
+    if year is not None:
+        conditions.append(("Year", "=", int(year)))
+
+    if not manifest["rows"]:
+        return pd.DataFrame(columns=columns or manifest["columns"]).set_index(REVIEW_ID_COLUMN)
+    dictionary_columns = [
+        column for column in manifest["dictionary_columns"] if columns is None or column in columns
+    ]
+    table = pq.read_table(
+        path, columns=columns, filters=conditions or None, partitioning=_PARTITIONING,
+        memory_map=True, read_dictionary=dictionary_columns
+    )
+    # Partitions come back one after the other; rows are returned in CSV order
+    return table.to_pandas(date_as_object=False).set_index(REVIEW_ID_COLUMN).sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet snapshot of the review CSV")
+    parser.add_argument("task", choices=["build", "show"])
+    parser.add_argument("--csv", default=REVIEWS_CSV_PATH, help="Review CSV")
+    parser.add_argument("--path", default=REVIEW_SNAPSHOT_PATH, help="Snapshot directory")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="CSV rows per batch")
+    args = parser.parse_args()
+
+    if args.task == "build":
+        start = time.perf_counter()
+        manifest = build_snapshot(args.csv, args.path, args.chunk_size)
+        print(f"Wrote {manifest['rows']:,} rows in {time.perf_counter() - start:.2f} s")
+
+    manifest = read_snapshot_manifest(args.path)
+    if manifest is None:
+        print("No snapshot; build one with `python -m utils.review_snapshot build`")
+        return
+    n_files = 0
+    n_bytes = 0
+    for root, _, names in os.walk(args.path):
+        for name in names:
+            if name.endswith(".parquet"):
+                n_files += 1
+                n_bytes += os.path.getsize(os.path.join(root, name))
+    stale = manifest["source"] != csv_source_stamp(args.csv)
+    print(f"{manifest['rows']:,} rows in {n_files} files, {n_bytes / 1e6:.1f} MB, built {manifest['built_at']}"
+          f"{' (stale, the CSV has changed since)' if stale else ''}")
+
+
+if __name__ == "__main__":
+    main()
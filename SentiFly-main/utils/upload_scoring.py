@@ -0,0 +1,147 @@
+import os
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 20000
+
+# Columns kept in memory for the dashboard; everything else stays on disk
+SUMMARY_COLUMNS = ["Sentiment", "Is Fake", "Review Length", "Review Date"]
+
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class ScoredUpload:
+    """
+    Scored upload: the full result in a temporary CSV plus the in-memory
+    summary columns
+
+    The temporary file is removed by close(), or at the latest when the
+    object is garbage collected (e.g. with the session that held it) or
+    the process exits. Per-sentiment extracts are built on first use and
+    kept, so page reruns do not read the file again.
+    """
+
+    def __init__(self, key, path, summary):
+        self.key = key
+        self.path = path
+        self.summary = summary
+        self._sentiment_csvs = {}
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def sentiment_csv(self, sentiment):
+        """CSV bytes of the rows with one sentiment, cached per sentiment."""
+        data = self._sentiment_csvs.get(sentiment)
+        if data is None:
+            data = self._sentiment_csvs[sentiment] = filter_scored_csv(self.path, sentiment)
+        return data
+
+    def report_csv(self):
+        """CSV bytes of the full scored file."""
+        with open(self.path, "rb") as csv_file:
+            return csv_file.read()
+
+    def close(self):
+        """Remove the temporary file."""
+        self._finalizer()
+
+
+def score_review_chunks(file, analyzer, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE):
+    """
+    Stream a review CSV in fixed-size chunks, filling in missing
+    Sentiment and Is Fake columns with the analyzer
+
+    Args:
+        file: Path or file-like object with the CSV
+        analyzer (SentimentAnalyzer): Analyzer used for missing columns
+        chunk_size (int): Rows per chunk
+
+    Yields:
+        DataFrame: Scored chunk with a "Review" column
+    """
+    labels = np.asarray(analyzer.labels, dtype=object)
+    for chunk in pd.read_csv(file, chunksize=chunk_size):
+        if "Review Text" in chunk.columns:
+            chunk = chunk.rename(columns={"Review Text": "Review"})
+        if "Review" not in chunk.columns:
+            raise ValueError("CSV must contain a 'Review' or 'Review Text' column")
+
+        if "Sentiment" not in chunk.columns or "Is Fake" not in chunk.columns:
+            result = analyzer.analyze_many(chunk["Review"])
+            if "Sentiment" not in chunk.columns:
+                chunk["Sentiment"] = labels[result["label_code"]]
+            if "Is Fake" not in chunk.columns:
+                chunk["Is Fake"] = np.where(result["is_fake"], "Yes", "No")
+
+        yield chunk
+
+
+def score_upload(file, analyzer, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE, progress=None, key=None):
+    """
+    Score an uploaded review CSV in one streaming pass
+
+    The full scored file is written to a temporary CSV; only the small
+    summary columns used by the dashboard are kept in memory.
+
+    Args:
+        file: Uploaded file-like object
+        analyzer (SentimentAnalyzer): Analyzer used for missing columns
+        chunk_size (int): Rows per chunk
+        progress (callable): Called with the fraction of the file read
+        key: Identifies the upload, stored on the result
+
+    Returns:
+        ScoredUpload: Scored CSV and summary DataFrame
+    """
+    total_bytes = getattr(file, "size", None)
+    fd, scored_path = tempfile.mkstemp(prefix="scored_reviews_", suffix=".csv")
+    os.close(fd)
+
+    summaries = []
+    try:
+        for i, chunk in enumerate(score_review_chunks(file, analyzer, chunk_size)):
+            chunk["Review Length"] = chunk["Review"].astype(str).str.len().astype(np.int32)
+            chunk.to_csv(scored_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+            summary = chunk[[column for column in SUMMARY_COLUMNS if column in chunk.columns]].copy()
+            summary["Sentiment"] = summary["Sentiment"].astype("category")
+            summary["Is Fake"] = summary["Is Fake"].astype(str).astype("category")
+            summaries.append(summary)
+
+            if progress is not None and total_bytes:
+                progress(min(file.tell() / total_bytes, 1.0))
+    except Exception:
+        os.remove(scored_path)
+        raise
+
+    if not summaries:
+        os.remove(scored_path)
+        raise ValueError("CSV file contains no reviews")
+
+    summary = pd.concat(summaries, ignore_index=True)
+    for column in ("Sentiment", "Is Fake"):
+        summary[column] = summary[column].astype(str).astype("category")
+    return ScoredUpload(key, scored_path, summary)
+
+
+def filter_scored_csv(scored_path, sentiment, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE):
+    """
+    Extract the rows with one sentiment from a scored CSV
+
+    Args:
+        scored_path (str): Path of a scored CSV written by score_upload()
+        sentiment (str): Sentiment to keep
+        chunk_size (int): Rows read per chunk
+
+    Returns:
+        bytes: CSV content of the matching rows
+    """
+    parts = []
+    for i, chunk in enumerate(pd.read_csv(scored_path, chunksize=chunk_size)):
+        parts.append(chunk[chunk["Sentiment"] == sentiment].to_csv(index=False, header=i == 0))
+    return "".join(parts).encode("utf-8")
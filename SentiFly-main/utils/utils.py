@@ -1,11 +1,59 @@
+import os
 import re
 import csv
 import json
+import hashlib
 import logging
 from collections import Counter
 
+import numpy as np
+import pandas as pd
+
+from utils.keyword_matcher import tokenize
+
 logger = logging.getLogger(__name__)
 
+# Review data files live at the repository root
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+REVIEWS_CSV_PATH = os.path.join(DATA_DIR, "airline_reviews_with_fake.csv")
+REVIEWS_DB_PATH = os.path.join(DATA_DIR, "airline_reviews.db")
+# Older standalone store created by database.py
+LEGACY_REVIEWS_DB_PATH = os.path.join(DATA_DIR, "reviews.db")
+LEXICONS_PATH = os.path.join(DATA_DIR, "sentiment_lexicons.json")
+REVIEW_EMBEDDINGS_PATH = os.path.join(DATA_DIR, "review_embeddings")
+# Parquet copy of the review CSV, partitioned by airline and travel year
+REVIEW_SNAPSHOT_PATH = os.path.join(DATA_DIR, "review_snapshot")
+
+# Patterns used by clean_text, compiled once
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_HTML_RE = re.compile(r'<.*?>')
+_SPECIAL_RE = re.compile(r'[^\w\s]')
+_DIGITS_RE = re.compile(r'\d+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# For ASCII text the special character, digit and whitespace steps reduce
+# to one translate table; it is derived from the patterns above so both
+# paths agree. Newlines are kept because clean_text_series uses them to
+# separate texts.
+_ASCII_CLEAN_TABLE = {}
+for _char in map(chr, range(128)):
+    if _SPECIAL_RE.match(_char) or _DIGITS_RE.match(_char):
+        _ASCII_CLEAN_TABLE[ord(_char)] = None
+    elif _char != "\n" and _WHITESPACE_RE.match(_char):
+        _ASCII_CLEAN_TABLE[ord(_char)] = " "
+_SPACE_RUN_RE = re.compile(r' {2,}')
+
+CLEAN_CHUNK_SIZE = 10000
+
+# Column order of text_feature_matrix, same keys as extract_text_features
+TEXT_FEATURE_COLUMNS = [
+    'review_length', 'word_count', 'avg_word_length', 'exclamation_count',
+    'question_count', 'uppercase_ratio', 'repeated_words', 'superlative_count'
+]
+
+# Lazily built lookup of str.isupper() for every code point
+_uppercase_table = None
+
 # Text preprocessing functions
 def clean_text(text):
     """
@@ -24,20 +72,77 @@ def clean_text(text):
     text = text.lower()
     
     # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    text = _URL_RE.sub('', text)
     
     # Remove HTML tags
-    text = re.sub(r'<.*?>', '', text)
+    text = _HTML_RE.sub('', text)
     
     # Remove special characters and numbers
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\d+', '', text)
+    text = _SPECIAL_RE.sub('', text)
+    text = _DIGITS_RE.sub('', text)
     
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WHITESPACE_RE.sub(' ', text).strip()
     
     return text
 
+def clean_text_series(texts, chunk_size=CLEAN_CHUNK_SIZE):
+    """
+    Clean a whole column of texts, giving exactly the output of clean_text
+    
+    Each chunk of texts is joined into one newline-separated string so every
+    pattern runs once per chunk instead of once per text. None of the
+    patterns match across a newline, so the texts stay independent; texts
+    that contain newlines themselves go through clean_text.
+    
+    Args:
+        texts (Series or iterable): Texts to clean
+        chunk_size (int): Texts joined per pass, bounding the extra memory
+        
+    Returns:
+        Series: Cleaned texts, with the index of texts when it is a Series
+    """
+    index = texts.index if isinstance(texts, pd.Series) else None
+    values = texts.tolist() if hasattr(texts, "tolist") else list(texts)
+    
+    cleaned = []
+    for start in range(0, len(values), chunk_size):
+        cleaned.extend(_clean_text_chunk(values[start:start + chunk_size]))
+    return pd.Series(cleaned, index=index, dtype=object)
+
+def _clean_text_chunk(values):
+    """Clean one chunk of texts for clean_text_series."""
+    cleaned = [""] * len(values)
+    batch = []
+    for i, text in enumerate(values):
+        if isinstance(text, str):
+            if "\n" in text:
+                cleaned[i] = clean_text(text)
+            else:
+                batch.append(i)
+    if not batch:
+        return cleaned
+    
+    joined = "\n".join([values[i] for i in batch]).lower()
+    
+    # Skip the URL and HTML passes when nothing in the chunk could match
+    if "http" in joined or "www." in joined:
+        joined = _URL_RE.sub('', joined)
+    if "<" in joined:
+        joined = _HTML_RE.sub('', joined)
+    
+    if joined.isascii():
+        joined = _SPACE_RUN_RE.sub(' ', joined.translate(_ASCII_CLEAN_TABLE))
+        joined = joined.replace(' \n', '\n').replace('\n ', '\n').strip(' ')
+        results = joined.split("\n")
+    else:
+        joined = _DIGITS_RE.sub('', _SPECIAL_RE.sub('', joined))
+        results = [" ".join(text.split()) for text in joined.split("\n")]
+    
+    for i, text in zip(batch, results):
+        cleaned[i] = text
+    return cleaned
+
 def preprocess_text(text):
     """
     Simplified text preprocessing pipeline
@@ -50,6 +155,32 @@ def preprocess_text(text):
     """
     return clean_text(text)
 
+def normalize_review_text(text):
+    """
+    Normalize review text for duplicate detection and result caching
+    
+    Args:
+        text (str): Raw review text
+        
+    Returns:
+        str: Lowercased words without special characters, single-spaced
+    """
+    return " ".join(tokenize(text))
+
+def review_text_hash(text, normalized=False):
+    """
+    Hash the normalized form of a review text
+    
+    Args:
+        text (str): Review text
+        normalized (bool): Whether text is already normalized
+        
+    Returns:
+        str: Hex digest identifying the normalized text
+    """
+    normalized = text if normalized else normalize_review_text(text)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
 # Helper function to count keyword occurrences in text
 def count_keywords(text, keyword_list):
     """
@@ -83,7 +214,23 @@ def extract_text_features(text):
         
     # Preprocess text
     processed_text = preprocess_text(text)
-    words = processed_text.split()
+    return text_features_from_words(text, processed_text.split())
+
+def text_features_from_words(text, words):
+    """
+    Extract fake review features from raw text and its already split words,
+    so callers that tokenized the text once can reuse the tokens
+    
+    Args:
+        text (str): Raw text, used for length, punctuation and case features
+        words (list): Words of clean_text(text), which drops digits, URLs
+            and HTML tags that tokenize() keeps
+        
+    Returns:
+        dict: Dictionary of extracted features
+    """
+    if not isinstance(text, str):
+        text = ""
     
     # Extract basic features
     features = {
@@ -106,6 +253,109 @@ def extract_text_features(text):
     
     return features
 
+def text_feature_matrix(texts, chunk_size=CLEAN_CHUNK_SIZE):
+    """
+    Extract fake review features for many texts into a float32 matrix
+    
+    Gives the values of extract_text_features for every text, one row per
+    text and one column per name in TEXT_FEATURE_COLUMNS. Texts are handled
+    chunk_size at a time, so apart from the result (32 bytes per row) the
+    memory used does not grow with the number of texts.
+    
+    Args:
+        texts (Series or iterable): Raw review texts
+        chunk_size (int): Texts processed per chunk
+        
+    Returns:
+        tuple: (float32 array of shape (n_texts, n_features), column names)
+    """
+    if hasattr(texts, "__len__"):
+        matrix = np.empty((len(texts), len(TEXT_FEATURE_COLUMNS)), dtype=np.float32)
+        row = 0
+        for chunk_features in iter_text_feature_chunks(texts, chunk_size):
+            matrix[row:row + len(chunk_features)] = chunk_features
+            row += len(chunk_features)
+    else:
+        chunks = list(iter_text_feature_chunks(texts, chunk_size))
+        if chunks:
+            matrix = np.concatenate(chunks)
+        else:
+            matrix = np.empty((0, len(TEXT_FEATURE_COLUMNS)), dtype=np.float32)
+    return matrix, list(TEXT_FEATURE_COLUMNS)
+
+def iter_text_feature_chunks(texts, chunk_size=CLEAN_CHUNK_SIZE):
+    """
+    Yield text_feature_matrix rows one chunk at a time, for inputs too large
+    to hold the whole matrix or for streaming from pd.read_csv chunks
+    
+    Args:
+        texts (Series or iterable): Raw review texts
+        chunk_size (int): Texts per yielded chunk
+        
+    Yields:
+        np.ndarray: float32 feature rows of one chunk
+    """
+    values = texts.tolist() if hasattr(texts, "tolist") else texts
+    chunk = []
+    for text in values:
+        chunk.append(text if isinstance(text, str) else "")
+        if len(chunk) == chunk_size:
+            yield _text_feature_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield _text_feature_chunk(chunk)
+
+def _segment_counts(flags, ends):
+    """Count set flags per text, given the end offset of every text."""
+    text_ids = np.searchsorted(ends, np.flatnonzero(flags), side='right')
+    return np.bincount(text_ids, minlength=len(ends))
+
+def _text_feature_chunk(texts):
+    """Compute the feature rows of one chunk of strings for text_feature_matrix."""
+    global _uppercase_table
+    if _uppercase_table is None:
+        _uppercase_table = np.fromiter(
+            (chr(code).isupper() for code in range(0x110000)), dtype=bool, count=0x110000
+        )
+    
+    features = np.zeros((len(texts), len(TEXT_FEATURE_COLUMNS)), dtype=np.float64)
+    
+    # Raw text features from the code points of the whole chunk at once
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    ends = np.cumsum(lengths)
+    codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    features[:, 0] = lengths
+    features[:, 3] = _segment_counts(codes == ord('!'), ends)
+    features[:, 4] = _segment_counts(codes == ord('?'), ends)
+    uppercase = _segment_counts(_uppercase_table[codes], ends)
+    features[:, 5] = np.divide(uppercase, lengths, out=np.zeros(len(texts)), where=lengths > 0)
+    
+    # Word features from the cleaned text, which is single-spaced
+    cleaned = clean_text_series(texts, chunk_size=len(texts)).tolist()
+    cleaned_lengths = np.fromiter(map(len, cleaned), dtype=np.int64, count=len(texts))
+    word_counts = np.fromiter(
+        (text.count(' ') + 1 if text else 0 for text in cleaned), dtype=np.int64, count=len(texts)
+    )
+    features[:, 1] = word_counts
+    features[:, 2] = np.divide(
+        cleaned_lengths - np.maximum(word_counts - 1, 0), word_counts,
+        out=np.zeros(len(texts)), where=word_counts > 0
+    )
+    features[:, 7] = np.fromiter(
+        (text.count('est ') + text.endswith('est') for text in cleaned), dtype=np.int64, count=len(texts)
+    )
+    
+    # Words repeated more than three times within their text
+    words = " ".join(cleaned).split()
+    if words:
+        word_ids, vocabulary = pd.factorize(pd.Series(words, dtype=object))
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), word_counts)
+        pairs, pair_counts = np.unique(rows * len(vocabulary) + word_ids, return_counts=True)
+        repeated_rows = pairs[pair_counts > 3] // len(vocabulary)
+        features[:, 6] = np.bincount(repeated_rows, minlength=len(texts))
+    
+    return features.astype(np.float32)
+
 def load_csv_data(file_path):
     """
     Load data from CSV file
@@ -1,25 +1,12 @@
-import sqlite3
+import os
+import sys
 
-# Connect to SQLite database (or create it)
-conn = sqlite3.connect("reviews.db")
-cursor = conn.cursor()
+# The review repository lives in the app package next to this script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "SentiFly-main"))
 
-# Create table if it doesn't exist
-cursor.execute("""
-    CREATE TABLE IF NOT EXISTS reviews (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT,
-        airline TEXT,
-        review TEXT,
-        sentiment TEXT,
-        fake_review TEXT,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-""")
+from utils.review_repository import initialize_databases
 
-# Commit and close
-conn.commit()
-conn.close()
+# Create both review databases (reviews.db and airline_reviews.db) with their schemas
+initialize_databases()
 
 print("Database setup complete!")